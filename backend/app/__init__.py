@@ -30,6 +30,62 @@ material_collection = db["materials"]  # New collection for craft materials
 orders_collection = db["orders"]
 # auction_collection = db["auctions"]
 bid_collection = db["bids"]
+job_state_collection = db["job_state"]  # Checkpoints for migrations and batch jobs
+media_collection = db["media_objects"]  # Content-addressed uploads and their reference counts
+upload_sessions_collection = db["upload_sessions"]  # Resumable chunked uploads
+exports_collection = db["exports"]  # Progress of bulk exports
+jobs_collection = db["jobs"]  # Background document rendering
+event_registrations_collection = db["event_registrations"]  # One document per (event, user)
+
+def ensure_indexes():
+    """Create the indexes the API queries rely on (no-op if they already exist)"""
+    # Price range filters and sorts on the catalog
+    for collection in (product_collection, material_collection):
+        collection.create_index([("price", 1)])
+        collection.create_index([("category", 1), ("price", 1)])
+        collection.create_index([("seller_id", 1)])
+
+    # User lookups by login identity (cart, wishlist, profile)
+    users_collection.create_index([("email", 1)])
+    users_collection.create_index([("seller_id", 1)], sparse=True)
+
+    # Trending counters: ranked per kind over a time window, expired after 8 days
+    db["activity_counters"].create_index([("kind", 1), ("bucket", 1)])
+    db["activity_counters"].create_index([("bucket", 1)], expireAfterSeconds=8 * 24 * 3600)
+
+    # Abandoned chunked uploads expire on their own
+    upload_sessions_collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
+
+    # Invoice export date ranges; export progress records expire after a day
+    orders_collection.create_index([("created_at", 1)])
+    exports_collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
+
+    # Job queue: claim order, per-user caps, expired leases; finished jobs expire
+    jobs_collection.create_index([("status", 1), ("priority", -1), ("created_at", 1)])
+    jobs_collection.create_index([("status", 1), ("owner", 1)])
+    jobs_collection.create_index([("status", 1), ("lease_until", 1)])
+    jobs_collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
+
+    # Streamed exports walk these in sort order instead of sorting in memory
+    orders_collection.create_index([("items.seller_id", 1), ("created_at", -1)])
+    db["complaints"].create_index([("createdAt", -1)])
+
+    # Admin listings filtered by status / instructor and paged on _id
+    bids_collection.create_index([("status", 1), ("_id", -1)])
+    events_collection.create_index([("instructor_id", 1)])
+
+    # Per-user activity statistics
+    orders_collection.create_index([("user_identity", 1)])
+    orders_collection.create_index([("user_email", 1)])
+    db["product_reviews"].create_index([("user_email", 1)])
+
+    # One registration per user and event; a user's events; paid checkouts
+    from app.utils import registrations
+    registrations.ensure_indexes(event_registrations_collection)
+
+    # Incremental analytics rollups read only the days since their last run
+    bids_collection.create_index([("created_at", 1)])
+    bids_collection.create_index([("status", 1), ("last_date", 1)])
 
 def create_app():
     # Configure static file serving
@@ -62,6 +118,48 @@ def create_app():
     # Initialize extensions
     bcrypt.init_app(app)
 
+    try:
+        ensure_indexes()
+    except Exception as e:
+        print(f"Error creating indexes: {e}")
+
+    # Registrations are read only from event_registrations; never serve before
+    # the legacy registered_users arrays have been moved there
+    from app.utils import registrations
+    registrations.ensure_migrated()
+
+    # Local disk or S3-compatible media storage (MEDIA_STORAGE)
+    from app.utils import storage
+    storage.init_app(app)
+
+    # Stream form uploads to disk with per-type size limits
+    from app.utils import media_store
+    media_store.init_app(app)
+
+    # Caching headers and optional X-Accel-Redirect/X-Sendfile offload for uploads
+    from app.utils import media_serving
+    media_serving.init_app(app)
+
+    # Build the in-memory autocomplete indexes in the background
+    from app.utils import autocomplete
+    autocomplete.init_app(app)
+
+    # Buffered activity counters and periodic trending scores
+    from app.utils import trending
+    trending.init_app(app)
+
+    # Platform counters for the admin dashboard, flushed and reconciled in the background
+    from app.utils import counters
+    counters.init_app(app)
+
+    # Daily analytics buckets, rolled up incrementally in the background
+    from app.utils import analytics
+    analytics.init_app(app)
+
+    # Dispatcher for background PDF rendering (JOB_DISPATCHER=off to run it separately)
+    from app.utils import job_queue
+    job_queue.init_app(app)
+
     # ✅ Configure Upload Folder
     UPLOAD_FOLDER = Path("uploads") / "product_images"
     UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
@@ -83,6 +181,11 @@ def create_app():
     from app.controllers.event import event_bp  # Add this line
     from app.controllers.auth import auth_bp  # Add this line
     from app.controllers.events import events_bp  # Add this line
+    from app.controllers.autocomplete import autocomplete_bp
+    from app.controllers.cart import cart_bp
+    from app.controllers.media import media_bp, serve_upload
+    from app.controllers.upload_sessions import upload_sessions_bp
+    from app.controllers.jobs import jobs_bp
     
     app.register_blueprint(home_bp)
     app.register_blueprint(user_bp, url_prefix='/user')  # Updated to match the new name
@@ -99,6 +202,14 @@ def create_app():
     app.register_blueprint(event_bp, url_prefix='/event')  # Add this line
     app.register_blueprint(auth_bp, url_prefix='/auth')  # Add this line
     app.register_blueprint(events_bp, url_prefix='/events')  # Add this line
+    app.register_blueprint(autocomplete_bp, url_prefix='/autocomplete')
+    app.register_blueprint(cart_bp)  # /cart and /wishlist
+    app.register_blueprint(media_bp, url_prefix='/media')
+    app.register_blueprint(upload_sessions_bp, url_prefix='/upload-sessions')
+    app.register_blueprint(jobs_bp, url_prefix='/jobs')
+
+    # /uploads/... also resolves files that now live in the object store
+    app.view_functions['static'] = serve_upload
     
     # Update CORS configuration to be more permissive during development
     CORS(app, resources={
@@ -106,6 +217,7 @@ def create_app():
             "origins": ["http://localhost:5173"],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
             "allow_headers": ["Content-Type", "Authorization", "Accept"],
+            "expose_headers": ["Content-Disposition", "X-Export-Id"],
             "supports_credentials": True
         }
     })
@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app import admin_collection, bcrypt, db, users_collection  # Add users_collection to imports
+from app import instructor_collection, seller_collection, product_collection, events_collection
 from datetime import datetime, timedelta
 from bson import ObjectId  # Add this import
+from app.utils import admin_query, analytics, counters, data_export, moderation
 
 # Add this line to define bids_collection
 bids_collection = db.get_collection("bids")
@@ -45,89 +47,341 @@ def login():
 @admin_bp.route('/dashboard/stats', methods=['GET'])
 @jwt_required()
 def get_dashboard_stats():
-    from app import users_collection, instructor_collection, events_collection, product_collection
-    
+    """Platform totals from the in-memory counters; ``as_of`` is when they were last read"""
     try:
+        bids = counters.get("bids")
+        complaints = counters.get("complaints")
         stats = {
-            "total_users": users_collection.count_documents({}),
-            "total_instructors": instructor_collection.count_documents({}),
-            "total_events": events_collection.count_documents({}),
-            "total_products": product_collection.count_documents({}),
+            "total_users": counters.total("users"),
+            "total_instructors": counters.total("instructors"),
+            "total_events": counters.total("events"),
+            "total_products": counters.total("products"),
+            "total_sellers": counters.total("sellers"),
+            "total_orders": counters.total("orders"),
+            "total_bids": bids["total"],
+            "pending_bid_requests": bids["groups"].get("status", {}).get("pending", 0),
+            "open_complaints": sum(complaints["groups"].get("status", {}).get(status, 0)
+                                   for status in ("pending", "in_progress", "investigating"))
         }
-        return jsonify(success=True, stats=stats)
+        as_of = bids["as_of"]
+        return jsonify(success=True, stats=stats, as_of=as_of.isoformat() if as_of else None)
+    except Exception as e:
+        return jsonify(success=False, message=str(e)), 500
+
+@admin_bp.route('/analytics', methods=['GET'])
+@jwt_required()
+def get_analytics():
+    """Daily platform metrics for charts, read from the pre-aggregated buckets.
+
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD (default: the last 30 days), ?interval=day|week|month,
+    ?metrics=orders,gmv,...
+    """
+    try:
+        if not _is_admin():
+            return jsonify(success=False, message="Unauthorized access"), 401
+
+        today = datetime.utcnow()
+        try:
+            end = datetime.strptime(request.args['to'], '%Y-%m-%d') if request.args.get('to') else today
+            start = (datetime.strptime(request.args['from'], '%Y-%m-%d') if request.args.get('from')
+                     else end - timedelta(days=29))
+        except ValueError:
+            return jsonify(success=False, message="from and to must be YYYY-MM-DD"), 400
+        if start > end:
+            return jsonify(success=False, message="from must not be after to"), 400
+        if (end - start).days >= analytics.MAX_DAYS:
+            return jsonify(success=False, message=f"Range is limited to {analytics.MAX_DAYS} days"), 400
+
+        interval = request.args.get('interval', 'day')
+        if interval not in analytics.INTERVALS:
+            return jsonify(success=False, message=f"interval must be one of {', '.join(analytics.INTERVALS)}"), 400
+        metrics = [m for m in request.args.get('metrics', '').split(',') if m] or list(analytics.METRICS)
+        unknown = [m for m in metrics if m not in analytics.METRICS]
+        if unknown:
+            return jsonify(success=False, message=f"Unknown metrics: {', '.join(unknown)}"), 400
+
+        as_of = analytics.rolled_up_to()
+        return jsonify(
+            success=True,
+            interval=interval,
+            series=analytics.series(start, end, metrics, interval),
+            as_of=as_of.isoformat() if as_of else None
+        )
+    except Exception as e:
+        print(f"Error getting analytics: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+def _is_admin():
+    return admin_collection.find_one({'email': get_jwt_identity()}, {'_id': 1}) is not None
+
+def _user_status(value):
+    # Minute resolution keeps the cached counts reusable
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    if value == 'blocked':
+        return {'is_blocked': True}
+    if value == 'banned':
+        return {'banned_until': {'$gt': now}}
+    if value == 'active':
+        return {'is_blocked': {'$ne': True}, '$or': [{'banned_until': None}, {'banned_until': {'$lte': now}}]}
+    raise ValueError("status must be one of active, blocked, banned")
+
+def _object_id(value):
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+def _instructor_filter(value):
+    # Events store the instructor's ObjectId; match the string form too
+    return {'instructor_id': {'$in': [_object_id(value), value]}}
+
+def _requester(value):
+    fields = {'user': 'requester_email', 'seller': 'seller_email', 'instructor': 'instructor_id'}
+    if value not in fields:
+        raise ValueError(f"requester must be one of {', '.join(fields)}")
+    return {fields[value]: {'$exists': True, '$ne': None}}
+
+# Admin listings: page size, cursor, filters, text search, sort orders and per-view projections
+USER_LIST = admin_query.AdminList('users', users_collection, views={
+    'list': {'email': 1, 'first_name': 1, 'last_name': 1, 'mobile': 1, 'is_blocked': 1, 'banned_until': 1, 'created_at': 1},
+    'contact': {'email': 1, 'first_name': 1, 'last_name': 1, 'mobile': 1, 'address': 1}
+}, sorts={
+    'newest': ('_id', -1),
+    'oldest': ('_id', 1),
+    'email': ('email', 1),
+    'name': ('first_name', 1)
+}, filters={'status': _user_status}, search=('email', 'first_name', 'last_name'))
+
+INSTRUCTOR_LIST = admin_query.AdminList('instructors', instructor_collection, views={
+    'list': {'email': 1, 'first_name': 1, 'last_name': 1, 'mobile': 1, 'art_specialization': 1, 'created_at': 1},
+    'contact': {'email': 1, 'first_name': 1, 'last_name': 1, 'mobile': 1, 'address': 1, 'gender': 1}
+}, sorts={
+    'newest': ('_id', -1),
+    'name': ('first_name', 1),
+    'email': ('email', 1)
+}, filters={'specialization': admin_query.equals('art_specialization')},
+   search=('email', 'first_name', 'last_name', 'art_specialization'))
+
+EVENT_LIST = admin_query.AdminList('events', events_collection, views={
+    'list': {'name': 1, 'type': 1, 'date': 1, 'time': 1, 'fee': 1, 'place': 1, 'instructor_id': 1,
+             'registered_count': 1, 'capacity': 1},
+    'full': {'poster_variants': 0}
+}, sorts={
+    'newest': ('_id', -1),
+    'date': ('date', 1),
+    'name': ('name', 1),
+    'popular': ('registered_count', -1)
+}, filters={'instructor_id': _instructor_filter, 'type': admin_query.choice('type', ('online', 'offline'))},
+   search=('name', 'place'))
+
+SELLER_LIST = admin_query.AdminList('sellers', seller_collection, views={
+    'list': {'email': 1, 'firstName': 1, 'lastName': 1, 'mobile': 1, 'shopName': 1},
+    'contact': {'email': 1, 'firstName': 1, 'lastName': 1, 'mobile': 1, 'shopName': 1, 'shopAddress': 1, 'gender': 1}
+}, sorts={
+    'newest': ('_id', -1),
+    'name': ('firstName', 1),
+    'shop': ('shopName', 1)
+}, search=('email', 'firstName', 'lastName', 'shopName'))
+
+PRODUCT_LIST = admin_query.AdminList('products', product_collection, views={
+    'list': {'name': 1, 'seller_id': 1, 'category': 1, 'price': 1, 'quantity': 1, 'image': 1},
+    'summary': {'name': 1, 'category': 1}
+}, sorts={
+    'newest': ('_id', -1),
+    'name': ('name', 1),
+    'price_asc': ('price', 1),
+    'price_desc': ('price', -1)
+}, filters={'category': admin_query.equals('category'), 'seller_id': admin_query.equals('seller_id')},
+   search=('name', 'category'))
+
+BID_FIELDS = {'title': 1, 'description': 1, 'base_amount': 1, 'current_amount': 1, 'min_increment': 1,
+              'status': 1, 'category': 1, 'condition': 1, 'image': 1, 'created_at': 1, 'last_date': 1,
+              'requester_email': 1, 'seller_email': 1, 'instructor_id': 1, 'instructor_name': 1}
+
+BID_LIST = admin_query.AdminList('bids', bids_collection, views={
+    # The bid history is only sent by the detail endpoint
+    'list': {**BID_FIELDS, 'dimensions': 1, 'material': 1, 'bid_count': {'$size': {'$ifNull': ['$bids', []]}}}
+}, sorts={
+    'newest': ('_id', -1),
+    'oldest': ('_id', 1),
+    'ending': ('last_date', 1),
+    'amount': ('current_amount', -1)
+}, filters={
+    'status': admin_query.equals('status'),
+    'category': admin_query.equals('category'),
+    'requester': _requester
+}, search=('title', 'requester_email', 'seller_email', 'instructor_name'))
+
+def _page_response(key, result, **extra):
+    return jsonify(
+        success=True,
+        next_cursor=result['next_cursor'],
+        total=result['total'],
+        limit=result['limit'],
+        **{key: [admin_query.serialize(item) for item in result['items']]},
+        **extra
+    )
+
+def _list(listing, key, enrich=None, facets=None):
+    """Serve one page of ``listing`` for the current request"""
+    try:
+        if not _is_admin():
+            return jsonify(success=False, message="Unauthorized access"), 401
+        try:
+            result = listing.page(request.args)
+        except ValueError as e:
+            return jsonify(success=False, message=str(e)), 400
+
+        if enrich:
+            enrich(result['items'])
+        # Aggregates for charts and tabs come with the first page only
+        extra = facets() if facets and not request.args.get('cursor') else {}
+        return _page_response(key, result, **extra)
+
     except Exception as e:
+        print(f"Error listing {key}: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
 
+def _grouped(listing, field):
+    pipeline = [{'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}]
+    return admin_query.cached(
+        ('group', listing.name, field),
+        lambda: {str(row['_id']): row['count'] for row in listing.collection.aggregate(pipeline)}
+    )
+
+def _add_event_counts(instructors):
+    ids = [instructor['_id'] for instructor in instructors]
+    pipeline = [
+        {'$match': {'instructor_id': {'$in': ids + [str(i) for i in ids]}}},
+        {'$group': {'_id': {'$toString': '$instructor_id'}, 'count': {'$sum': 1}}}
+    ]
+    counts = {row['_id']: row['count'] for row in events_collection.aggregate(pipeline)}
+    for instructor in instructors:
+        instructor['eventCount'] = counts.get(str(instructor['_id']), 0)
+
+def _format_bids(bids):
+    for bid in bids:
+        bid.setdefault('title', 'Untitled')
+        bid.setdefault('status', 'pending')
+        bid.setdefault('category', 'Other')
+        bid.setdefault('current_amount', bid.get('base_amount', 0))
+    _add_instructor_names(bids)
+
+def _add_instructor_names(bids):
+    missing = {bid['instructor_id'] for bid in bids if bid.get('instructor_id') and not bid.get('instructor_name')}
+    ids = [_object_id(str(i)) for i in missing]
+    names = {
+        str(doc['_id']): f"{doc.get('first_name', '')} {doc.get('last_name', '')}"
+        for doc in instructor_collection.find({'_id': {'$in': ids}}, {'first_name': 1, 'last_name': 1})
+    } if ids else {}
+    for bid in bids:
+        if bid.get('instructor_id') and not bid.get('instructor_name'):
+            name = names.get(str(bid['instructor_id']))
+            if name:
+                bid['instructor_name'] = name
+
 @admin_bp.route('/users', methods=['GET'])
 @jwt_required()
 def get_users():
-    from app import users_collection
-    users = list(users_collection.find({}, {"password": 0}))
-    
-    # Convert ObjectId to string and handle nested ObjectIds
-    def convert_object_id(obj):
-        if isinstance(obj, dict):
-            return {key: convert_object_id(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_object_id(item) for item in obj]
-        elif isinstance(obj, ObjectId):
-            return str(obj)
-        else:
-            return obj
+    """?status=active|blocked|banned&q=&sort=newest|oldest|email|name&view=list|contact
 
-    users = [convert_object_id(user) for user in users]
-    return jsonify(success=True, users=users)
+    The first page also carries the number of blocked users.
+    """
+    return _list(USER_LIST, 'users', facets=lambda: {'blocked_count': USER_LIST.count({'is_blocked': True})})
 
 @admin_bp.route('/instructors', methods=['GET'])
 @jwt_required()
 def get_instructors():
-    from app import instructor_collection
-    instructors = list(instructor_collection.find({}, {"password": 0}))
-    # Convert ObjectIds to strings
-    for instructor in instructors:
-        instructor['_id'] = str(instructor['_id'])
-        # Handle any other ObjectId fields
-        if 'created_at' in instructor:
-            instructor['created_at'] = instructor['created_at'].isoformat()
-    return jsonify(success=True, instructors=instructors)
+    """Instructors with their event counts; ?specialization=&q=&sort=newest|name|email"""
+    return _list(INSTRUCTOR_LIST, 'instructors', enrich=_add_event_counts)
 
 @admin_bp.route('/events', methods=['GET'])
 @jwt_required()
 def get_events():
-    from app import events_collection
-    events = list(events_collection.find({}))
-    # Convert ObjectIds to strings
-    for event in events:
-        event['_id'] = str(event['_id'])
-        event['instructor_id'] = str(event['instructor_id'])
-        # Handle registered_users if present
-        if 'registered_users' in event:
-            for user in event['registered_users']:
-                if 'user_id' in user and isinstance(user['user_id'], ObjectId):
-                    user['user_id'] = str(user['user_id'])
-    return jsonify(success=True, events=events)
+    """?instructor_id=&type=online|offline&q=&sort=newest|date|name&view=list|full"""
+    return _list(EVENT_LIST, 'events')
 
 @admin_bp.route('/sellers', methods=['GET'])
 @jwt_required()
 def get_sellers():
-    from app import seller_collection
-    sellers = list(seller_collection.find({}, {"password": 0}))
-    # Convert ObjectIds to strings
-    for seller in sellers:
-        seller['_id'] = str(seller['_id'])
-    return jsonify(success=True, sellers=sellers)
+    """?q=&sort=newest|name|shop&view=list|contact"""
+    return _list(SELLER_LIST, 'sellers')
 
 @admin_bp.route('/products', methods=['GET'])
 @jwt_required()
 def get_products():
-    from app import product_collection
-    products = list(product_collection.find({}))
-    # Convert ObjectIds to strings
-    for product in products:
-        product['_id'] = str(product['_id'])
-        if 'seller_id' in product:
-            product['seller_id'] = str(product['seller_id'])
-    return jsonify(success=True, products=products)
+    """?category=&seller_id=&q=&sort=newest|name|price_asc|price_desc&view=list|summary
+
+    The first page also carries the product count of every category.
+    """
+    return _list(PRODUCT_LIST, 'products',
+                 facets=lambda: {'category_counts': _grouped(PRODUCT_LIST, 'category')})
+
+# Listings admins can export as CSV / NDJSON: dataset -> (collection, fields)
+EXPORTS = {
+    "users": (users_collection, data_export.Dataset("users", {
+        "_id": "_id",
+        "email": "email",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "mobile": "mobile",
+        "address": "address",
+        "is_blocked": "is_blocked",
+        "banned_until": "banned_until",
+        "cart_count": data_export.computed(["cart"], lambda doc: len(doc.get("cart") or [])),
+        "wishlist_count": data_export.computed(["wishlist"], lambda doc: len(doc.get("wishlist") or [])),
+        "created_at": "created_at"
+    }, default=["_id", "email", "first_name", "last_name", "mobile", "is_blocked", "created_at"])),
+    "sellers": (seller_collection, data_export.Dataset("sellers", {
+        "_id": "_id",
+        "email": "email",
+        "firstName": "firstName",
+        "lastName": "lastName",
+        "mobile": "mobile",
+        "shopName": "shopName",
+        "shopAddress": "shopAddress",
+        "gender": "gender"
+    })),
+    "instructors": (instructor_collection, data_export.Dataset("instructors", {
+        "_id": "_id",
+        "email": "email",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "mobile": "mobile",
+        "address": "address",
+        "gender": "gender",
+        "art_specialization": "art_specialization",
+        "created_at": "created_at"
+    })),
+    "products": (product_collection, data_export.Dataset("products", {
+        "_id": "_id",
+        "name": "name",
+        "seller_id": "seller_id",
+        "category": "category",
+        "price": "price",
+        "quantity": "quantity",
+        "description": "description",
+        "image": "image"
+    }, default=["_id", "name", "seller_id", "category", "price", "quantity"]))
+}
+
+@admin_bp.route('/export/<dataset>', methods=['GET'])
+@jwt_required()
+def export_dataset(dataset):
+    """Stream a whole listing: ?format=csv|ndjson&fields=a,b,c"""
+    try:
+        if not admin_collection.find_one({'email': get_jwt_identity()}, {'_id': 1}):
+            return jsonify(success=False, message="Unauthorized access"), 401
+        if dataset not in EXPORTS:
+            return jsonify(success=False, message=f"Unknown dataset: {dataset}", datasets=sorted(EXPORTS)), 404
+
+        collection, spec = EXPORTS[dataset]
+        try:
+            fmt, fields = data_export.parse_args(spec, request.args)
+        except ValueError as e:
+            return jsonify(success=False, message=str(e)), 400
+        return data_export.stream(spec, collection, {}, fmt, fields)
+
+    except Exception as e:
+        print(f"Error exporting {dataset}: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
 
 @admin_bp.route('/user/<user_id>/block', methods=['PUT'])
 @jwt_required()
@@ -216,63 +470,50 @@ def enable_user(user_id):
         traceback.print_exc()
         return jsonify(success=False, message=str(e)), 500
 
-@admin_bp.route('/bids', methods=['GET'])
+# Temporary bans from the user moderation endpoints last this long
+BAN_DAYS = 10
+
+def _user_action(action, now):
+    """``(update, skip)`` for a block / ban / enable of users"""
+    if action == 'block':
+        return {'is_blocked': True}, lambda user: user.get('is_blocked') is True
+    if action == 'ban':
+        return {'banned_until': now + timedelta(days=BAN_DAYS), 'is_blocked': False}, None
+    if action == 'enable':
+        return ({'is_blocked': False, 'banned_until': None},
+                lambda user: not user.get('is_blocked') and not user.get('banned_until'))
+    raise ValueError("action must be one of block, ban, enable")
+
+def _bulk_response(results, summary):
+    return jsonify(success=True, results=results, summary=summary)
+
+@admin_bp.route('/users/bulk', methods=['POST'])
 @jwt_required()
-def get_all_bids():
-    from app import instructor_collection
+def bulk_moderate_users():
+    """Block, ban (BAN_DAYS) or enable many users: {"ids": [...], "action": "block" | "ban" | "enable"}"""
     try:
-        # Get all bids from database (including pending requests)
-        bids = list(bids_collection.find())
-        
-        # If no bids found, return empty list
-        if not bids:
-            print("No bids found in database")
-            return jsonify(success=True, bids=[])
-        
-        # Process bids for response
-        processed_bids = []
-        for bid in bids:
-            # Process ObjectId to string
-            bid_dict = {
-                '_id': str(bid['_id']),
-                'title': bid.get('title', 'Untitled'),
-                'description': bid.get('description', ''),
-                'base_amount': bid.get('base_amount', 0),
-                'current_amount': bid.get('current_amount', 0),
-                'min_increment': bid.get('min_increment', 0),
-                'status': bid.get('status', 'pending'),
-                'category': bid.get('category', 'Other'),
-                'condition': bid.get('condition', ''),
-                'image': bid.get('image'),
-                'created_at': bid['created_at'].isoformat() if 'created_at' in bid else None,
-                'last_date': bid['last_date'].isoformat() if 'last_date' in bid else None
-            }
-            
-            # Add requester information
-            if 'requester_email' in bid:
-                bid_dict['requester_email'] = bid['requester_email']
-                
-            # Add instructor information if available
-            if 'instructor_id' in bid:
-                instructor_id = bid['instructor_id']
-                bid_dict['instructor_id'] = str(instructor_id) if isinstance(instructor_id, ObjectId) else instructor_id
-                
-                # Try to find instructor name
-                try:
-                    instructor = instructor_collection.find_one({'_id': ObjectId(str(instructor_id))})
-                    if instructor:
-                        bid_dict['instructor_name'] = f"{instructor.get('first_name', '')} {instructor.get('last_name', '')}"
-                except Exception as e:
-                    print(f"Error getting instructor details: {str(e)}")
-                    
-            processed_bids.append(bid_dict)
-
-        return jsonify(success=True, bids=processed_bids)
-        
+        if not _is_admin():
+            return jsonify(success=False, message="Unauthorized"), 401
+        data = request.json or {}
+        try:
+            ids = moderation.parse_ids(data)
+            update, skip = _user_action(data.get('action'), datetime.utcnow())
+        except ValueError as e:
+            return jsonify(success=False, message=str(e)), 400
+
+        return _bulk_response(*moderation.apply(users_collection, ids, update, skip=skip,
+                                                projection={'is_blocked': 1, 'banned_until': 1}))
+
     except Exception as e:
-        print(f"Error in get_all_bids: {str(e)}")
+        print(f"Error moderating users: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
 
+@admin_bp.route('/bids', methods=['GET'])
+@jwt_required()
+def get_all_bids():
+    """Auctions and bid requests, without their bid history; same arguments as /bid-requests"""
+    return _list(BID_LIST, 'bids', enrich=_format_bids)
+
 @admin_bp.route('/bids/<bid_id>/status', methods=['PUT'])
 @jwt_required()
 def update_bid_status(bid_id):
@@ -281,17 +522,19 @@ def update_bid_status(bid_id):
         if status not in ['approved', 'rejected']:
             return jsonify(success=False, message="Invalid status"), 400
 
-        # Update bid status
-        result = bids_collection.update_one(
+        # Update bid status; the previous status keeps the counters right
+        previous = bids_collection.find_one_and_update(
             {'_id': ObjectId(bid_id)},
             {'$set': {
                 'status': status,
                 'updated_at': datetime.utcnow(),
                 'updated_by': get_jwt_identity()
-            }}
+            }},
+            projection={'status': 1}
         )
 
-        if result.modified_count:
+        if previous:
+            counters.move('bids', previous.get('status'), status)
             # Get updated bid
             updated_bid = bids_collection.find_one({'_id': ObjectId(bid_id)})
             if updated_bid:
@@ -316,49 +559,55 @@ def update_bid_status(bid_id):
 @admin_bp.route('/bid-requests', methods=['GET'])
 @jwt_required()
 def get_bid_requests():
+    """?status=&requester=user|seller|instructor&category=&q=&sort=newest|oldest|ending|amount
+
+    Rows carry ``bid_count`` instead of the bid history (see the detail
+    endpoint); the first page also carries the number of requests per status.
+    """
+    return _list(BID_LIST, 'bids', enrich=_format_bids,
+                 facets=lambda: {'status_counts': counters.get('bids')['groups'].get('status', {})})
+
+@admin_bp.route('/bid-requests/<bid_id>', methods=['GET'])
+@jwt_required()
+def get_bid_request(bid_id):
+    """One bid request with its full bid history"""
     try:
-        # Verify admin
-        admin_email = get_jwt_identity()
-        admin = admin_collection.find_one({'email': admin_email})
-        if not admin:
+        if not _is_admin():
             return jsonify(success=False, message="Unauthorized"), 401
-        
-        # Get all bid requests
-        bids = list(bids_collection.find({}))
-        
-        # Process and format the bids
-        processed_bids = []
-        for bid in bids:
-            try:
-                processed_bid = {
-                    '_id': str(bid['_id']),
-                    'title': bid.get('title', 'Untitled'),
-                    'description': bid.get('description', ''),
-                    'base_amount': bid.get('base_amount', 0),
-                    'current_amount': bid.get('current_amount', bid.get('base_amount', 0)),
-                    'min_increment': bid.get('min_increment', 0),
-                    'category': bid.get('category', 'Other'),
-                    'condition': bid.get('condition', ''),
-                    'dimensions': bid.get('dimensions', ''),
-                    'material': bid.get('material', ''),
-                    'image': bid.get('image', ''),
-                    'last_date': bid['last_date'].isoformat() if 'last_date' in bid else None,
-                    'created_at': bid['created_at'].isoformat() if 'created_at' in bid else None,
-                    'status': bid.get('status', 'pending'),
-                    'bids': bid.get('bids', []),
-                    'requester_email': bid.get('requester_email'),
-                    'seller_email': bid.get('seller_email'),
-                    'instructor_id': str(bid['instructor_id']) if 'instructor_id' in bid else None
-                }
-                processed_bids.append(processed_bid)
-            except Exception as e:
-                print(f"Error processing bid {bid.get('_id')}: {str(e)}")
-                continue
-
-        return jsonify(success=True, bids=processed_bids)
-        
+        if not ObjectId.is_valid(bid_id):
+            return jsonify(success=False, message="Invalid bid ID"), 400
+
+        bid = bids_collection.find_one({'_id': ObjectId(bid_id)}, {**BID_FIELDS, 'dimensions': 1, 'material': 1, 'bids': 1})
+        if not bid:
+            return jsonify(success=False, message="Bid not found"), 404
+        _format_bids([bid])
+        return jsonify(success=True, bid=admin_query.serialize(bid))
+
     except Exception as e:
-        print(f"Error getting bid requests: {str(e)}")
+        print(f"Error getting bid request: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+@admin_bp.route('/bid-requests/bulk', methods=['POST'])
+@jwt_required()
+def bulk_update_bid_requests():
+    """Approve or reject many bid requests: {"ids": [...], "status": "approved" | "rejected"}"""
+    try:
+        if not _is_admin():
+            return jsonify(success=False, message="Unauthorized"), 401
+        data = request.json or {}
+        status = data.get('status')
+        if status not in ['approved', 'rejected']:
+            return jsonify(success=False, message="status must be approved or rejected"), 400
+        try:
+            ids = moderation.parse_ids(data)
+        except ValueError as e:
+            return jsonify(success=False, message=str(e)), 400
+
+        update = {'status': status, 'updated_at': datetime.utcnow(), 'updated_by': get_jwt_identity()}
+        return _bulk_response(*moderation.apply(bids_collection, ids, update, status=status, counter='bids'))
+
+    except Exception as e:
+        print(f"Error updating bid requests: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
 
 @admin_bp.route('/bid-requests/<bid_id>/approve', methods=['PUT'])
@@ -372,12 +621,14 @@ def approve_bid_request(bid_id):
             return jsonify(success=False, message="Unauthorized"), 401
         
         # Update bid status
-        result = bids_collection.update_one(
-            {'_id': ObjectId(bid_id)},
-            {'$set': {'status': 'approved'}}
+        previous = bids_collection.find_one_and_update(
+            {'_id': ObjectId(bid_id), 'status': {'$ne': 'approved'}},
+            {'$set': {'status': 'approved'}},
+            projection={'status': 1}
         )
         
-        if result.modified_count:
+        if previous:
+            counters.move('bids', previous.get('status'), 'approved')
             return jsonify(success=True, message="Bid request approved successfully")
         else:
             return jsonify(success=False, message="Failed to approve bid request"), 400
@@ -397,12 +648,14 @@ def reject_bid_request(bid_id):
             return jsonify(success=False, message="Unauthorized"), 401
         
         # Update bid status
-        result = bids_collection.update_one(
-            {'_id': ObjectId(bid_id)},
-            {'$set': {'status': 'rejected'}}
+        previous = bids_collection.find_one_and_update(
+            {'_id': ObjectId(bid_id), 'status': {'$ne': 'rejected'}},
+            {'$set': {'status': 'rejected'}},
+            projection={'status': 1}
         )
         
-        if result.modified_count:
+        if previous:
+            counters.move('bids', previous.get('status'), 'rejected')
             return jsonify(success=True, message="Bid request rejected successfully")
         else:
             return jsonify(success=False, message="Failed to reject bid request"), 400
@@ -411,128 +664,88 @@ def reject_bid_request(bid_id):
         print(f"Error rejecting bid request: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
 
+# Per-user statistics are cached this long (seconds)
+USER_STATS_TTL = 300
+ACTIVITY_MONTHS = 6
+
+def _month_starts(now, count):
+    year, month = now.year, now.month
+    starts = []
+    for _ in range(count):
+        starts.append(datetime(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return starts[::-1]
+
+def user_activity_pipeline(email, since):
+    """Orders, product reviews and event registrations of ``email`` as one aggregation on orders"""
+    from app import event_registrations_collection
+    from app.controllers.reviews import product_reviews_collection
+
+    return [
+        {'$match': {'$or': [{'user_identity': email}, {'user_email': email}]}},
+        {'$project': {'_id': 0, 'kind': 'order', 'at': '$created_at', 'amount': analytics.order_amount()}},
+        {'$unionWith': {'coll': product_reviews_collection.name, 'pipeline': [
+            {'$match': {'user_email': email}},
+            {'$project': {'_id': 0, 'kind': 'review', 'at': '$created_at'}}
+        ]}},
+        {'$unionWith': {'coll': event_registrations_collection.name, 'pipeline': [
+            {'$match': {'user_id': email}},
+            {'$project': {'_id': 0, 'kind': 'event', 'at': {'$ifNull': ['$registration_date', '$payment_date']}}}
+        ]}},
+        {'$facet': {
+            'totals': [
+                {'$group': {'_id': '$kind', 'count': {'$sum': 1}, 'amount': {'$sum': '$amount'}, 'last': {'$max': '$at'}}}
+            ],
+            'months': [
+                {'$match': {'at': {'$gte': since}}},
+                {'$group': {'_id': {'$dateTrunc': {'date': '$at', 'unit': 'month'}}, 'activity': {'$sum': 1}}}
+            ]
+        }}
+    ]
+
+def compute_user_stats(user):
+    """Statistics of one user from a single aggregation round trip"""
+    from app import orders_collection
+
+    months = _month_starts(datetime.utcnow(), ACTIVITY_MONTHS)
+    result = next(orders_collection.aggregate(user_activity_pipeline(user.get('email'), months[0])), None) or {}
+    totals = {row['_id']: row for row in result.get('totals', [])}
+    activity = {row['_id']: row['activity'] for row in result.get('months', [])}
+    latest = [row['last'] for row in totals.values() if isinstance(row.get('last'), datetime)]
+
+    return {
+        'orderCount': totals.get('order', {}).get('count', 0),
+        'totalSpent': round(totals.get('order', {}).get('amount', 0) or 0, 2),
+        'reviewCount': totals.get('review', {}).get('count', 0),
+        'eventCount': totals.get('event', {}).get('count', 0),
+        'wishlistCount': user.get('wishlist_count', 0),
+        'lastActive': user.get('last_login') or (max(latest) if latest else user.get('created_at')),
+        'joinDate': user.get('created_at', datetime.utcnow()),
+        'activityGraph': [{'month': start.strftime('%b'), 'activity': activity.get(start, 0)} for start in months]
+    }
+
 @admin_bp.route('/user/<user_id>/stats', methods=['GET'])
 @jwt_required()
 def get_user_stats(user_id):
-    """Get detailed statistics for a specific user"""
+    """Get detailed statistics for a specific user (cached for USER_STATS_TTL seconds)"""
     try:
         # Verify admin access
-        admin_email = get_jwt_identity()
-        admin = admin_collection.find_one({'email': admin_email})
-        
-        if not admin:
+        if not _is_admin():
             return jsonify(success=False, message="Unauthorized access"), 401
-        
+        if not ObjectId.is_valid(user_id):
+            return jsonify(success=False, message="Invalid user ID"), 400
+
         # Find the user
-        user = users_collection.find_one({'_id': ObjectId(user_id)})
+        user = users_collection.find_one({'_id': ObjectId(user_id)}, {
+            'email': 1, 'last_login': 1, 'created_at': 1,
+            'wishlist_count': {'$size': {'$ifNull': ['$wishlist', []]}}
+        })
         if not user:
             return jsonify(success=False, message="User not found"), 404
-            
-        # Initialize statistics object
-        from app import orders_collection, events_collection
-        # Import product_reviews_collection correctly from reviews.py
-        from app.controllers.reviews import product_reviews_collection
-        
-        stats = {
-            'orderCount': 0,
-            'totalSpent': 0,
-            'reviewCount': 0,
-            'eventCount': 0,
-            'wishlistCount': len(user.get('wishlist', [])),
-            'lastActive': user.get('last_login', user.get('created_at')),
-            'joinDate': user.get('created_at', datetime.utcnow()),
-            'activityGraph': []
-        }
-        
-        # Get user orders
-        try:
-            orders = list(orders_collection.find({
-                '$or': [
-                    {'user_identity': user.get('email')},
-                    {'user_email': user.get('email')}
-                ]
-            }))
-            
-            stats['orderCount'] = len(orders)
-            
-            # Calculate total spent
-            for order in orders:
-                # Add order amount to total spent
-                if 'total_amount' in order:
-                    stats['totalSpent'] += float(order['total_amount'])
-                else:
-                    # If no total_amount, calculate from items
-                    items = order.get('items', [])
-                    for item in items:
-                        stats['totalSpent'] += float(item.get('price', 0))
-        except Exception as e:
-            print(f"Error calculating order statistics: {str(e)}")
-        
-        # Get user reviews
-        try:
-            reviews = list(product_reviews_collection.find({
-                'user_email': user.get('email')
-            }))
-            stats['reviewCount'] = len(reviews)
-        except Exception as e:
-            print(f"Error calculating review statistics: {str(e)}")
-        
-        # Get event participation
-        try:
-            # Find events where this user is registered
-            events = list(events_collection.find({
-                'registered_users.user_id': user.get('email')
-            }))
-            stats['eventCount'] = len(events)
-        except Exception as e:
-            print(f"Error calculating event statistics: {str(e)}")
-        
-        # Generate activity graph (monthly activity based on orders, reviews, etc.)
-        try:
-            # Create monthly buckets for the last 6 months
-            months = []
-            current_date = datetime.utcnow()
-            
-            for i in range(5, -1, -1):
-                month_date = current_date - timedelta(days=30*i)
-                months.append({
-                    'month': month_date.strftime('%b'),
-                    'year': month_date.year,
-                    'month_num': month_date.month,
-                    'activity': 0
-                })
-            
-            # Count activities by month
-            for order in orders:
-                if 'created_at' in order:
-                    order_date = order['created_at']
-                    for month in months:
-                        if order_date.year == month['year'] and order_date.month == month['month_num']:
-                            month['activity'] += 1
-            
-            for review in reviews:
-                if 'created_at' in review:
-                    review_date = review['created_at']
-                    for month in months:
-                        if review_date.year == month['year'] and review_date.month == month['month_num']:
-                            month['activity'] += 1
-            
-            # Format for response
-            stats['activityGraph'] = [{'month': m['month'], 'activity': m['activity']} for m in months]
-        except Exception as e:
-            print(f"Error generating activity graph: {str(e)}")
-            # Fallback to empty graph
-            stats['activityGraph'] = [
-                {'month': 'Jan', 'activity': 0},
-                {'month': 'Feb', 'activity': 0},
-                {'month': 'Mar', 'activity': 0},
-                {'month': 'Apr', 'activity': 0},
-                {'month': 'May', 'activity': 0},
-                {'month': 'Jun', 'activity': 0}
-            ]
-        
+
+        stats = admin_query.cached(('user_stats', user_id), lambda: compute_user_stats(user), ttl=USER_STATS_TTL)
         return jsonify(success=True, stats=stats)
-        
+
     except Exception as e:
         print(f"Error getting user statistics: {str(e)}")
         import traceback
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import bcrypt, users_collection
+from app.utils import autocomplete, counters
 from datetime import datetime, timezone
 
 # Create auth blueprint
@@ -38,6 +39,8 @@ def register():
     
     # Insert user into database
     users_collection.insert_one(user)
+    counters.record("users")
+    autocomplete.index_entity("user", user)
     
     # Generate token for auto login
     token = create_access_token(identity=email)
@@ -0,0 +1,50 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from app.utils import autocomplete
+
+autocomplete_bp = Blueprint('autocomplete', __name__)
+
+@autocomplete_bp.route('', methods=['GET'], strict_slashes=False)
+def suggest():
+    """Top-k prefix matches for ?q=&type=[product|material|event|seller|instructor|user|all]&limit="""
+    try:
+        query = request.args.get("q", "").strip()
+        requested = request.args.get("type", "product")
+
+        try:
+            limit = min(max(int(request.args.get("limit", autocomplete.DEFAULT_LIMIT)), 1), autocomplete.MAX_LIMIT)
+        except ValueError:
+            return jsonify(success=False, message="limit must be a number"), 400
+
+        if requested == "all":
+            entity_types = list(autocomplete.ENTITY_TYPES)
+        else:
+            entity_types = [t.strip() for t in requested.split(",") if t.strip()]
+            unknown = [t for t in entity_types if t not in autocomplete.ENTITY_TYPES]
+            if unknown or not entity_types:
+                return jsonify(
+                    success=False,
+                    message=f"Invalid type. Must be one of: {', '.join(autocomplete.ENTITY_TYPES)}, all"
+                ), 400
+
+        # People lookups (complaint forms) are only available to logged in users
+        if any(autocomplete.ENTITY_TYPES[t][3] for t in entity_types):
+            verify_jwt_in_request(optional=True)
+            if not get_jwt_identity():
+                if requested != "all":
+                    return jsonify(success=False, message="Login required"), 401
+                entity_types = [t for t in entity_types if not autocomplete.ENTITY_TYPES[t][3]]
+
+        if not query:
+            return jsonify(success=True, results=[], ready=autocomplete.is_ready())
+
+        results = []
+        for entity_type in entity_types:
+            results.extend(autocomplete.search(entity_type, query, limit))
+
+        return jsonify(success=True, results=results[:limit] if len(entity_types) == 1 else results,
+                       ready=autocomplete.is_ready())
+
+    except Exception as e:
+        print(f"Error in autocomplete: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
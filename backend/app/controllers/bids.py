@@ -1,15 +1,17 @@
-from flask import Blueprint, request, jsonify, current_app, send_file, Response
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
 from datetime import datetime
-import time
-import os
 from app import bids_collection, instructor_collection, users_collection
-from app.utils.pdf_generator import generate_auction_invoice_pdf
+from app.utils import counters, trending, image_pipeline, media_store, invoice_cache, job_queue
 import traceback
 
 bids_bp = Blueprint('bids', __name__)
 
+# Bid fields an invoice is rendered from
+INVOICE_FIELDS = ['title', 'description', 'current_amount', 'created_at', 'last_date',
+                  'instructor_name', 'category', 'condition']
+
 @bids_bp.route('/active', methods=['GET'])
 def get_active_bids():
     try:
@@ -25,6 +27,8 @@ def get_active_bids():
         
         bids = list(bids_collection.find(query))
         print(f"Found {len(bids)} active bids") # Debug log
+        size = request.args.get('size')
+        accept = request.headers.get('Accept', '')
 
         processed_bids = []
         for bid in bids:
@@ -39,9 +43,15 @@ def get_active_bids():
                     'category': bid.get('category'),
                     'condition': bid.get('condition'),
                     'image': bid.get('image'),
+                    'image_meta': bid.get('image_meta'),
                     'last_date': bid['last_date'].isoformat() if 'last_date' in bid else None,
                     'bids': bid.get('bids', [])
                 }
+
+                # ?size=thumb|card|full adds the URL of a resized variant
+                variant_url = image_pipeline.pick_variant(bid.get('image_variants'), size, accept)
+                if variant_url:
+                    processed_bid['image_url'] = f"{request.host_url.rstrip('/')}{variant_url}"
                 
                 # Check if this is an instructor-created bid or user-requested bid
                 if 'instructor_id' in bid:
@@ -147,6 +157,7 @@ def place_bid(bid_id):
         )
 
         if result.modified_count:
+            trending.record("auction", bid_id, "bid")
             updated_bid = bids_collection.find_one({'_id': ObjectId(bid_id)})
             return jsonify({
                 'success': True,
@@ -216,6 +227,7 @@ def get_participated_bids():
                     'mobile': bid.get('mobile', ''),
                     'description': bid.get('description', ''),
                     'image': bid.get('image'),
+                    'image_meta': bid.get('image_meta'),
                     'category': bid.get('category', 'Other'),
                     'current_amount': float(bid.get('current_amount', 0)),
                     'my_highest_bid': float(user_highest_bid['amount']) if user_highest_bid else 0,
@@ -275,14 +287,10 @@ def request_bid():
         if 'image' in request.files:
             image = request.files['image']
             if image.filename:
-                # Create safe filename
-                ext = image.filename.rsplit('.', 1)[1].lower() if '.' in image.filename else 'jpg'
-                image_filename = f"bid_{user_email.split('@')[0]}_{int(time.time())}.{ext}"
-                
-                # Save the image - use current_app instead of importing app
-                upload_folder = current_app.config['UPLOAD_FOLDERS']['event_posters']
-                image_path = os.path.join(upload_folder, image_filename)
-                image.save(image_path)
+                # Store by content hash; the object name is what clients reference
+                stored = media_store.store(image)
+                image_filename = stored["name"]
+                image_path = stored["path"]
                 print(f"Image saved at: {image_path}")
         
         # Create bid request document
@@ -309,6 +317,9 @@ def request_bid():
         
         # Insert into database
         result = bids_collection.insert_one(bid_request)
+        counters.record("bids", status=bid_request['status'])
+        if image_filename:
+            image_pipeline.schedule(image_path, bids_collection, {'_id': result.inserted_id})
         
         return jsonify({
             'success': True,
@@ -350,14 +361,10 @@ def seller_bid_request():
         if 'image' in request.files:
             image = request.files['image']
             if image.filename:
-                # Create safe filename
-                ext = image.filename.rsplit('.', 1)[1].lower() if '.' in image.filename else 'jpg'
-                image_filename = f"bid_seller_{seller_email.split('@')[0]}_{int(time.time())}.{ext}"
-                
-                # Save the image
-                upload_folder = current_app.config['UPLOAD_FOLDERS']['event_posters']
-                image_path = os.path.join(upload_folder, image_filename)
-                image.save(image_path)
+                # Store by content hash; the object name is what clients reference
+                stored = media_store.store(image)
+                image_filename = stored["name"]
+                image_path = stored["path"]
                 print(f"Image saved at: {image_path}")
         
         # Create bid request document
@@ -381,6 +388,9 @@ def seller_bid_request():
         
         # Insert into database
         result = bids_collection.insert_one(bid_request)
+        counters.record("bids", status=bid_request['status'])
+        if image_filename:
+            image_pipeline.schedule(image_path, bids_collection, {'_id': result.inserted_id})
         
         return jsonify({
             'success': True,
@@ -508,27 +518,17 @@ def get_bid_summary():
                     else:
                         lost_count += 1
         
-        # Get total bid count and total bid amount
-        total_bids = bids_collection.count_documents({})
-        total_active_bids = bids_collection.count_documents({
-            'status': 'approved',
-            'last_date': {'$gt': current_time}
-        })
+        # Platform-wide figures come from the cached counters
+        platform = counters.get('bids')
+        total_bids = platform['total']
+        total_active_bids = platform['extra'].get('open', 0)
         
-        # Get most popular bid categories
-        categories = bids_collection.aggregate([
-            {'$match': {'status': 'approved'}},
-            {'$group': {'_id': '$category', 'count': {'$sum': 1}}},
-            {'$sort': {'count': -1}},
-            {'$limit': 5}
-        ])
-        
-        category_stats = []
-        for category in categories:
-            category_stats.append({
-                'name': category['_id'] or 'Uncategorized',
-                'count': category['count']
-            })
+        # Most popular categories of approved auctions
+        categories = platform['groups'].get('approved_category', {})
+        category_stats = [
+            {'name': 'Uncategorized' if name == 'none' else name, 'count': count}
+            for name, count in sorted(categories.items(), key=lambda item: item[1], reverse=True)[:5]
+        ]
         
         return jsonify({
             'success': True,
@@ -549,20 +549,15 @@ def get_bid_summary():
         print(f"Error in get_bid_summary: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
 
-@bids_bp.route("/invoice/<bid_id>", methods=["GET"])
-@jwt_required()
-def generate_invoice(bid_id):
-    """Generate a PDF invoice for a won bid auction"""
-    try:
-        user_identity = get_jwt_identity()
-        print(f"Generating invoice for bid {bid_id} requested by {user_identity}")
-        
-        # Find the bid
-        bid = bids_collection.find_one({"_id": ObjectId(bid_id)})
-        
-        if not bid:
-            return jsonify(success=False, message="Bid not found"), 404
-        
+def bid_invoice(user_identity, bid_id):
+    """Invoice job for a won auction, addressed to ``user_identity``"""
+    # Find the bid
+    bid = bids_collection.find_one({"_id": ObjectId(bid_id)})
+    
+    if not bid:
+        raise job_queue.JobError("Bid not found", 404)
+    
+    def build():
         # Get user's name from users collection
         user_name = "You"
         try:
@@ -571,13 +566,13 @@ def generate_invoice(bid_id):
                 user_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
                 if not user_name:
                     user_name = user.get('username', 'You')
-            
+        
             # If not found in users, try instructor collection
             if not user_name or user_name == "You":
                 instructor = instructor_collection.find_one({"email": user_identity})
                 if instructor:
                     user_name = f"{instructor.get('first_name', '')} {instructor.get('last_name', '')}".strip()
-                    
+                
             # If still not found, try seller collection
             if not user_name or user_name == "You":
                 try:
@@ -590,23 +585,23 @@ def generate_invoice(bid_id):
                     pass
         except Exception as e:
             print(f"Error fetching user name: {str(e)}")
-        
+    
         # Convert ObjectId to string
         bid_id_str = str(bid["_id"])
-        
+    
         # Format dates for PDF
         created_at = bid.get("created_at")
         if isinstance(created_at, datetime):
             created_at_str = created_at.strftime("%Y-%m-%d")
         else:
             created_at_str = str(created_at) if created_at else None
-            
+        
         last_date = bid.get("last_date")
         if isinstance(last_date, datetime):
             last_date_str = last_date.strftime("%Y-%m-%d")
         else:
             last_date_str = str(last_date) if last_date else None
-        
+    
         # Prepare bid data for PDF generation
         bid_data = {
             "_id": bid_id_str,
@@ -621,20 +616,25 @@ def generate_invoice(bid_id):
             "category": bid.get("category", "Art"),
             "condition": bid.get("condition", "New")
         }
-        
-        # Generate PDF using the utility function
-        from app.utils.bid_invoice_generator import generate_bid_invoice_pdf
-        pdf_buffer = generate_bid_invoice_pdf(bid_data)
-        
-        # Return the PDF file
-        from flask import send_file
-        return send_file(
-            pdf_buffer,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"auction_invoice_{bid_id_str[:8]}.pdf"
-        )
-        
+        return bid_data
+
+    # The invoice names the requesting user, so each viewer gets their own cached copy
+    version = invoice_cache.document_version(bid, INVOICE_FIELDS)
+    cache_key = invoice_cache.viewer_key(str(bid["_id"]), user_identity)
+    return "bid", cache_key, version, build
+
+job_queue.register_document("bid_invoice", bid_invoice, lambda bid_id: f"auction_invoice_{bid_id[:8]}.pdf")
+
+@bids_bp.route("/invoice/<bid_id>", methods=["GET"])
+@jwt_required()
+def generate_invoice(bid_id):
+    """Generate a PDF invoice for a won bid auction"""
+    try:
+        user_identity = get_jwt_identity()
+        print(f"Generating invoice for bid {bid_id} requested by {user_identity}")
+        return job_queue.download_response("bid_invoice", bid_id, user_identity)
+    except job_queue.JobError as e:
+        return jsonify(success=False, message=e.message), e.status
     except Exception as e:
         print(f"Error generating bid invoice: {str(e)}")
         import traceback
@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from bson import ObjectId
+from app import users_collection, product_collection, material_collection
+
+cart_bp = Blueprint("cart", __name__)
+
+# Products and materials are hydrated in parallel on this pool
+hydration_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cart-hydrate")
+
+# Only the fields the cart and wishlist pages render
+ITEM_PROJECTION = {
+    "name": 1,
+    "price": 1,
+    "image": 1,
+    "image_meta": 1,
+    "category": 1,
+    "quantity": 1,
+    "seller_id": 1
+}
+
+# (user field, collection, kind) per list
+LISTS = {
+    "cart": (("cart", product_collection, "product"), ("cart_materials", material_collection, "material")),
+    "wishlist": (("wishlist", product_collection, "product"), ("wishlist_materials", material_collection, "material"))
+}
+
+
+def user_query(identity):
+    """Single query matching a user by email, _id or seller_id"""
+    if "@" in identity:
+        return {"email": identity}
+    clauses = [{"_id": identity}, {"seller_id": identity}]
+    if ObjectId.is_valid(identity):
+        clauses.append({"_id": ObjectId(identity)})
+    return {"$or": clauses}
+
+
+def _fetch_items(collection, ids, kind):
+    items = []
+    for item in collection.find({"_id": {"$in": ids}}, ITEM_PROJECTION):
+        item["_id"] = str(item["_id"])
+        if isinstance(item.get("seller_id"), ObjectId):
+            item["seller_id"] = str(item["seller_id"])
+        item["kind"] = kind
+        item["in_stock"] = (item.get("quantity") or 0) > 0
+        items.append(item)
+    return items
+
+
+def _list_response(list_name):
+    identity = get_jwt_identity()
+    fields = LISTS[list_name]
+
+    user = users_collection.find_one(user_query(identity), {field: 1 for field, _, _ in fields})
+    if not user:
+        return jsonify(success=False, message="User not found"), 404
+
+    # Badge counts only, no hydration
+    if request.args.get("summary"):
+        counts = {kind: len(user.get(field) or []) for field, _, kind in fields}
+        return jsonify(success=True, counts=counts, item_count=sum(counts.values()))
+
+    futures = [
+        hydration_pool.submit(_fetch_items, collection, user.get(field), kind)
+        for field, collection, kind in fields
+        if user.get(field)
+    ]
+    items = [item for future in futures for item in future.result()]
+
+    stored = sum(len(user.get(field) or []) for field, _, _ in fields)
+    subtotal = sum(float(item.get("price") or 0) for item in items)
+    available_subtotal = sum(float(item.get("price") or 0) for item in items if item["in_stock"])
+
+    return jsonify(
+        success=True,
+        items=items,
+        products=[item for item in items if item["kind"] == "product"],
+        materials=[item for item in items if item["kind"] == "material"],
+        totals={
+            "item_count": len(items),
+            "subtotal": round(subtotal, 2),
+            "available_subtotal": round(available_subtotal, 2),
+            "out_of_stock": sum(1 for item in items if not item["in_stock"]),
+            # Ids still stored on the user whose item has since been deleted
+            "missing": stored - len(items)
+        },
+        all_in_stock=all(item["in_stock"] for item in items)
+    )
+
+
+@cart_bp.route("/cart", methods=["GET"])
+@jwt_required()
+def get_cart():
+    """Get the user's cart (products and materials) with totals and stock flags"""
+    try:
+        return _list_response("cart")
+    except Exception as e:
+        print(f"Cart error: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+
+@cart_bp.route("/wishlist", methods=["GET"])
+@jwt_required()
+def get_wishlist():
+    """Get the user's wishlist (products and materials) with stock flags"""
+    try:
+        return _list_response("wishlist")
+    except Exception as e:
+        print(f"Error fetching wishlist: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
@@ -2,11 +2,14 @@ import os
 import uuid
 from pathlib import Path
 from werkzeug.utils import secure_filename
-from flask import Blueprint, request, jsonify, send_from_directory, send_file, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 from bson import ObjectId
 from datetime import datetime
-from app import db  # Add this import to fix the NameError
+from app import db, admin_collection
+from app.utils import counters, data_export, media_store, moderation
+from app.utils.media_serving import send_media
 
 complaints_bp = Blueprint("complaints", __name__)
 
@@ -21,95 +24,16 @@ BASE_DIR = os.getcwd()
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads", "complaints")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Statuses an admin can set on a complaint
+COMPLAINT_STATUSES = ["pending", "in_progress", "resolved", "rejected"]
+
+# Lifetime in seconds of signed attachment URLs
+ATTACHMENT_URL_MAX_AGE = 300
+
 # Debug the actual path 
 print(f"BASE_DIR: {BASE_DIR}")
 print(f"Complaints UPLOAD_FOLDER: {UPLOAD_FOLDER}")
 
-@complaints_bp.route("/list", methods=["GET"])
-@jwt_required()
-def get_seller_list():
-    """Get list of all sellers for complaints form"""
-    try:
-        # This endpoint returns a simplified list of sellers for the dropdown
-        sellers = list(sellers_collection.find({}, {
-            "firstName": 1, 
-            "lastName": 1,
-            "shopName": 1,
-            "email": 1
-        }))
-        
-        # Format sellers for response
-        formatted_sellers = []
-        for seller in sellers:
-            formatted_sellers.append({
-                "_id": str(seller["_id"]),
-                "firstName": seller.get("firstName", ""),
-                "lastName": seller.get("lastName", ""),
-                "shopName": seller.get("shopName", "Unnamed Shop"),
-                "email": seller.get("email", "")
-            })
-            
-        return jsonify(success=True, sellers=formatted_sellers)
-        
-    except Exception as e:
-        print(f"Error fetching sellers list: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
-
-@complaints_bp.route("/instructor/list", methods=["GET"])
-@jwt_required()
-def get_instructor_list():
-    """Get list of all instructors for complaints form"""
-    try:
-        # This endpoint returns a simplified list of instructors for the dropdown
-        instructors = list(instructors_collection.find({}, {
-            "first_name": 1, 
-            "last_name": 1,
-            "email": 1,
-            "art_specialization": 1
-        }))
-        
-        # Format instructors for response
-        formatted_instructors = []
-        for instructor in instructors:
-            formatted_instructors.append({
-                "_id": str(instructor["_id"]),
-                "name": f"{instructor.get('first_name', '')} {instructor.get('last_name', '')}".strip() or "Unknown",
-                "email": instructor.get("email", ""),
-                "expertise": instructor.get("art_specialization", "")
-            })
-            
-        return jsonify(success=True, instructors=formatted_instructors)
-        
-    except Exception as e:
-        print(f"Error fetching instructors list: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
-
-@complaints_bp.route("/users/list", methods=["GET"])
-@jwt_required()
-def get_users_list():
-    """Get list of all users for complaints dropdown"""
-    try:
-        # This endpoint returns a simplified list of users for the dropdown
-        users = list(users_collection.find({}, {
-            "email": 1, 
-            "name": 1
-        }))
-        
-        # Format users for response
-        formatted_users = []
-        for user in users:
-            formatted_users.append({
-                "_id": user.get("email", ""),  # Use email as ID for users
-                "email": user.get("email", ""),
-                "name": user.get("name", "")
-            })
-            
-        return jsonify(success=True, users=formatted_users)
-        
-    except Exception as e:
-        print(f"Error fetching users list: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
-
 @complaints_bp.route("/user", methods=["GET"])
 @jwt_required()
 def get_user_complaints():
@@ -165,7 +89,6 @@ def submit_complaint():
         subject = request.form.get("subject")
         description = request.form.get("description")
         severity = request.form.get("severity", "medium")
-        attachment = request.files.get("attachment")
         
         print(f"Received complaint submission: type={complaint_type}, entityId={entity_id}, entityName={entity_name}, subject={subject}, severity={severity}")
         
@@ -239,14 +162,15 @@ def submit_complaint():
                 entity_name = f"Test {complaint_type.capitalize()}"
         
         # Save attachment if provided
-        attachment_path = None
-        if attachment:
-            # Create a unique filename with timestamp
-            filename = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{secure_filename(attachment.filename)}"
-            # Use absolute path for storage
-            attachment_path = os.path.join(UPLOAD_FOLDER, filename)
-            print(f"Saving attachment to: {attachment_path}")
-            attachment.save(attachment_path)
+        attachment_key = None
+        attachment_name = None
+        # Attachments are private objects (never under /media), keyed by content
+        # hash; large files may arrive as a completed chunked upload (attachment_upload_id)
+        stored = media_store.store_from_request("attachment", user_identity, private=True)
+        if stored:
+            attachment_key = stored["key"]
+            attachment_name = secure_filename(stored["filename"])
+            print(f"Saved attachment as: {attachment_key}")
         
         # Create complaint document
         complaint = {
@@ -259,11 +183,13 @@ def submit_complaint():
             "severity": severity,
             "status": "pending",
             "createdAt": datetime.now(),
-            "attachment": attachment_path
+            "attachment": attachment_key,
+            "attachmentName": attachment_name
         }
         
         # Insert complaint
         result = complaints_collection.insert_one(complaint)
+        counters.record("complaints", status="pending")
         complaint_id = str(result.inserted_id)
         
         print(f"Complaint submitted successfully with ID: {complaint_id}")
@@ -317,6 +243,42 @@ def get_all_complaints():
         traceback.print_exc()
         return jsonify(success=False, message=str(e)), 500
 
+COMPLAINT_EXPORT = data_export.Dataset("complaints", {
+    "_id": "_id",
+    "user_identity": "user_identity",
+    "type": "type",
+    "entityId": "entityId",
+    "entityName": "entityName",
+    "subject": "subject",
+    "description": "description",
+    "severity": "severity",
+    "status": "status",
+    "adminResponse": "adminResponse",
+    "createdAt": "createdAt",
+    "updatedAt": "updatedAt",
+    "hasAttachment": data_export.computed(["attachment"], lambda doc: doc.get("attachment") is not None)
+}, default=["_id", "user_identity", "type", "entityId", "subject", "severity", "status", "createdAt"],
+   sort=[("createdAt", -1)])
+
+@complaints_bp.route("/admin/export", methods=["GET"])
+@jwt_required()
+def export_complaints():
+    """Stream all complaints, most recent first: ?format=csv|ndjson&fields=a,b,c&status="""
+    try:
+        if not admin_collection.find_one({"email": get_jwt_identity()}, {"_id": 1}):
+            return jsonify(success=False, message="Unauthorized access"), 401
+        try:
+            fmt, fields = data_export.parse_args(COMPLAINT_EXPORT, request.args)
+        except ValueError as e:
+            return jsonify(success=False, message=str(e)), 400
+
+        query = {"status": request.args["status"]} if request.args.get("status") else {}
+        return data_export.stream(COMPLAINT_EXPORT, complaints_collection, query, fmt, fields)
+
+    except Exception as e:
+        print(f"Error exporting complaints: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
 @complaints_bp.route("/admin/update/<complaint_id>", methods=["PUT"])
 @jwt_required()
 def update_complaint_status(complaint_id):
@@ -333,9 +295,8 @@ def update_complaint_status(complaint_id):
         if not status:
             return jsonify(success=False, message="Status is required"), 400
             
-        valid_statuses = ["pending", "in_progress", "resolved", "rejected"]
-        if status not in valid_statuses:
-            return jsonify(success=False, message=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"), 400
+        if status not in COMPLAINT_STATUSES:
+            return jsonify(success=False, message=f"Invalid status. Must be one of: {', '.join(COMPLAINT_STATUSES)}"), 400
             
         # Prepare update data
         update_data = {
@@ -347,17 +308,16 @@ def update_complaint_status(complaint_id):
         if admin_response:
             update_data["adminResponse"] = admin_response
             
-        # Update complaint
-        result = complaints_collection.update_one(
+        # Update complaint; the previous status keeps the counters right
+        previous = complaints_collection.find_one_and_update(
             {"_id": ObjectId(complaint_id)},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"status": 1}
         )
         
-        if result.modified_count == 0:
-            if complaints_collection.find_one({"_id": ObjectId(complaint_id)}):
-                return jsonify(success=True, message="No changes were made")
-            else:
-                return jsonify(success=False, message="Complaint not found"), 404
+        if not previous:
+            return jsonify(success=False, message="Complaint not found"), 404
+        counters.move("complaints", previous.get("status"), status)
                 
         return jsonify(success=True, message="Complaint updated successfully")
         
@@ -367,6 +327,41 @@ def update_complaint_status(complaint_id):
         traceback.print_exc()
         return jsonify(success=False, message=str(e)), 500
 
+@complaints_bp.route("/admin/bulk-update", methods=["POST"])
+@jwt_required()
+def bulk_update_complaint_status():
+    """Set the status (and optionally the admin response) of many complaints: {"ids": [...], "status": ..., "adminResponse": ...}"""
+    try:
+        admin_identity = get_jwt_identity()
+        if not admin_collection.find_one({"email": admin_identity}, {"_id": 1}):
+            return jsonify(success=False, message="Unauthorized"), 401
+
+        data = request.json or {}
+        status = data.get("status")
+        if status not in COMPLAINT_STATUSES:
+            return jsonify(success=False, message=f"Invalid status. Must be one of: {', '.join(COMPLAINT_STATUSES)}"), 400
+        try:
+            ids = moderation.parse_ids(data)
+        except ValueError as e:
+            return jsonify(success=False, message=str(e)), 400
+
+        update_data = {
+            "status": status,
+            "updatedAt": datetime.now(),
+            "updatedBy": admin_identity
+        }
+        if data.get("adminResponse"):
+            update_data["adminResponse"] = data["adminResponse"]
+
+        # A new admin response is written even where the status already matches
+        results, summary = moderation.apply(complaints_collection, ids, update_data, status=status,
+                                            counter="complaints", always="adminResponse" in update_data)
+        return jsonify(success=True, results=results, summary=summary)
+
+    except Exception as e:
+        print(f"Error updating complaints: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
 @complaints_bp.route("/admin/detail/<complaint_id>", methods=["GET"])
 @jwt_required()
 def get_complaint_detail(complaint_id):
@@ -395,7 +390,8 @@ def get_complaint_detail(complaint_id):
             "adminResponse": complaint.get("adminResponse", ""),
             "createdAt": complaint.get("createdAt", datetime.now()),
             "updatedAt": complaint.get("updatedAt", None),
-            "attachment": complaint.get("attachment")
+            # The file itself is only reachable through /attachment/<id>
+            "hasAttachment": complaint.get("attachment") is not None
         }
             
         return jsonify(success=True, complaint=formatted_complaint)
@@ -404,261 +400,98 @@ def get_complaint_detail(complaint_id):
         print(f"Error fetching complaint detail: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
 
-@complaints_bp.route("/download/<complaint_id>", methods=["GET"])
-@jwt_required()
-def download_attachment(complaint_id):
-    """Download complaint attachment"""
-    try:
-        user_identity = get_jwt_identity()
-        
-        # Find the complaint
-        complaint = complaints_collection.find_one({"_id": ObjectId(complaint_id)})
-        
-        if not complaint:
-            return jsonify(success=False, message="Complaint not found"), 404
-            
-        # Only allow the submitter or admins to download
-        # TODO: Add proper admin check
-        if complaint.get("user_identity") != user_identity:
-            return jsonify(success=False, message="Not authorized to download this attachment"), 403
-            
-        # Check if attachment exists
-        attachment_path = complaint.get("attachment")
-        if not attachment_path or not os.path.exists(attachment_path):
-            return jsonify(success=False, message="Attachment not found"), 404
-            
-        # Get filename from path
-        filename = os.path.basename(attachment_path)
-        directory = os.path.dirname(attachment_path)
-        
-        # Return file
-        return send_from_directory(
-            directory,
-            filename,
-            as_attachment=True
-        )
-        
-    except Exception as e:
-        print(f"Error downloading attachment: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
+def _attachment_serializer():
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt="complaint-attachment")
+
+def _can_view_attachment(complaint, identity):
+    """Submitter or any admin"""
+    if not identity:
+        return False
+    if complaint.get("user_identity") == identity:
+        return True
+    return admin_collection.find_one({"email": identity}, {"_id": 1}) is not None
+
+def _attachment_name(complaint, path):
+    return complaint.get("attachmentName") or os.path.basename(path)
 
 @complaints_bp.route("/attachment/<complaint_id>", methods=["GET"])
 @jwt_required()
 def get_attachment_url(complaint_id):
-    """Get the URL for a complaint attachment"""
-    try:
-        # Get admin identity
-        admin_identity = get_jwt_identity()
-        
-        # Find complaint
-        complaint = complaints_collection.find_one({"_id": ObjectId(complaint_id)})
-        
-        if not complaint:
-            return jsonify(success=False, message="Complaint not found"), 404
-            
-        # Check if complaint has attachment
-        attachment_path = complaint.get("attachment")
-        if not attachment_path:
-            return jsonify(success=False, message="No attachment found"), 404
-            
-        # Create a URL for the attachment
-        filename = os.path.basename(attachment_path)
-        attachment_url = f"http://localhost:8080/complaints/view-attachment/{complaint_id}"
-        
-        return jsonify(success=True, attachmentUrl=attachment_url, filename=filename)
-        
-    except Exception as e:
-        print(f"Error getting attachment URL: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
-
-# New endpoint for viewing attachments without JWT requirement
-@complaints_bp.route("/view-attachment/<complaint_id>", methods=["GET"])
-def view_public_attachment(complaint_id):
-    """View a complaint attachment without authentication"""
+    """Get a short-lived signed URL for a complaint attachment"""
     try:
-        # Find complaint
-        complaint = complaints_collection.find_one({"_id": ObjectId(complaint_id)})
-        
+        complaint = complaints_collection.find_one(
+            {"_id": ObjectId(complaint_id)},
+            {"attachment": 1, "attachmentName": 1, "user_identity": 1}
+        )
         if not complaint:
             return jsonify(success=False, message="Complaint not found"), 404
-            
-        # Check if complaint has attachment
-        attachment_path = complaint.get("attachment")
-        if not attachment_path:
-            return jsonify(success=False, message="No attachment found for this complaint"), 404
-        
-        print(f"Original attachment path: {attachment_path}")
-        
-        # Fix path separators inconsistencies
-        normalized_path = os.path.normpath(attachment_path)
-        print(f"Normalized attachment path: {normalized_path}")
-        
-        # Extract the filename 
-        filename = os.path.basename(normalized_path)
-        
-        # Rebuild the path relative to the correct base directory
-        # This ensures we use the correct base directory regardless of how the path was stored
-        correct_path = os.path.join(UPLOAD_FOLDER, filename)
-        print(f"Reconstructed attachment path: {correct_path}")
-        
-        # Check if the file exists
-        if not os.path.exists(correct_path):
-            print(f"File not found at {correct_path}")
-            return jsonify(success=False, message="Attachment file not found"), 404
-        
-        # Return the file
-        try:
-            print(f"Serving file from: {correct_path}")
-            return send_file(correct_path, as_attachment=False)
-        except Exception as e:
-            print(f"Error serving file: {str(e)}")
-            return jsonify(success=False, message=f"Error serving file: {str(e)}"), 500
-        
-    except Exception as e:
-        print(f"Error in view_public_attachment: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify(success=False, message=str(e)), 500
 
-# Add a new endpoint to directly get file content as base64 (as a fallback)
-@complaints_bp.route("/attachment-data/<complaint_id>", methods=["GET"])
-def get_attachment_data(complaint_id):
-    """Get attachment file data as base64 encoded string"""
-    try:
-        # Find complaint
-        complaint = complaints_collection.find_one({"_id": ObjectId(complaint_id)})
-        
-        if not complaint:
-            return jsonify(success=False, message="Complaint not found"), 404
-            
-        # Check if complaint has attachment
-        attachment_path = complaint.get("attachment")
-        if not attachment_path:
-            return jsonify(success=False, message="No attachment found for this complaint"), 404
-        
-        # Make sure the path exists
-        if not os.path.exists(attachment_path):
-            print(f"Attachment file not found at path: {attachment_path}")
-            return jsonify(success=False, message="Attachment file not found"), 404
-            
-        # Read file and convert to base64
-        import base64
-        with open(attachment_path, "rb") as file:
-            file_data = file.read()
-            base64_data = base64.b64encode(file_data).decode('utf-8')
-        
-        # Get file type
-        filename = os.path.basename(attachment_path)
-        file_extension = os.path.splitext(filename)[1].lower()
-        
-        # Determine mime type
-        mime_type = "application/octet-stream"  # default
-        if file_extension in ['.jpg', '.jpeg']:
-            mime_type = "image/jpeg"
-        elif file_extension == '.png':
-            mime_type = "image/png"
-        elif file_extension == '.pdf':
-            mime_type = "application/pdf"
-        
-        return jsonify(success=True, 
-                      data=base64_data, 
-                      mime_type=mime_type, 
-                      filename=filename)
-        
-    except Exception as e:
-        print(f"Error getting attachment data: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
+        if not _can_view_attachment(complaint, get_jwt_identity()):
+            return jsonify(success=False, message="Not authorized to view this attachment"), 403
 
-@complaints_bp.route("/public-attachment/<complaint_id>", methods=["GET"])
-def get_public_attachment(complaint_id):
-    """Get public URL for complaint attachment without authentication"""
-    try:
-        # Find complaint
-        complaint = complaints_collection.find_one({"_id": ObjectId(complaint_id)})
-        
-        if not complaint:
-            return jsonify(success=False, message="Complaint not found"), 404
-            
-        # Check if complaint has attachment
         attachment_path = complaint.get("attachment")
         if not attachment_path:
             return jsonify(success=False, message="No attachment found"), 404
-            
-        # Create a URL for the attachment
-        filename = os.path.basename(attachment_path)
-        
-        # Return direct attachment info for display
+
+        filename = _attachment_name(complaint, attachment_path)
+        token = _attachment_serializer().dumps(complaint_id)
+        attachment_url = f"{request.host_url.rstrip('/')}/complaints/attachment/{complaint_id}/file?token={token}"
+
         return jsonify(
-            success=True, 
-            attachmentUrl=f"http://localhost:8080/complaints/view-attachment/{complaint_id}",
+            success=True,
+            attachmentUrl=attachment_url,
+            downloadUrl=f"{attachment_url}&download=1",
             filename=filename,
-            fileType=os.path.splitext(filename)[1].lower()
+            fileType=os.path.splitext(filename)[1].lower(),
+            expiresIn=ATTACHMENT_URL_MAX_AGE
         )
-        
+
     except Exception as e:
-        print(f"Error getting public attachment URL: {str(e)}")
+        print(f"Error getting attachment URL: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
 
-# Add a new public endpoint for viewing attachments without authentication
-@complaints_bp.route("/public-attachment/<complaint_id>", methods=["GET"])
-def get_public_attachment_url(complaint_id):
-    """Get public attachment URL for a complaint without authentication"""
+@complaints_bp.route("/attachment/<complaint_id>/file", methods=["GET"])
+def serve_attachment(complaint_id):
+    """Stream a complaint attachment for a signed URL or an authorized JWT; ?download=1 saves it as a file"""
     try:
-        # Find complaint
-        complaint = complaints_collection.find_one({"_id": ObjectId(complaint_id)})
-        
+        complaint = complaints_collection.find_one(
+            {"_id": ObjectId(complaint_id)},
+            {"attachment": 1, "attachmentName": 1, "user_identity": 1}
+        )
         if not complaint:
             return jsonify(success=False, message="Complaint not found"), 404
-            
-        # Check if complaint has attachment
-        attachment_path = complaint.get("attachment")
-        if not attachment_path:
-            return jsonify(success=False, message="No attachment found"), 404
-            
-        if not os.path.exists(attachment_path):
-            return jsonify(success=False, message="Attachment file not found on server"), 404
-            
-        # Get filename and create a direct public URL
-        filename = os.path.basename(attachment_path)
-        attachment_url = f"/complaints/view-attachment/{complaint_id}"
-        
-        return jsonify(
-            success=True, 
-            attachmentUrl=attachment_url,
-            filename=filename
+
+        token = request.args.get("token")
+        if token:
+            try:
+                signed_id = _attachment_serializer().loads(token, max_age=ATTACHMENT_URL_MAX_AGE)
+            except SignatureExpired:
+                return jsonify(success=False, message="Attachment link has expired"), 403
+            except BadSignature:
+                return jsonify(success=False, message="Invalid attachment link"), 403
+            if signed_id != complaint_id:
+                return jsonify(success=False, message="Invalid attachment link"), 403
+        else:
+            verify_jwt_in_request(optional=True)
+            if not _can_view_attachment(complaint, get_jwt_identity()):
+                return jsonify(success=False, message="Not authorized to view this attachment"), 403
+
+        path = media_store.locate(complaint.get("attachment"), UPLOAD_FOLDER)
+        if not path:
+            return jsonify(success=False, message="Attachment file not found"), 404
+
+        response = send_media(
+            path,
+            download_name=_attachment_name(complaint, path),
+            as_attachment=bool(request.args.get("download"))
         )
-    except Exception as e:
-        print(f"Error getting public attachment URL: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
+        # Signed URLs are per-user; keep them out of shared caches
+        response.headers["Cache-Control"] = response.headers["Cache-Control"].replace("public", "private")
+        return response
 
-# Create a truly public endpoint for viewing attachment files
-@complaints_bp.route("/view-attachment/<complaint_id>", methods=["GET"])
-def view_attachment_public(complaint_id):
-    """View a complaint attachment without any authentication"""
-    try:
-        # Find complaint
-        complaint = complaints_collection.find_one({"_id": ObjectId(complaint_id)})
-        
-        if not complaint:
-            return "Complaint not found", 404
-            
-        # Check if complaint has attachment
-        attachment_path = complaint.get("attachment")
-        if not attachment_path:
-            return "No attachment found", 404
-            
-        if not os.path.exists(attachment_path):
-            return "Attachment file not found on server", 404
-            
-        # Serve the file directly
-        directory = os.path.dirname(attachment_path)
-        filename = os.path.basename(attachment_path)
-        
-        return send_from_directory(directory, filename)
-        
     except Exception as e:
-        print(f"Error viewing attachment: {str(e)}")
-        return str(e), 500
+        print(f"Error serving attachment: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
 
 @complaints_bp.route('/create', methods=['POST'])
 @jwt_required()
@@ -691,7 +524,7 @@ def create_complaint():
             'entityName': data.get('entityName', 'Unknown'),  # Changed from against_name to entityName
             'subject': data.get('subject'),
             'description': data.get('description'),
-            'status': 'pending',  # pending, investigating, resolved, rejected
+            'status': 'pending',  # one of COMPLAINT_STATUSES
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow(),
             'event_id': data.get('event_id', ''),
@@ -702,6 +535,7 @@ def create_complaint():
         
         # Insert complaint into database
         result = complaints_collection.insert_one(complaint)
+        counters.record("complaints", status="pending")
         
         return jsonify({
             'success': True,
@@ -715,39 +549,6 @@ def create_complaint():
         traceback.print_exc()
         return jsonify(success=False, message=str(e)), 500
 
-@complaints_bp.route('/list', methods=['GET'])
-@jwt_required()
-def get_complaints_list():
-    """Get all complaints for admin view"""
-    try:
-        # Get all complaints, sorted by creation date (newest first)
-        complaints = list(complaints_collection.find().sort('created_at', -1))
-        
-        # Format complaints for response
-        formatted_complaints = []
-        for complaint in complaints:
-            formatted_complaint = {
-                '_id': str(complaint['_id']),
-                'subject': complaint.get('subject', ''),
-                'description': complaint.get('description', ''),
-                'complainant_identity': complaint.get('complainant_identity', ''),
-                'complainant_type': complaint.get('complainant_type', 'user'),
-                'against_type': complaint.get('against_type', ''),
-                'against_id': complaint.get('against_id', ''),
-                'against_email': complaint.get('against_email', ''),
-                'status': complaint.get('status', 'pending'),
-                'created_at': complaint.get('created_at', datetime.utcnow()).isoformat(),
-                'event_id': complaint.get('event_id', ''),
-                'event_name': complaint.get('event_name', '')
-            }
-            formatted_complaints.append(formatted_complaint)
-            
-        return jsonify(success=True, complaints=formatted_complaints)
-        
-    except Exception as e:
-        print(f"Error fetching complaints: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
-
 # Renamed route and function to avoid conflicts
 @complaints_bp.route('/my-complaints', methods=['GET'])
 @jwt_required()
@@ -829,13 +630,11 @@ def change_complaint_status(complaint_id):
         if not data or 'status' not in data:
             return jsonify(success=False, message="Status is required"), 400
             
-        # Valid status values
-        valid_statuses = ['pending', 'investigating', 'resolved', 'rejected']
-        if data['status'] not in valid_statuses:
-            return jsonify(success=False, message=f"Status must be one of: {', '.join(valid_statuses)}"), 400
+        if data['status'] not in COMPLAINT_STATUSES:
+            return jsonify(success=False, message=f"Status must be one of: {', '.join(COMPLAINT_STATUSES)}"), 400
             
         # Update the complaint status
-        result = complaints_collection.update_one(
+        previous = complaints_collection.find_one_and_update(
             {'_id': ObjectId(complaint_id)},
             {
                 '$set': {
@@ -844,11 +643,13 @@ def change_complaint_status(complaint_id):
                     'resolution': data.get('resolution', ''),
                     'resolution_date': datetime.utcnow() if data['status'] in ['resolved', 'rejected'] else None
                 }
-            }
+            },
+            projection={'status': 1}
         )
         
-        if result.modified_count == 0:
-            return jsonify(success=False, message="Complaint not found or status not changed"), 404
+        if not previous:
+            return jsonify(success=False, message="Complaint not found"), 404
+        counters.move("complaints", previous.get('status'), data['status'])
             
         return jsonify(success=True, message="Complaint status updated successfully")
         
@@ -1,10 +1,10 @@
 import os
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
 from app import db, users_collection
+from app.utils import autocomplete, image_pipeline, media_store, invoice_cache, job_queue, registrations
+from app.utils.media_serving import send_media
 from bson import ObjectId
-from datetime import datetime
 
 # Create blueprint
 event_bp = Blueprint('event', __name__)
@@ -19,7 +19,10 @@ os.makedirs(UPLOAD_FOLDER_POSTERS, exist_ok=True)
 # Serve event poster images
 @event_bp.route("/uploads/event_posters/<filename>")
 def serve_poster(filename):
-    return send_from_directory(UPLOAD_FOLDER_POSTERS, filename)
+    path = media_store.locate(filename, UPLOAD_FOLDER_POSTERS)
+    if not path:
+        return jsonify(success=False, message="Poster not found"), 404
+    return send_media(path)
 
 @event_bp.route("/list", methods=["GET"])
 def get_all_events():
@@ -27,6 +30,8 @@ def get_all_events():
     try:
         # Fetch all events from the database
         events = list(events_collection.find())
+        size = request.args.get("size")
+        accept = request.headers.get("Accept", "")
         
         # Format the events for response
         formatted_events = []
@@ -42,7 +47,8 @@ def get_all_events():
                 "fee": event.get("fee", ""),
                 "duration": event.get("duration", ""),
                 "instructor_id": str(event.get("instructor_id", "")) if event.get("instructor_id") else "",
-                "registered_users_count": len(event.get("registered_users", []))
+                "registered_users_count": event.get("registered_count", 0),
+                "capacity": event.get("capacity")
             }
             
             # Add poster URL if available
@@ -50,6 +56,12 @@ def get_all_events():
                 poster_filename = event["poster"]
                 formatted_event["poster"] = poster_filename
                 formatted_event["poster_url"] = f"{request.host_url.rstrip('/')}/event/uploads/event_posters/{poster_filename}"
+                formatted_event["poster_meta"] = event.get("poster_meta")
+
+                # ?size=thumb|card|full serves a resized variant instead of the original
+                variant_url = image_pipeline.pick_variant(event.get("poster_variants"), size, accept)
+                if variant_url:
+                    formatted_event["poster_url"] = f"{request.host_url.rstrip('/')}{variant_url}"
             
             formatted_events.append(formatted_event)
             
@@ -81,7 +93,8 @@ def get_event_details(event_id):
             "fee": event.get("fee", ""),
             "duration": event.get("duration", ""),
             "instructor_id": str(event.get("instructor_id", "")) if event.get("instructor_id") else "",
-            "registered_users_count": len(event.get("registered_users", []))
+            "registered_users_count": event.get("registered_count", 0),
+            "capacity": event.get("capacity")
         }
         
         # Add poster URL if available
@@ -89,6 +102,7 @@ def get_event_details(event_id):
             poster_filename = event["poster"]
             formatted_event["poster"] = poster_filename
             formatted_event["poster_url"] = f"{request.host_url.rstrip('/')}/event/uploads/event_posters/{poster_filename}"
+            formatted_event["poster_meta"] = event.get("poster_meta")
         
         return jsonify(success=True, event=formatted_event)
     
@@ -101,33 +115,12 @@ def get_event_details(event_id):
 def register_for_event(event_id):
     """Register a user for an event"""
     try:
-        user_email = get_jwt_identity()
-        
-        # Find the event
-        event = events_collection.find_one({"_id": ObjectId(event_id)})
-        
-        if not event:
-            return jsonify(success=False, message="Event not found"), 404
-            
-        # Check if user is already registered
-        registered_users = event.get("registered_users", [])
-        
-        for user in registered_users:
-            if user.get("user_id") == user_email:
-                return jsonify(success=False, message="You are already registered for this event"), 400
-                
-        # Add user to registered users list
-        events_collection.update_one(
-            {"_id": ObjectId(event_id)},
-            {"$push": {"registered_users": {
-                "user_id": user_email,
-                "payment_status": "pending",
-                "registration_date": datetime.now()
-            }}}
-        )
-        
+        # Takes a seat atomically; fails when full or already registered
+        registrations.register(event_id, get_jwt_identity())
         return jsonify(success=True, message="Registration successful")
-    
+
+    except registrations.RegistrationError as e:
+        return jsonify(success=False, message=e.message), e.status
     except Exception as e:
         print(f"Error registering for event: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
@@ -140,9 +133,8 @@ def get_user_registered_events():
         user_email = get_jwt_identity()
         
         # Find all events where user is registered
-        events = list(events_collection.find({
-            "registered_users.user_id": user_email
-        }))
+        registered = registrations.for_user(user_email)
+        events = list(events_collection.find({"_id": {"$in": list(registered)}}))
         
         # Format events for response
         formatted_events = []
@@ -164,12 +156,10 @@ def get_user_registered_events():
                 poster_filename = event["poster"]
                 formatted_event["poster"] = poster_filename
                 formatted_event["poster_url"] = f"{request.host_url.rstrip('/')}/event/uploads/event_posters/{poster_filename}"
+                formatted_event["poster_meta"] = event.get("poster_meta")
             
             # Add registration status
-            for registration in event.get("registered_users", []):
-                if registration.get("user_id") == user_email:
-                    formatted_event["registration_status"] = registration.get("payment_status", "pending")
-                    break
+            formatted_event["registration_status"] = registered[event["_id"]].get("payment_status", "pending")
             
             formatted_events.append(formatted_event)
         
@@ -179,6 +169,52 @@ def get_user_registered_events():
         print(f"Error fetching registered events: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
 
+# Event and registration fields a receipt is rendered from
+RECEIPT_FIELDS = ["name", "date", "time", "place", "fee", "payment_status", "registration_date"]
+
+def event_receipt(user_email, event_id):
+    """Receipt job for the current user's registration"""
+    try:
+        registration = registrations.find(event_id, user_email)
+    except registrations.RegistrationError as e:
+        raise job_queue.JobError(e.message, e.status)
+    event = registration and events_collection.find_one(
+        {"_id": registration["event_id"]},
+        {"name": 1, "date": 1, "time": 1, "place": 1, "fee": 1}
+    )
+    if not event:
+        raise job_queue.JobError("Registration not found", 404)
+
+    receipt = {
+        **event,
+        "_id": str(event["_id"]),
+        "user_id": user_email,
+        "registration_date": registration.get("registration_date"),
+        "payment_status": registration.get("payment_status", "pending")
+    }
+
+    def build():
+        user = users_collection.find_one({"email": user_email}, {"first_name": 1, "last_name": 1}) or {}
+        attendee = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
+        return {**receipt, "attendee_name": attendee or user_email}
+
+    version = invoice_cache.document_version(receipt, RECEIPT_FIELDS)
+    return "event_receipt", invoice_cache.viewer_key(receipt["_id"], user_email), version, build
+
+job_queue.register_document("event_receipt", event_receipt, lambda event_id: f"event_receipt_{event_id[:8]}.pdf")
+
+@event_bp.route("/receipt/<event_id>", methods=["GET"])
+@jwt_required()
+def download_event_receipt(event_id):
+    """PDF receipt for the current user's registration"""
+    try:
+        return job_queue.download_response("event_receipt", event_id, get_jwt_identity())
+    except job_queue.JobError as e:
+        return jsonify(success=False, message=e.message), e.status
+    except Exception as e:
+        print(f"Error generating event receipt: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
 @event_bp.route("/filter", methods=["POST"])
 def filter_events():
     """Filter events based on criteria"""
@@ -225,6 +261,7 @@ def filter_events():
                 poster_filename = event["poster"]
                 formatted_event["poster"] = poster_filename
                 formatted_event["poster_url"] = f"{request.host_url.rstrip('/')}/event/uploads/event_posters/{poster_filename}"
+                formatted_event["poster_meta"] = event.get("poster_meta")
             
             formatted_events.append(formatted_event)
         
@@ -271,6 +308,7 @@ def search_events():
                 poster_filename = event["poster"]
                 formatted_event["poster"] = poster_filename
                 formatted_event["poster_url"] = f"{request.host_url.rstrip('/')}/event/uploads/event_posters/{poster_filename}"
+                formatted_event["poster_meta"] = event.get("poster_meta")
             
             formatted_events.append(formatted_event)
         
@@ -286,33 +324,15 @@ def cancel_registration(event_id):
     """Cancel a user's registration for an event"""
     try:
         user_email = get_jwt_identity()
-        
-        # Find the event
-        event = events_collection.find_one({"_id": ObjectId(event_id)})
-        
-        if not event:
-            return jsonify(success=False, message="Event not found"), 404
-            
-        # Check if user is registered
-        registered_users = event.get("registered_users", [])
-        user_registered = False
-        
-        for user in registered_users:
-            if user.get("user_id") == user_email:
-                user_registered = True
-                break
-                
-        if not user_registered:
+
+        # Deletes the registration and gives its seat back
+        if not registrations.cancel(event_id, user_email):
             return jsonify(success=False, message="You are not registered for this event"), 400
-                
-        # Remove user from registered users list
-        events_collection.update_one(
-            {"_id": ObjectId(event_id)},
-            {"$pull": {"registered_users": {"user_id": user_email}}}
-        )
-        
+
         return jsonify(success=True, message="Registration cancelled successfully")
-    
+
+    except registrations.RegistrationError as e:
+        return jsonify(success=False, message=e.message), e.status
     except Exception as e:
         print(f"Error cancelling registration: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
@@ -369,20 +389,31 @@ def update_event(event_id):
             
         if data.get("duration"):
             update_data["duration"] = data["duration"]
+
+        # A blank capacity removes the limit; lowering it only stops new registrations
+        if "capacity" in data:
+            try:
+                update_data["capacity"] = registrations.parse_capacity(data["capacity"])
+            except registrations.RegistrationError as e:
+                return jsonify(success=False, message=e.message), e.status
             
-        # Handle poster file upload
-        poster = request.files.get("poster")
-        if poster:
-            filename = secure_filename(poster.filename)
-            saved_path = os.path.join(UPLOAD_FOLDER_POSTERS, filename)
-            poster.save(saved_path)
-            update_data["poster"] = filename
+        # Handle poster file upload (form file or completed chunked upload)
+        stored = media_store.store_from_request("poster", instructor_email)
+        if stored:
+            saved_path = stored["path"]
+            update_data["poster"] = stored["name"]
+            update_data["poster_variants"] = None
+            update_data["poster_meta"] = None
             
         # Update event
         events_collection.update_one(
             {"_id": ObjectId(event_id)},
             {"$set": update_data}
         )
+        autocomplete.index_entity("event", {**event, **update_data})
+        if stored:
+            media_store.release(event.get("poster"))
+            image_pipeline.schedule(saved_path, events_collection, {"_id": ObjectId(event_id)}, "poster_variants")
         
         return jsonify(success=True, message="Event updated successfully")
     
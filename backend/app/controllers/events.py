@@ -1,10 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
-from datetime import datetime
 import os
 import traceback
 from app import db, users_collection
+from app.utils import registrations
 
 # Create events collection reference
 events_collection = db.get_collection("events")
@@ -33,7 +33,9 @@ def get_events_list():
                 "duration": event.get("duration", 1),
                 "place": event.get("place", ""),
                 "poster": event.get("poster", None),
-                "instructor_id": str(event["instructor_id"]) if "instructor_id" in event else None
+                "instructor_id": str(event["instructor_id"]) if "instructor_id" in event else None,
+                "registered_count": event.get("registered_count", 0),
+                "capacity": event.get("capacity")
             }
             formatted_events.append(formatted_event)
             
@@ -65,7 +67,9 @@ def get_event_details(event_id):
             "duration": event.get("duration", 1),
             "place": event.get("place", ""),
             "poster": event.get("poster", None),
-            "instructor_id": str(event["instructor_id"]) if "instructor_id" in event else None
+            "instructor_id": str(event["instructor_id"]) if "instructor_id" in event else None,
+            "registered_count": event.get("registered_count", 0),
+            "capacity": event.get("capacity")
         }
         
         return jsonify(success=True, event=formatted_event)
@@ -79,34 +83,12 @@ def get_event_details(event_id):
 def register_for_event(event_id):
     """Register the user for an event"""
     try:
-        user_email = get_jwt_identity()
-        
-        # Check if the event exists
-        event = events_collection.find_one({"_id": ObjectId(event_id)})
-        if not event:
-            return jsonify(success=False, message="Event not found"), 404
-            
-        # Check if the user is already registered
-        if "registered_users" in event:
-            for user in event["registered_users"]:
-                if user.get("user_id") == user_email:
-                    return jsonify(success=False, message="You are already registered for this event"), 400
-                    
-        # Register user for the event
-        result = events_collection.update_one(
-            {"_id": ObjectId(event_id)},
-            {"$push": {"registered_users": {
-                "user_id": user_email,
-                "registration_date": datetime.now(),
-                "payment_status": "pending"
-            }}}
-        )
-        
-        if result.modified_count > 0:
-            return jsonify(success=True, message="Registration successful")
-        else:
-            return jsonify(success=False, message="Registration failed"), 400
-            
+        # Takes a seat atomically; fails when full or already registered
+        registrations.register(event_id, get_jwt_identity())
+        return jsonify(success=True, message="Registration successful")
+
+    except registrations.RegistrationError as e:
+        return jsonify(success=False, message=e.message), e.status
     except Exception as e:
         print(f"Error registering for event: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
@@ -119,20 +101,14 @@ def get_user_registered_events():
         user_email = get_jwt_identity()
         
         # Find all events where the user is registered
-        events = list(events_collection.find(
-            {"registered_users.user_id": user_email}
-        ))
+        registered = registrations.for_user(user_email)
+        events = list(events_collection.find({"_id": {"$in": list(registered)}}))
         
         # Format events for response
         formatted_events = []
         for event in events:
-            # Find user's registration details
-            registration = None
-            for user in event.get("registered_users", []):
-                if user.get("user_id") == user_email:
-                    registration = user
-                    break
-                    
+            registration = registered[event["_id"]]
+
             formatted_event = {
                 "_id": str(event["_id"]),
                 "name": event.get("name", "Untitled Event"),
@@ -144,8 +120,8 @@ def get_user_registered_events():
                 "duration": event.get("duration", 1),
                 "place": event.get("place", ""),
                 "poster": event.get("poster", None),
-                "registration_date": registration.get("registration_date").isoformat() if registration and registration.get("registration_date") else None,
-                "payment_status": registration.get("payment_status", "pending") if registration else "pending"
+                "registration_date": registration.get("registration_date").isoformat() if registration.get("registration_date") else None,
+                "payment_status": registration.get("payment_status", "pending")
             }
             formatted_events.append(formatted_event)
             
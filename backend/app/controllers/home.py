@@ -1,4 +1,5 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, jsonify
+from app import db
 
 home_bp = Blueprint('home', __name__)
 
@@ -9,3 +10,27 @@ def home():
 @home_bp.route('/about')
 def about():
     return "<h1>About</h1>"
+
+@home_bp.route('/home/trending')
+def trending():
+    """Get the precomputed trending products, materials and auctions"""
+    try:
+        kinds = request.args.get('type', 'product,auction').split(',')
+        limit = min(int(request.args.get('limit', 10)), 20)
+
+        docs = db["trending"].find(
+            {"_id": {"$in": kinds}},
+            {"items": {"$slice": limit}, "computed_at": 1}
+        )
+        result = {kind: [] for kind in kinds}
+        computed_at = None
+        for doc in docs:
+            result[doc["_id"]] = doc.get("items", [])
+            computed_at = doc.get("computed_at")
+
+        return jsonify(success=True, trending=result, computed_at=computed_at)
+    except ValueError:
+        return jsonify(success=False, message="limit must be a number"), 400
+    except Exception as e:
+        print(f"Error fetching trending items: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
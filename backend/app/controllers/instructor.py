@@ -1,22 +1,19 @@
 # app/controllers/instructor.py
 
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from flask import Blueprint, request, jsonify, send_from_directory
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
-from werkzeug.utils import secure_filename
 import os
-import uuid
 from bson.objectid import ObjectId
 from bson import ObjectId
 import datetime
-import time
 from datetime import datetime  # Import datetime class from the datetime module
-from flask import current_app
 from app import (
     events_collection,
     instructor_collection,
     users_collection,  # Add users_collection import
     db
 )
+from app.utils import autocomplete, counters, image_pipeline, media_store, registrations
 
 # Add new collection for bids
 bids_collection = db.get_collection("bids")
@@ -31,17 +28,14 @@ os.makedirs(UPLOAD_FOLDER_PROFILE, exist_ok=True)
 os.makedirs(UPLOAD_FOLDER_POSTER, exist_ok=True)
 
 def save_file(file, folder):
-    """Save uploaded file with a secure filename and return the filename"""
+    """Store an uploaded file in the content-addressed store and return its object name.
+
+    ``folder`` is kept for callers; files no longer live in per-type folders.
+    """
     if not file or file.filename == '':
         return None
-        
-    # Generate unique filename to prevent overwriting
-    filename = secure_filename(file.filename)
-    unique_filename = f"{uuid.uuid4().hex}_{filename}"
-    file_path = os.path.join(folder, unique_filename)
-    file.save(file_path)
-    
-    return unique_filename
+
+    return media_store.store(file)["name"]
 
 @instructor_bp.route('/register', methods=['POST'])
 def register():
@@ -83,6 +77,11 @@ def register():
     
     # Insert into database
     instructor_collection.insert_one(instructor_data)
+    counters.record("instructors")
+    autocomplete.index_entity("instructor", instructor_data)
+    if photo_filename:
+        image_pipeline.schedule(media_store.object_path(photo_filename), instructor_collection,
+                                {"email": email}, "profile_photo_variants")
     
     # Create token for automatic login
     token = create_access_token(identity=email)
@@ -135,6 +134,10 @@ def add_event():
     required_fields = ["name", "description", "type", "date", "time", "fee", "duration"]
     if any(not data.get(field) for field in required_fields):
         return jsonify(success=False, message="Missing required fields"), 400
+    try:
+        capacity = registrations.parse_capacity(data.get("capacity"))
+    except registrations.RegistrationError as e:
+        return jsonify(success=False, message=e.message), e.status
 
     # Handle poster file upload
     poster_filename = None
@@ -156,11 +159,17 @@ def add_event():
         "place": data.get("place") if data.get("type") == "offline" else None,
         "poster": poster_filename,
         "instructor_id": instructor["_id"],
-        "registered_users": []
+        "capacity": capacity,
+        "registered_count": 0
     }
     
     # Insert event into database
     event_id = events_collection.insert_one(event).inserted_id
+    counters.record("events")
+    autocomplete.index_entity("event", event)
+    if poster_filename:
+        image_pipeline.schedule(media_store.object_path(poster_filename), events_collection,
+                                {"_id": event_id}, "poster_variants")
     
     # Return success with event details
     return jsonify({
@@ -176,6 +185,7 @@ def add_event():
             "place": event["place"],
             "duration": event["duration"],
             "fee": event["fee"],
+            "capacity": capacity,
             "poster": poster_filename
         }
     })
@@ -236,16 +246,22 @@ def delete_event(event_id):
     if str(event["instructor_id"]) != str(instructor["_id"]):
         return jsonify(success=False, message="You don't have permission to delete this event"), 403
         
-    # Delete poster file if it exists
-    if event.get("poster"):
-        try:
-            os.remove(os.path.join(UPLOAD_FOLDER_POSTER, event["poster"]))
-        except:
-            # Continue even if file removal fails
-            pass
-            
     # Delete event from database
-    events_collection.delete_one({"_id": object_id})
+    if events_collection.delete_one({"_id": object_id}).deleted_count:
+        counters.record("events", -1)
+        registrations.delete_for_event(object_id)
+
+    # Release the poster; legacy files outside the object store are removed directly
+    if event.get("poster"):
+        if media_store.is_object_name(event["poster"]):
+            media_store.release(event["poster"])
+        else:
+            try:
+                os.remove(os.path.join(UPLOAD_FOLDER_POSTER, event["poster"]))
+            except:
+                # Continue even if file removal fails
+                pass
+    autocomplete.remove_entity("event", object_id)
     
     return jsonify(success=True, message="Event deleted successfully")
 
@@ -277,6 +293,7 @@ def list_all_events():
                 if event.get('poster'):
                     processed_event['poster'] = event['poster']
                     processed_event['poster_url'] = f"{request.host_url.rstrip('/')}/uploads/event_posters/{event['poster']}"
+                    processed_event['poster_meta'] = event.get('poster_meta')
                 
                 processed_events.append(processed_event)
             except Exception as e:
@@ -304,9 +321,8 @@ def get_registered_events():
         
         try:
             # Find all events where user is registered
-            events = list(events_collection.find({
-                'registered_users.user_id': user_email
-            }))
+            registered = registrations.for_user(user_email)
+            events = list(events_collection.find({'_id': {'$in': list(registered)}}))
             
             print(f"Found {len(events)} events")
             
@@ -326,19 +342,12 @@ def get_registered_events():
                     'instructor_id': str(event['instructor_id'])
                 }
                 
-                # Find user's registration
-                registration = next(
-                    (reg for reg in event.get('registered_users', []) 
-                     if reg['user_id'] == user_email),
-                    None
-                )
-                
-                if registration:
-                    processed_event['registration_details'] = {
-                        'payment_status': registration.get('payment_status', 'pending'),
-                        'payment_date': registration.get('payment_date', '').strftime('%Y-%m-%d %H:%M:%S') if registration.get('payment_date') else None
-                    }
-                    processed_events.append(processed_event)
+                registration = registered[event['_id']]
+                processed_event['registration_details'] = {
+                    'payment_status': registration.get('payment_status', 'pending'),
+                    'payment_date': registration.get('payment_date').strftime('%Y-%m-%d %H:%M:%S') if registration.get('payment_date') else None
+                }
+                processed_events.append(processed_event)
             
             return jsonify(success=True, events=processed_events)
             
@@ -368,14 +377,20 @@ def get_event_participants(event_id):
         if not event:
             return jsonify(success=False, message="Event not found or unauthorized"), 404
 
+        event_registrations = registrations.for_event(event["_id"])
+        users = {user['email']: user for user in users_collection.find(
+            {"email": {"$in": [registration['user_id'] for registration in event_registrations]}},
+            {"email": 1, "first_name": 1, "last_name": 1}
+        )}
+
         participants = []
-        for registration in event.get('registered_users', []):
-            user = users_collection.find_one({"email": registration['user_id']})
+        for registration in event_registrations:
+            user = users.get(registration['user_id'])
             if user:
                 participants.append({
                     'email': user['email'],
                     'name': f"{user.get('first_name', '')} {user.get('last_name', '')}",
-                    'payment_status': registration['payment_status'],
+                    'payment_status': registration.get('payment_status', 'pending'),
                     'payment_date': registration.get('payment_date', '').strftime('%Y-%m-%d %H:%M:%S') if registration.get('payment_date') else None
                 })
 
@@ -431,6 +446,9 @@ def update_profile():
             if photo.filename:
                 filename = save_file(photo, UPLOAD_FOLDER_PROFILE)
                 update_data['profile_photo'] = filename
+                update_data['profile_photo_variants'] = None
+
+        previous = instructor_collection.find_one({"email": instructor_email}, {"profile_photo": 1}) or {}
 
         # Update profile
         result = instructor_collection.update_one(
@@ -438,7 +456,16 @@ def update_profile():
             {"$set": update_data}
         )
 
+        # The new photo already holds a reference, so the old one is always released
+        if update_data.get('profile_photo'):
+            media_store.release(previous.get('profile_photo'))
+
         if result.modified_count:
+            autocomplete.refresh_entity("instructor", {"email": instructor_email})
+            if update_data.get('profile_photo'):
+                image_pipeline.schedule(media_store.object_path(update_data['profile_photo']),
+                                        instructor_collection, {"email": instructor_email},
+                                        "profile_photo_variants")
             return jsonify(success=True, message="Profile updated successfully")
         return jsonify(success=True, message="No changes made")
 
@@ -466,20 +493,13 @@ def get_event_details(event_id):
             event['date'] = event['date'].isoformat() if isinstance(event['date'], datetime) else event['date']
             
         # Find user registration details
-        registration_details = None
-        if 'registered_users' in event:
-            for user in event['registered_users']:
-                if user.get('user_id') == user_email:
-                    registration_details = user
-                    # Convert date fields
-                    if 'payment_date' in registration_details and isinstance(registration_details['payment_date'], datetime):
-                        registration_details['payment_date'] = registration_details['payment_date'].isoformat()
-                    break
-            
-        # Remove registered_users list from response for privacy
-        if 'registered_users' in event:
-            del event['registered_users']
-            
+        registration_details = registrations.find(event['_id'], user_email, {'_id': 0, 'event_id': 0})
+        if registration_details:
+            # Convert date fields
+            for field in ('payment_date', 'registration_date'):
+                if isinstance(registration_details.get(field), datetime):
+                    registration_details[field] = registration_details[field].isoformat()
+
         # Add registration status
         event['registration_details'] = registration_details
             
@@ -534,6 +554,10 @@ def create_bid():
 
         # Insert into database
         result = bids_collection.insert_one(bid)
+        counters.record("bids", status=bid['status'])
+        if image_filename:
+            image_pipeline.schedule(media_store.object_path(image_filename), bids_collection,
+                                    {'_id': result.inserted_id})
 
         return jsonify({
             'success': True,
@@ -641,13 +665,9 @@ def request_instructor_bid():
             image = request.files['image']
             if image.filename:
                 # Create safe filename
-                ext = image.filename.rsplit('.', 1)[1].lower() if '.' in image.filename else 'jpg'
-                image_filename = f"bid_instructor_{instructor_id}_{int(time.time())}.{ext}"
-                
-                # Save the image
-                upload_folder = current_app.config['UPLOAD_FOLDERS']['event_posters']
-                image_path = os.path.join(upload_folder, image_filename)
-                image.save(image_path)
+                stored = media_store.store(image)
+                image_filename = stored["name"]
+                image_path = stored["path"]
                 print(f"Image saved at: {image_path}")
         
         # Create bid request document
@@ -674,6 +694,9 @@ def request_instructor_bid():
         
         # Insert into database
         result = bids_collection.insert_one(bid_request)
+        counters.record("bids", status=bid_request['status'])
+        if image_filename:
+            image_pipeline.schedule(image_path, bids_collection, {'_id': result.inserted_id})
         
         return jsonify({
             'success': True,
@@ -686,32 +709,3 @@ def request_instructor_bid():
         import traceback
         print(traceback.format_exc())  # Print full traceback for debugging
         return jsonify(success=False, message=str(e)), 500
-
-@instructor_bp.route('/list', methods=['GET'])
-@jwt_required()
-def get_instructors_list():
-    """Get list of all instructors"""
-    try:
-        # This endpoint returns a simplified list of instructors for user complaints
-        instructors = list(instructor_collection.find({}, {
-            "email": 1,
-            "first_name": 1, 
-            "last_name": 1,
-            "art_specialization": 1
-        }))
-        
-        # Format instructors for response
-        formatted_instructors = []
-        for instructor in instructors:
-            formatted_instructors.append({
-                "_id": str(instructor["_id"]),
-                "name": f"{instructor.get('first_name', '')} {instructor.get('last_name', '')}".strip() or "Unknown",
-                "email": instructor.get("email", ""),
-                "expertise": instructor.get("art_specialization", "")
-            })
-            
-        return jsonify(success=True, instructors=formatted_instructors)
-        
-    except Exception as e:
-        print(f"Error fetching instructors list: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
\ No newline at end of file
@@ -0,0 +1,91 @@
+import os
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import jobs_collection
+from app.utils import invoice_cache, job_queue
+
+jobs_bp = Blueprint("jobs", __name__)
+
+# Clients may lower the priority of their jobs; "high" is kept for interactive downloads
+CLIENT_PRIORITIES = ("low", "normal")
+
+
+def _status(job):
+    status = {
+        "job_id": job["_id"],
+        "type": (job.get("document") or {}).get("kind", job["type"]),
+        "document_id": (job.get("document") or {}).get("id"),
+        "status": job["status"],
+        "attempts": job.get("attempts", 0),
+        "error": job.get("error"),
+        "created_at": job["created_at"].isoformat(),
+        "finished_at": job["finished_at"].isoformat() if job.get("finished_at") else None
+    }
+    if job["status"] == "complete":
+        status["result_url"] = f"/jobs/{job['_id']}/result"
+    return status
+
+
+@jobs_bp.route("", methods=["POST"], strict_slashes=False)
+@jwt_required()
+def create_job():
+    """Render a document in the background: {type: order_invoice|bid_invoice|event_receipt, id, priority?}"""
+    try:
+        data = request.get_json() or {}
+        kind = data.get("type")
+        doc_id = data.get("id")
+        priority = data.get("priority", "normal")
+        if not kind or not doc_id:
+            return jsonify(success=False, message="type and id are required"), 400
+        if kind not in job_queue.DOCUMENTS:
+            return jsonify(success=False, message=f"Unknown job type: {kind}",
+                           types=sorted(job_queue.DOCUMENTS)), 400
+        if priority not in CLIENT_PRIORITIES:
+            return jsonify(success=False, message=f"priority must be one of {', '.join(CLIENT_PRIORITIES)}"), 400
+
+        job = job_queue.request_document(kind, str(doc_id), get_jwt_identity(), priority)
+        # Already rendered: the result is available right away
+        code = 200 if job["status"] == "complete" else 202
+        return jsonify(success=True, **_status(job)), code
+
+    except job_queue.JobError as e:
+        return jsonify(success=False, message=e.message), e.status
+    except Exception as e:
+        print(f"Error creating job: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+
+@jobs_bp.route("/<job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    """Status of one of the current user's jobs"""
+    try:
+        job = jobs_collection.find_one({"_id": job_id, "owner": get_jwt_identity()}, {"params.data": 0})
+        if not job:
+            return jsonify(success=False, message="Job not found"), 404
+        return jsonify(success=True, **_status(job))
+    except Exception as e:
+        print(f"Error fetching job: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+
+@jobs_bp.route("/<job_id>/result", methods=["GET"])
+@jwt_required()
+def get_job_result(job_id):
+    """The rendered PDF of a completed job"""
+    try:
+        job = jobs_collection.find_one({"_id": job_id, "owner": get_jwt_identity()}, {"params.data": 0})
+        if not job:
+            return jsonify(success=False, message="Job not found"), 404
+        if job["status"] != "complete":
+            return jsonify(success=False, message=f"Job is {job['status']}", **_status(job)), 409
+        if not job.get("result") or not os.path.exists(job["result"]):
+            return jsonify(success=False, message="Result is no longer available, request it again"), 410
+
+        document = job.get("document") or {}
+        _, download_name = job_queue.DOCUMENTS.get(document.get("kind"), (None, lambda doc_id: "document.pdf"))
+        return invoice_cache.send_invoice(job["result"], download_name(document.get("id") or job_id))
+
+    except Exception as e:
+        print(f"Error sending job result: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
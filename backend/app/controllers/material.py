@@ -1,10 +1,12 @@
 import os
 from pathlib import Path
-from flask import Blueprint, request, jsonify, send_from_directory, url_for
-from werkzeug.utils import secure_filename
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import material_collection, users_collection
 from bson import ObjectId
+from app.utils.catalog_schema import parse_price, parse_quantity, catalog_filters
+from app.utils import autocomplete, trending, image_pipeline, media_store
+from app.utils.media_serving import send_media
 
 material_bp = Blueprint("material", __name__)
 
@@ -15,7 +17,10 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 # Serve uploaded material images
 @material_bp.route("/uploads/material_images/<filename>")
 def serve_image(filename):
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    path = media_store.locate(filename, UPLOAD_FOLDER)
+    if not path:
+        return jsonify(success=False, message="Image not found"), 404
+    return send_media(path)
 
 # Add Material API (Authenticated)
 @material_bp.route("/add", methods=["POST"])
@@ -36,14 +41,19 @@ def add_material():
     if not all([name, description, price, category, quantity]):
         return jsonify(success=False, message="All fields are required"), 400
 
+    try:
+        price = parse_price(price)
+        quantity = parse_quantity(quantity)
+    except ValueError:
+        return jsonify(success=False, message="Price and quantity must be numbers"), 400
+
     image_url = None
     if image:
-        filename = secure_filename(image.filename)
-        saved_path = os.path.join(UPLOAD_FOLDER, filename)
-        image.save(saved_path)
+        stored = media_store.store(image)
+        saved_path = stored["path"]
 
         # Generate image URL
-        image_url = url_for("material.serve_image", filename=filename, _external=True)
+        image_url = f"{request.host_url.rstrip('/')}{stored['url']}"
 
     material = {
         "seller_id": seller_id,
@@ -51,10 +61,13 @@ def add_material():
         "description": description,
         "price": price,
         "category": category,
-        "quantity": int(quantity),
+        "quantity": quantity,
         "image": image_url
     }
     material_collection.insert_one(material)
+    autocomplete.index_entity("material", material)
+    if image:
+        image_pipeline.schedule(saved_path, material_collection, {"_id": material["_id"]})
 
     return jsonify(success=True, message="Material added successfully!", image_url=image_url)
 
@@ -72,6 +85,8 @@ def get_seller_materials():
         # Include _id in response
         for material in materials:
             material["_id"] = str(material["_id"])
+
+        image_pipeline.apply_variants(materials, request.args.get("size"), request)
         
         return jsonify(success=True, materials=materials)
     except Exception as e:
@@ -80,7 +95,15 @@ def get_seller_materials():
 # Get all materials
 @material_bp.route("/list", methods=["GET"])
 def get_materials():
-    materials = list(material_collection.find())
+    try:
+        query, sort = catalog_filters(request.args)
+    except ValueError as e:
+        return jsonify(success=False, message=str(e)), 400
+
+    cursor = material_collection.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    materials = list(cursor)
 
     # Convert MongoDB ObjectId to string and ensure quantity field exists
     for material in materials:
@@ -92,6 +115,9 @@ def get_materials():
             # Ensure it's an integer value
             material["quantity"] = int(material.get("quantity", 0))
 
+    # ?size=thumb|card|full swaps the original image for a resized variant
+    image_pipeline.apply_variants(materials, request.args.get("size"), request)
+
     return jsonify(success=True, materials=materials)
 
 # Get a specific material
@@ -127,30 +153,36 @@ def update_material(material_id):
         if not existing_material:
             return jsonify(success=False, message="Material not found or unauthorized"), 404
 
-        # Prepare update data
-        update_data = {
-            "name": data.get("name"),
-            "description": data.get("description"),
-            "price": data.get("price"),
-            "category": data.get("category"),
-            "quantity": int(data.get("quantity")) if data.get("quantity") else existing_material["quantity"]
-        }
+        # Prepare update data; fields left out of the form keep their value
+        update_data = {field: data.get(field) for field in ("name", "description", "category") if field in data}
+        if data.get("price"):
+            update_data["price"] = parse_price(data.get("price"))
+        if data.get("quantity"):
+            update_data["quantity"] = parse_quantity(data.get("quantity"))
 
         # Handle image update if new image provided
         if image:
-            filename = secure_filename(image.filename)
-            saved_path = os.path.join(UPLOAD_FOLDER, filename)
-            image.save(saved_path)
-            update_data["image"] = url_for("material.serve_image", filename=filename, _external=True)
+            stored = media_store.store(image)
+            saved_path = stored["path"]
+            update_data["image"] = f"{request.host_url.rstrip('/')}{stored['url']}"
+            update_data["image_variants"] = None
+            update_data["image_meta"] = None
 
         # Update material
-        material_collection.update_one(
-            {"_id": ObjectId(material_id)},
-            {"$set": update_data}
-        )
+        if update_data:
+            material_collection.update_one(
+                {"_id": ObjectId(material_id)},
+                {"$set": update_data}
+            )
+        autocomplete.index_entity("material", {**existing_material, **update_data})
+        if image:
+            media_store.release(existing_material.get("image"))
+            image_pipeline.schedule(saved_path, material_collection, {"_id": ObjectId(material_id)})
 
         return jsonify(success=True, message="Material updated successfully!")
 
+    except ValueError:
+        return jsonify(success=False, message="Price and quantity must be numbers"), 400
     except Exception as e:
         return jsonify(success=False, message=str(e)), 500
 
@@ -162,14 +194,16 @@ def delete_material(material_id):
         seller_id = get_jwt_identity()
 
         # Verify material exists and belongs to seller
-        result = material_collection.delete_one({
+        deleted = material_collection.find_one_and_delete({
             "_id": ObjectId(material_id),
             "seller_id": seller_id
-        })
+        }, projection={"image": 1})
 
-        if result.deleted_count == 0:
+        if not deleted:
             return jsonify(success=False, message="Material not found or unauthorized"), 404
 
+        autocomplete.remove_entity("material", material_id)
+        media_store.release(deleted.get("image"))
         return jsonify(success=True, message="Material deleted successfully!")
 
     except Exception as e:
@@ -245,6 +279,7 @@ def add_to_cart():
             )
 
         if result.modified_count > 0 or result.matched_count > 0:
+            trending.record("material", material_id, "cart_add")
             return jsonify(success=True, message="Added to cart successfully!")
         else:
             return jsonify(success=False, message="Failed to update cart"), 500
@@ -0,0 +1,49 @@
+import os
+from flask import Blueprint, jsonify, current_app, abort, redirect
+from werkzeug.security import safe_join
+from app.utils import media_store, storage
+from app.utils.media_serving import send_media
+
+media_bp = Blueprint('media', __name__)
+
+# Top-level upload folders never served as static files
+PRIVATE_FOLDERS = {media_store.PRIVATE_PREFIX.rstrip('/'), 'complaints'}
+
+@media_bp.route('/<name>')
+def serve_media(name):
+    """Serve a content-addressed object with far-future caching"""
+    path = media_store.object_path(name)
+    if not path:
+        return jsonify(success=False, message="File not found"), 404
+    if not os.path.exists(path):
+        # Stored by another node or uploaded straight to the object store
+        remote = storage.remote_url(path)
+        if remote:
+            return redirect(remote)
+        return jsonify(success=False, message="File not found"), 404
+
+    return send_media(path, immutable=True)
+
+def serve_upload(filename):
+    """Static /uploads/<path> handler with caching headers and object-store fallback.
+
+    Documents written after the move to content-addressed storage only hold
+    the object name, while clients still build /uploads/<folder>/<name> URLs.
+    Complaint attachments (private objects and the legacy complaints folder)
+    are only served by the complaints blueprint.
+    """
+    if filename.replace("\\", "/").lstrip("/").split("/", 1)[0] in PRIVATE_FOLDERS:
+        abort(404)
+    path = safe_join(current_app.static_folder, filename)
+    if path and os.path.isfile(path):
+        return send_media(path)
+
+    path = media_store.object_path(filename.rsplit("/", 1)[-1])
+    if path and os.path.exists(path):
+        return send_media(path, immutable=True)
+
+    # Objects and derivatives that only exist in the remote store
+    remote = storage.remote_url(path or safe_join(current_app.static_folder, filename) or "")
+    if remote:
+        return redirect(remote)
+    abort(404)
@@ -1,10 +1,10 @@
 import os
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import users_collection, product_collection, material_collection, orders_collection
+from app import users_collection, product_collection, material_collection, orders_collection, admin_collection, exports_collection
 from bson import ObjectId
-from datetime import datetime
-from app.utils.pdf_generator import generate_invoice_pdf
+from datetime import datetime, timedelta
+from app.utils import counters, data_export, invoice_cache, invoice_export, job_queue
 
 order_bp = Blueprint("order", __name__)
 
@@ -125,6 +125,56 @@ def get_seller_orders():
         print(f"Error fetching seller orders: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
 
+def seller_order_export(seller_email):
+    """Export fields of a seller's orders; amounts and items cover only that seller's items"""
+    def seller_items(order):
+        return [item for item in order.get('items') or [] if item.get('seller_id') == seller_email]
+
+    return data_export.Dataset("orders", {
+        'order_id': '_id',
+        'created_at': 'created_at',
+        'status': 'status',
+        'customer_email': 'user_email',
+        'payment_id': 'payment_id',
+        'item_count': data_export.computed(['items'], lambda order: len(seller_items(order))),
+        'total_amount': data_export.computed(
+            ['items'], lambda order: sum(float(item.get('price', 0)) for item in seller_items(order))),
+        'items': data_export.computed(['items'], seller_items),
+        'shipping_address': 'shipping_address'
+    }, default=['order_id', 'created_at', 'status', 'customer_email', 'item_count', 'total_amount'],
+       sort=[('created_at', -1)])
+
+@order_bp.route('/seller/orders/export', methods=['GET'])
+@jwt_required()
+def export_seller_orders():
+    """Stream the current seller's orders: ?format=csv|ndjson&fields=a,b,c&from=YYYY-MM-DD&to=YYYY-MM-DD"""
+    try:
+        seller_email = get_jwt_identity()
+        dataset = seller_order_export(seller_email)
+        try:
+            fmt, fields = data_export.parse_args(dataset, request.args)
+        except ValueError as e:
+            return jsonify(success=False, message=str(e)), 400
+        try:
+            date_from = _parse_day(request.args.get("from"), None)
+            date_to = _parse_day(request.args.get("to"), None)
+        except ValueError:
+            return jsonify(success=False, message="from and to must be YYYY-MM-DD"), 400
+
+        query = {"items.seller_id": seller_email}
+        if date_from or date_to:
+            query["created_at"] = {}
+            if date_from:
+                query["created_at"]["$gte"] = date_from
+            if date_to:
+                query["created_at"]["$lt"] = date_to + timedelta(days=1)
+
+        return data_export.stream(dataset, orders_collection, query, fmt, fields)
+
+    except Exception as e:
+        print(f"Error exporting seller orders: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
 @order_bp.route('/seller/update-status/<order_id>', methods=['PUT'])
 @jwt_required()
 def update_order_status(order_id):  # Add order_id parameter here
@@ -138,15 +188,18 @@ def update_order_status(order_id):  # Add order_id parameter here
         # Convert string ID to ObjectId
         order_obj_id = ObjectId(order_id)
 
-        result = orders_collection.update_one(
+        previous = orders_collection.find_one_and_update(
             {
                 "_id": order_obj_id,
-                "items.seller_id": seller_email
+                "items.seller_id": seller_email,
+                "status": {"$ne": new_status}
             },
-            {"$set": {"status": new_status}}
+            {"$set": {"status": new_status}},
+            projection={"status": 1}
         )
 
-        if result.modified_count:
+        if previous:
+            counters.move("orders", previous.get("status"), new_status)
             return jsonify(success=True, message="Order status updated successfully")
         return jsonify(success=False, message="Order not found or unauthorized"), 404
 
@@ -233,75 +286,98 @@ def get_seller_purchases():
         print(f"Error fetching seller purchases: {e}")
         return jsonify(success=False, message=str(e)), 500
 
+def order_invoice(user_identity, order_id):
+    """Invoice job for an order placed by ``user_identity``"""
+    order = orders_collection.find_one({"_id": ObjectId(order_id)})
+
+    if not order:
+        raise job_queue.JobError("Order not found", 404)
+
+    # Check if the user is authorized to access this order
+    if order.get("user_identity") != user_identity and order.get("user_email") != user_identity:
+        raise job_queue.JobError("Unauthorized to access this order", 403)
+
+    def build():
+        products, materials = invoice_export.load_catalog([order], product_collection, material_collection)
+        return invoice_export.order_invoice_data(order, products, materials)
+
+    # Items and prices are fixed at checkout; status changes do not alter the invoice
+    version = invoice_cache.document_version(order, invoice_export.INVOICE_FIELDS)
+    return "order", str(order["_id"]), version, build
+
+job_queue.register_document("order_invoice", order_invoice, lambda order_id: f"invoice_{order_id[:8]}.pdf")
+
 @order_bp.route("/invoice/<order_id>", methods=["GET"])
 @jwt_required()
 def download_invoice(order_id):
     try:
-        user_identity = get_jwt_identity()
-        
-        # Find the order
-        order = orders_collection.find_one({"_id": ObjectId(order_id)})
-        
-        if not order:
-            return jsonify(success=False, message="Order not found"), 404
-            
-        # Check if the user is authorized to access this order
-        if order.get("user_identity") != user_identity and order.get("user_email") != user_identity:
-            return jsonify(success=False, message="Unauthorized to access this order"), 403
-            
-        # Format the order data for the PDF
-        formatted_order = {
-            "_id": str(order["_id"]),
-            "payment_id": order.get("payment_id", ""),
-            "created_at": order.get("created_at", datetime.now()),
-            "items": [],
-            "total_amount": 0
-        }
-        
-        # Get product details
-        total_amount = 0
-        product_ids = order.get("product_ids", [])
-        for product_id in product_ids:
-            product = product_collection.find_one({"_id": product_id})
-            if product:
-                item = {
-                    "id": str(product["_id"]),
-                    "name": product.get("name", "Unknown Product"),
-                    "price": product.get("price", "0"),
-                    "category": product.get("category", ""),
-                    "itemType": "product"
-                }
-                formatted_order["items"].append(item)
-                total_amount += float(product.get("price", 0))
-                
-        # Get material details
-        material_ids = order.get("material_ids", [])
-        for material_id in material_ids:
-            material = material_collection.find_one({"_id": material_id})
-            if material:
-                item = {
-                    "id": str(material["_id"]),
-                    "name": material.get("name", "Unknown Material"),
-                    "price": material.get("price", "0"),
-                    "category": material.get("category", ""),
-                    "itemType": "material"
-                }
-                formatted_order["items"].append(item)
-                total_amount += float(material.get("price", 0))
-                
-        formatted_order["total_amount"] = total_amount
-        
-        # Generate PDF
-        pdf_buffer = generate_invoice_pdf(formatted_order)
-        
-        # Return the PDF
-        return send_file(
-            pdf_buffer,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"invoice_{order_id[:8]}.pdf"
-        )
-        
+        return job_queue.download_response("order_invoice", order_id, get_jwt_identity())
+    except job_queue.JobError as e:
+        return jsonify(success=False, message=e.message), e.status
     except Exception as e:
         print(f"Error generating invoice: {e}")
         return jsonify(success=False, message=str(e)), 500
+
+def _parse_day(value, default):
+    return datetime.strptime(value, "%Y-%m-%d") if value else default
+
+@order_bp.route("/invoices/export", methods=["GET"])
+@jwt_required()
+def export_invoices():
+    """ZIP of all invoices in ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive), streamed while it renders.
+
+    Admins get every order's full invoice, sellers get the orders containing
+    their items with only those items on each invoice. Defaults to the
+    current month. Poll progress with the X-Export-Id response header.
+    """
+    try:
+        identity = get_jwt_identity()
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        try:
+            date_from = _parse_day(request.args.get("from"), today.replace(day=1))
+            date_to = _parse_day(request.args.get("to"), today)
+        except ValueError:
+            return jsonify(success=False, message="from and to must be YYYY-MM-DD"), 400
+        if date_to < date_from:
+            return jsonify(success=False, message="to must not be before from"), 400
+
+        is_admin = admin_collection.find_one({"email": identity}, {"_id": 1}) is not None
+        seller = None if is_admin else identity
+        query = {"created_at": {"$gte": date_from, "$lt": date_to + timedelta(days=1)}}
+        if seller:
+            query.update(invoice_export.seller_filter(seller, product_collection, material_collection))
+
+        export_id = invoice_export.start(exports_collection, identity, query, date_from, date_to, orders_collection)
+        orders = orders_collection.find(query, invoice_export.ORDER_PROJECTION).sort("created_at", 1).batch_size(invoice_export.BATCH_SIZE)
+        stream = invoice_export.stream_zip(export_id, exports_collection, orders, product_collection, material_collection, seller)
+
+        filename = f"invoices_{date_from:%Y-%m-%d}_{date_to:%Y-%m-%d}.zip"
+        return Response(stream, mimetype="application/zip", headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Id": export_id,
+            "Cache-Control": "no-store"
+        })
+
+    except Exception as e:
+        print(f"Error exporting invoices: {e}")
+        return jsonify(success=False, message=str(e)), 500
+
+@order_bp.route("/invoices/export/<export_id>", methods=["GET"])
+@jwt_required()
+def export_progress(export_id):
+    """Progress of an invoice export started by the current user"""
+    try:
+        export = exports_collection.find_one({"_id": export_id, "owner": get_jwt_identity()})
+        if not export:
+            return jsonify(success=False, message="Export not found"), 404
+        return jsonify(
+            success=True,
+            export_id=export_id,
+            status=export["status"],
+            total=export["total"],
+            done=export["done"],
+            error=export.get("error")
+        )
+    except Exception as e:
+        print(f"Error fetching export progress: {e}")
+        return jsonify(success=False, message=str(e)), 500
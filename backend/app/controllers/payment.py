@@ -5,6 +5,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import users_collection, product_collection, material_collection, orders_collection, events_collection
 from bson import ObjectId
 from datetime import datetime
+from app.utils import counters, registrations, trending
 
 payment_bp = Blueprint("payment", __name__)
 
@@ -139,6 +140,11 @@ def payment_success():
         }
         
         orders_collection.insert_one(order)
+        counters.record("orders", status=order["status"])
+        for pid in product_ids:
+            trending.record("product", pid, "purchase")
+        for mid in material_ids:
+            trending.record("material", mid, "purchase")
         
         # Update product inventory
         for pid in product_ids:
@@ -205,6 +211,10 @@ def create_checkout_session():
         
         if not event:
             return jsonify(error="Event not found"), 404
+        # Paid seats are not checked again after payment, so a full event takes no new
+        # checkouts; a caller already holding a registration pays for the seat they have
+        if not registrations.has_room(event) and not registrations.find(event_id, get_jwt_identity(), {"_id": 1}):
+            return jsonify({"success": False, "error": "This event is full"}), 409
 
         # Update Stripe session creation with better error handling
         try:
@@ -258,10 +268,16 @@ def verify_payment():
             if payment_type == 'cart':
                 # Create order from cart items
                 user = users_collection.find_one({"email": user_email})
-                cart_items = list(product_collection.find({"_id": {"$in": user.get('cart', [])}}))
+                # Products and materials, each tagged with its type
+                cart_items = []
+                for item_type, collection, field in (("product", product_collection, 'cart'),
+                                                     ("material", material_collection, 'cart_materials')):
+                    for item in collection.find({"_id": {"$in": user.get(field) or []}}):
+                        item['itemType'] = item_type
+                        cart_items.append((item, collection))
 
-                # Check and update product quantities
-                for item in cart_items:
+                # Check and update quantities
+                for item, collection in cart_items:
                     if item['quantity'] < 1:
                         return jsonify({
                             "success": False, 
@@ -269,7 +285,7 @@ def verify_payment():
                         }), 400
 
                     # Decrease quantity
-                    product_collection.update_one(
+                    collection.update_one(
                         {"_id": item['_id']},
                         {"$inc": {"quantity": -1}}
                     )
@@ -282,41 +298,31 @@ def verify_payment():
                         'price': item['price'],
                         'image': item.get('image', ''),
                         'seller_id': str(item.get('seller_id', '')),  # Convert ObjectId to string and handle missing seller_id
-                        'quantity': 1
-                    } for item in cart_items],
-                    'total_amount': sum(float(item['price']) for item in cart_items),
+                        'quantity': 1,
+                        'type': item['itemType']
+                    } for item, _ in cart_items],
+                    'total_amount': sum(float(item['price']) for item, _ in cart_items),
                     'payment_id': session.id,
                     'status': 'confirmed',
-                    'created_at': datetime.datetime.now(),
+                    'created_at': datetime.now(),
                     'payment_status': 'completed'
                 }
                 
                 # Save order and clear cart
                 orders_collection.insert_one(order)
+                counters.record("orders", status=order['status'])
+                for item, _ in cart_items:
+                    trending.record(item['itemType'], item['_id'], "purchase")
                 users_collection.update_one(
                     {"email": user_email},
-                    {"$set": {"cart": []}}
+                    {"$set": {"cart": [], "cart_materials": []}}
                 )
                 
                 print(f"Created order for user {user_email} with {len(cart_items)} items")
                 
             else:  # Event registration
-                # Check if already registered
-                event = events_collection.find_one({
-                    '_id': ObjectId(session.metadata['event_id']),
-                    'registered_users.payment_id': session.id
-                })
-                
-                if not event:  # Only register if not already done
-                    events_collection.update_one(
-                        {'_id': ObjectId(session.metadata['event_id'])},
-                        {'$addToSet': {'registered_users': {
-                            'user_id': get_jwt_identity(),
-                            'payment_status': 'completed',
-                            'payment_id': session.id,
-                            'payment_date': datetime.datetime.now()
-                        }}}
-                    )
+                # Idempotent per checkout session
+                if registrations.record_payment(session.metadata['event_id'], get_jwt_identity(), session.id):
                     print(f"Registered user for event {session.metadata['event_id']}")
             
             return jsonify({"success": True, "type": payment_type})
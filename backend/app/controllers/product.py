@@ -1,14 +1,19 @@
 import os
 from pathlib import Path
-from flask import Blueprint, request, jsonify, send_from_directory, url_for
-from werkzeug.utils import secure_filename
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import product_collection, users_collection
+from app import product_collection, users_collection, db
 from bson import ObjectId
+from app.utils.catalog_schema import parse_price, parse_quantity, catalog_filters
+from app.utils import autocomplete, counters, trending, image_pipeline, media_store
+from app.utils.media_serving import send_media
 from datetime import datetime, timedelta
 
 product_bp = Blueprint("product", __name__)
 
+# Precomputed by app/utils/recommendations.py, keyed by item id
+recommendations_collection = db.get_collection("recommendations")
+
 # Define upload folder using app config
 UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads", "product_images")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -16,7 +21,10 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 # Serve uploaded product images
 @product_bp.route("/uploads/product_images/<filename>")
 def serve_image(filename):
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    path = media_store.locate(filename, UPLOAD_FOLDER)
+    if not path:
+        return jsonify(success=False, message="Image not found"), 404
+    return send_media(path)
 
 # 🔹 Add Product API (Authenticated)
 @product_bp.route("/add", methods=["POST"])
@@ -37,14 +45,19 @@ def add_product():
     if not all([name, description, price, category, quantity]):
         return jsonify(success=False, message="All fields are required"), 400
 
+    try:
+        price = parse_price(price)
+        quantity = parse_quantity(quantity)
+    except ValueError:
+        return jsonify(success=False, message="Price and quantity must be numbers"), 400
+
     image_url = None
     if image:
-        filename = secure_filename(image.filename)
-        saved_path = os.path.join(UPLOAD_FOLDER, filename)
-        image.save(saved_path)
+        stored = media_store.store(image)
+        saved_path = stored["path"]
 
         # Generate image URL
-        image_url = url_for("product.serve_image", filename=filename, _external=True)
+        image_url = f"{request.host_url.rstrip('/')}{stored['url']}"
 
     product = {
         "seller_id": seller_id,  # ✅ Store seller ID with the product
@@ -52,10 +65,14 @@ def add_product():
         "description": description,
         "price": price,
         "category": category,
-        "quantity": int(quantity),  # Add quantity
+        "quantity": quantity,  # Add quantity
         "image": image_url
     }
     product_collection.insert_one(product)
+    counters.record("products")
+    autocomplete.index_entity("product", product)
+    if image:
+        image_pipeline.schedule(saved_path, product_collection, {"_id": product["_id"]})
 
     return jsonify(success=True, message="Product added successfully!", image_url=image_url)
 
@@ -119,6 +136,8 @@ def get_seller_products():
         # Include _id in response
         for product in products:
             product["_id"] = str(product["_id"])
+
+        image_pipeline.apply_variants(products, request.args.get("size"), request)
         
         return jsonify(success=True, products=products)
     except Exception as e:
@@ -126,12 +145,23 @@ def get_seller_products():
 
 @product_bp.route("/list", methods=["GET"])
 def get_products():
-    products = list(product_collection.find())
+    try:
+        query, sort = catalog_filters(request.args)
+    except ValueError as e:
+        return jsonify(success=False, message=str(e)), 400
+
+    cursor = product_collection.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    products = list(cursor)
 
     # Convert MongoDB ObjectId to string
     for product in products:
         product["_id"] = str(product["_id"])
 
+    # ?size=thumb|card|full swaps the original image for a resized variant
+    image_pipeline.apply_variants(products, request.args.get("size"), request)
+
     return jsonify(success=True, products=products)
 
 @product_bp.route("/art/<string:art_id>", methods=["GET"])
@@ -144,11 +174,27 @@ def get_product(art_id):
 
         # Convert MongoDB ObjectId to string before sending JSON response
         product["_id"] = str(product["_id"])
+        trending.record("product", art_id, "view")
 
         return jsonify(success=True, product=product)
     except Exception as e:
         return jsonify(success=False, message=str(e)), 500
 
+# 🔹 Frequently bought together
+@product_bp.route("/<product_id>/related", methods=["GET"])
+def get_related_products(product_id):
+    """Get precomputed frequently-bought-together items for a product"""
+    try:
+        limit = min(int(request.args.get("limit", 8)), 12)
+        doc = recommendations_collection.find_one({"_id": product_id}, {"related": {"$slice": limit}})
+        related = doc.get("related", []) if doc else []
+        return jsonify(success=True, related=related)
+    except ValueError:
+        return jsonify(success=False, message="limit must be a number"), 400
+    except Exception as e:
+        print(f"Error fetching related products: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
 # 🔹 Update Product API
 @product_bp.route("/update/<product_id>", methods=["PUT"])
 @jwt_required()
@@ -167,30 +213,36 @@ def update_product(product_id):
         if not existing_product:
             return jsonify(success=False, message="Product not found or unauthorized"), 404
 
-        # Prepare update data
-        update_data = {
-            "name": data.get("name"),
-            "description": data.get("description"),
-            "price": data.get("price"),
-            "category": data.get("category"),
-            "quantity": int(data.get("quantity")) if data.get("quantity") else existing_product["quantity"]
-        }
+        # Prepare update data; fields left out of the form keep their value
+        update_data = {field: data.get(field) for field in ("name", "description", "category") if field in data}
+        if data.get("price"):
+            update_data["price"] = parse_price(data.get("price"))
+        if data.get("quantity"):
+            update_data["quantity"] = parse_quantity(data.get("quantity"))
 
         # Handle image update if new image provided
         if image:
-            filename = secure_filename(image.filename)
-            saved_path = os.path.join(UPLOAD_FOLDER, filename)
-            image.save(saved_path)
-            update_data["image"] = url_for("product.serve_image", filename=filename, _external=True)
+            stored = media_store.store(image)
+            saved_path = stored["path"]
+            update_data["image"] = f"{request.host_url.rstrip('/')}{stored['url']}"
+            update_data["image_variants"] = None
+            update_data["image_meta"] = None
 
         # Update product
-        product_collection.update_one(
-            {"_id": ObjectId(product_id)},
-            {"$set": update_data}
-        )
+        if update_data:
+            product_collection.update_one(
+                {"_id": ObjectId(product_id)},
+                {"$set": update_data}
+            )
+        autocomplete.index_entity("product", {**existing_product, **update_data})
+        if image:
+            media_store.release(existing_product.get("image"))
+            image_pipeline.schedule(saved_path, product_collection, {"_id": ObjectId(product_id)})
 
         return jsonify(success=True, message="Product updated successfully!")
 
+    except ValueError:
+        return jsonify(success=False, message="Price and quantity must be numbers"), 400
     except Exception as e:
         return jsonify(success=False, message=str(e)), 500
 
@@ -202,14 +254,17 @@ def delete_product(product_id):
         seller_id = get_jwt_identity()
 
         # Verify product exists and belongs to seller
-        result = product_collection.delete_one({
+        deleted = product_collection.find_one_and_delete({
             "_id": ObjectId(product_id),
             "seller_id": seller_id
-        })
+        }, projection={"image": 1})
 
-        if result.deleted_count == 0:
+        if not deleted:
             return jsonify(success=False, message="Product not found or unauthorized"), 404
 
+        counters.record("products", -1)
+        autocomplete.remove_entity("product", product_id)
+        media_store.release(deleted.get("image"))
         return jsonify(success=True, message="Product deleted successfully!")
 
     except Exception as e:
@@ -238,6 +293,7 @@ def add_to_cart():
         )
 
         if result.modified_count > 0 or result.upserted_id:
+            trending.record("product", product_id, "cart_add")
             return jsonify(success=True, message="Added to cart successfully")
         return jsonify(success=False, message="Item already in cart"), 200
 
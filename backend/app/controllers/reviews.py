@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
 from datetime import datetime
 from app import db, product_collection, events_collection, orders_collection
+from app.utils import trending
 
 reviews_bp = Blueprint('reviews', __name__)
 
@@ -66,6 +67,7 @@ def add_product_review(product_id):
             {'$set': {'avg_rating': avg_rating}}
         )
         
+        trending.record("product", product_id, "review")
         print(f"Product review added successfully: {result.inserted_id}")
         return jsonify(success=True, message="Review submitted successfully")
         
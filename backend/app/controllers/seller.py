@@ -3,8 +3,8 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from pymongo import MongoClient
-from werkzeug.utils import secure_filename
 from app import seller_collection, bcrypt, db
+from app.utils import autocomplete, counters, image_pipeline, media_store
 from bson.objectid import ObjectId
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -53,13 +53,14 @@ def register_seller():
 
     # Save image if provided
     image_path = None
+    image_name = None
     if image:
-        filename = secure_filename(image.filename)
-        image_path = os.path.join(UPLOAD_FOLDER, filename)
-        image.save(image_path)  # Save image locally
+        stored = media_store.store(image)  # Content-addressed, deduplicated
+        image_path = stored["path"]
+        image_name = stored["name"]
 
     # Store seller in database
-    seller_collection.insert_one({
+    seller = {
         "firstName": first_name,
         "lastName": last_name,
         "email": email,
@@ -68,8 +69,13 @@ def register_seller():
         "shopName": shop_name,
         "shopAddress": shop_address,
         "gender": gender,
-        "profilePhoto": image_path  # Store image path
-    })
+        "profilePhoto": image_name  # Object name in the media store
+    }
+    seller_collection.insert_one(seller)
+    counters.record("sellers")
+    autocomplete.index_entity("seller", seller)
+    if image_path:
+        image_pipeline.schedule(image_path, seller_collection, {"_id": seller["_id"]}, "profilePhoto_variants")
 
     return jsonify(success=True, message="Seller registered successfully!")
 
@@ -523,46 +529,21 @@ def update_seller_profile():
         
         # Handle profile photo upload
         if profile_photo:
-            filename = f"seller_{seller['_id']}_{int(datetime.now().timestamp())}.{profile_photo.filename.split('.')[-1]}"
-            profile_photo_path = os.path.join(UPLOAD_FOLDER, filename)
-            profile_photo.save(profile_photo_path)
-            update_data['profilePhoto'] = filename
+            stored = media_store.store(profile_photo)
+            profile_photo_path = stored["path"]
+            update_data['profilePhoto'] = stored["name"]
+            update_data['profilePhoto_variants'] = None
         
         # Update seller in database
         seller_collection.update_one({'_id': seller['_id']}, {'$set': update_data})
+        autocomplete.index_entity("seller", {**seller, **update_data})
+        if profile_photo:
+            media_store.release(seller.get('profilePhoto'))
+            image_pipeline.schedule(profile_photo_path, seller_collection, {'_id': seller['_id']},
+                                    'profilePhoto_variants')
         
         return jsonify(success=True, message="Profile updated successfully")
         
     except Exception as e:
         print(f"Error updating seller profile: {str(e)}")
         return jsonify(success=False, message=str(e)), 500
-
-@seller_bp.route('/list', methods=['GET'])
-@jwt_required()
-def get_sellers_list():
-    """Get list of all sellers for complaints dropdown"""
-    try:
-        # This endpoint returns a simplified list of sellers for the dropdown
-        sellers = list(seller_collection.find({}, {
-            "firstName": 1, 
-            "lastName": 1,
-            "shopName": 1,
-            "email": 1
-        }))
-        
-        # Format sellers for response
-        formatted_sellers = []
-        for seller in sellers:
-            formatted_sellers.append({
-                "_id": str(seller["_id"]),
-                "firstName": seller.get("firstName", ""),
-                "lastName": seller.get("lastName", ""),
-                "shopName": seller.get("shopName", "Unnamed Shop"),
-                "email": seller.get("email", "")
-            })
-            
-        return jsonify(success=True, sellers=formatted_sellers)
-        
-    except Exception as e:
-        print(f"Error fetching sellers list: {str(e)}")
-        return jsonify(success=False, message=str(e)), 500
@@ -0,0 +1,362 @@
+import base64
+import hashlib
+import os
+import re
+import uuid
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import upload_sessions_collection, media_collection
+from app.utils import media_store, storage
+
+upload_sessions_bp = Blueprint("upload_sessions", __name__)
+
+SESSIONS_DIR = media_store.SESSIONS_DIR
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+# Unfinished sessions (and their part files) are dropped after this long
+SESSION_LIFETIME = timedelta(hours=24)
+SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _part_path(upload_id):
+    return os.path.join(SESSIONS_DIR, f"{upload_id}.part")
+
+
+def _total_chunks(session):
+    return max(1, -(-session["size"] // session["chunk_size"]))
+
+
+def _status(session):
+    received = sorted(session.get("received") or [])
+    return {
+        "upload_id": session["_id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "chunk_size": session["chunk_size"],
+        "total_chunks": _total_chunks(session),
+        "received": received,
+        "missing": sorted(set(range(_total_chunks(session))) - set(received)),
+        "status": session["status"],
+        "expires_at": session["expires_at"].isoformat()
+    }
+
+
+def _find_session(upload_id):
+    return upload_sessions_collection.find_one({"_id": upload_id, "owner": get_jwt_identity()})
+
+
+@upload_sessions_bp.route("", methods=["POST"], strict_slashes=False)
+@jwt_required()
+def create_session():
+    """Start a chunked upload: {filename, size, content_type?, sha256?, chunk_size?}"""
+    try:
+        data = request.get_json() or {}
+        filename = data.get("filename")
+        content_type = data.get("content_type")
+        try:
+            size = int(data.get("size"))
+            chunk_size = int(data.get("chunk_size") or DEFAULT_CHUNK_SIZE)
+        except (TypeError, ValueError):
+            return jsonify(success=False, message="size and chunk_size must be integers"), 400
+
+        if not filename or size <= 0:
+            return jsonify(success=False, message="filename and size are required"), 400
+
+        # Per-type limit checked before a single byte is sent
+        limit = media_store.size_limit(filename, content_type)
+        if size > limit:
+            return jsonify(success=False, message=f"{filename} exceeds the {limit // (1024 * 1024)} MB limit"), 413
+
+        now = datetime.utcnow()
+        session = {
+            "_id": uuid.uuid4().hex,
+            "owner": get_jwt_identity(),
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "sha256": (data.get("sha256") or "").lower() or None,
+            "chunk_size": min(max(chunk_size, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE),
+            "received": [],
+            "status": "open",
+            "created_at": now,
+            "expires_at": now + SESSION_LIFETIME
+        }
+
+        # Start empty: the part file grows as chunks are written at their offsets, in any order
+        os.makedirs(SESSIONS_DIR, exist_ok=True)
+        open(_part_path(session["_id"]), "wb").close()
+
+        upload_sessions_collection.insert_one(session)
+        return jsonify(success=True, **_status(session)), 201
+
+    except Exception as e:
+        print(f"Error creating upload session: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+
+@upload_sessions_bp.route("/<upload_id>", methods=["GET"])
+@jwt_required()
+def get_session(upload_id):
+    """Received and missing chunks, so an interrupted upload can resume"""
+    try:
+        session = _find_session(upload_id)
+        if not session:
+            return jsonify(success=False, message="Upload not found"), 404
+        return jsonify(success=True, **_status(session))
+    except Exception as e:
+        print(f"Error fetching upload session: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+
+@upload_sessions_bp.route("/<upload_id>/chunks/<int:index>", methods=["PUT"])
+@jwt_required()
+def upload_chunk(upload_id, index):
+    """Write one chunk (raw request body) at its offset; X-Chunk-Sha256 is verified when sent"""
+    try:
+        session = _find_session(upload_id)
+        if not session or session["status"] != "open":
+            return jsonify(success=False, message="Upload not found"), 404
+
+        total_chunks = _total_chunks(session)
+        if index < 0 or index >= total_chunks:
+            return jsonify(success=False, message="Chunk index out of range"), 400
+
+        offset = index * session["chunk_size"]
+        expected = min(session["chunk_size"], session["size"] - offset)
+        if request.content_length is not None and request.content_length != expected:
+            return jsonify(success=False, message=f"Chunk {index} must be {expected} bytes"), 400
+
+        # Copy the body straight to the part file without buffering the chunk
+        hasher = hashlib.sha256()
+        written = 0
+        with open(_part_path(upload_id), "r+b") as part:
+            part.seek(offset)
+            while True:
+                data = request.stream.read(media_store.CHUNK_SIZE)
+                if not data:
+                    break
+                written += len(data)
+                if written > expected:
+                    return jsonify(success=False, message=f"Chunk {index} must be {expected} bytes"), 400
+                hasher.update(data)
+                part.write(data)
+
+        if written != expected:
+            return jsonify(success=False, message=f"Chunk {index} must be {expected} bytes"), 400
+
+        checksum = request.headers.get("X-Chunk-Sha256")
+        if checksum and checksum.lower() != hasher.hexdigest():
+            return jsonify(success=False, message=f"Checksum mismatch for chunk {index}"), 422
+
+        upload_sessions_collection.update_one({"_id": upload_id}, {"$addToSet": {"received": index}})
+        return jsonify(success=True, index=index, size=written)
+
+    except Exception as e:
+        print(f"Error writing upload chunk: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+
+@upload_sessions_bp.route("/<upload_id>/complete", methods=["POST"])
+@jwt_required()
+def complete_session(upload_id):
+    """Verify the reassembled file and move it into the object store"""
+    try:
+        session = _find_session(upload_id)
+        if not session or session["status"] != "open":
+            return jsonify(success=False, message="Upload not found"), 404
+
+        status = _status(session)
+        if status["missing"]:
+            return jsonify(success=False, message="Upload is incomplete", missing=status["missing"]), 409
+
+        path = _part_path(upload_id)
+        hasher = hashlib.sha256()
+        with open(path, "rb") as part:
+            while True:
+                data = part.read(media_store.CHUNK_SIZE)
+                if not data:
+                    break
+                hasher.update(data)
+        digest = hasher.hexdigest()
+
+        if session.get("sha256") and session["sha256"] != digest:
+            os.remove(path)
+            upload_sessions_collection.delete_one({"_id": upload_id})
+            return jsonify(success=False, message="Checksum mismatch, upload discarded"), 422
+
+        # Not referenced until a form claims it, so unclaimed files are garbage collected
+        stored = media_store.store_path(path, digest, session["size"], session["filename"], session["content_type"], reference=False)
+        stored.pop("path")
+        upload_sessions_collection.update_one(
+            {"_id": upload_id},
+            {"$set": {"status": "complete", "object": stored, "completed_at": datetime.utcnow()}}
+        )
+
+        return jsonify(success=True, upload_id=upload_id, file=stored)
+
+    except Exception as e:
+        print(f"Error completing upload: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+
+@upload_sessions_bp.route("/direct", methods=["POST"])
+@jwt_required()
+def create_direct_session():
+    """Presigned PUT straight to the object store: {filename, size, sha256, content_type?}
+
+    The client PUTs to a staging key of its own session and the store checks
+    the bytes against the SHA-256; confirm then moves them to the object key.
+    Only a file the caller itself uploaded before skips the upload. With the
+    local backend the response points at the chunk endpoint instead (one
+    chunk, JWT required, hashed on complete).
+    """
+    try:
+        data = request.get_json() or {}
+        filename = data.get("filename")
+        content_type = data.get("content_type")
+        sha256 = (data.get("sha256") or "").lower()
+        try:
+            size = int(data.get("size"))
+        except (TypeError, ValueError):
+            return jsonify(success=False, message="size must be an integer"), 400
+
+        if not filename or size <= 0 or not SHA256_HEX.match(sha256):
+            return jsonify(success=False, message="filename, size and a hex sha256 are required"), 400
+
+        limit = media_store.size_limit(filename, content_type)
+        if size > limit:
+            return jsonify(success=False, message=f"{filename} exceeds the {limit // (1024 * 1024)} MB limit"), 413
+
+        name = media_store.object_name(sha256, filename, content_type)
+        key = storage.key_for_path(media_store.object_path(name))
+        backend = storage.get_storage()
+        now = datetime.utcnow()
+        session_id = uuid.uuid4().hex
+        session = {
+            "_id": session_id,
+            "owner": get_jwt_identity(),
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "sha256": sha256,
+            "chunk_size": size,
+            "received": [],
+            "status": "open",
+            "mode": "direct" if backend.supports_presign else "chunked",
+            "key": key,
+            "staging_key": storage.key_for_path(_part_path(session_id)),
+            "created_at": now,
+            "expires_at": now + SESSION_LIFETIME
+        }
+
+        # The caller uploaded these bytes before: nothing to upload, the session is ready to claim.
+        # Someone else's object is never handed out for a hash the client merely declared.
+        previous = upload_sessions_collection.find_one(
+            {"owner": session["owner"], "object.name": name, "status": {"$in": ["complete", "claimed"]}},
+            {"_id": 1}
+        )
+        if previous and media_collection.find_one({"_id": name}, {"_id": 1}) and backend.exists(key):
+            session.update(status="complete", object={
+                "name": name,
+                "url": media_store.media_url(name),
+                "sha256": sha256,
+                "size": size,
+                "content_type": content_type,
+                "filename": filename
+            })
+            upload_sessions_collection.insert_one(session)
+            return jsonify(success=True, upload_id=session["_id"], upload_required=False, file=session["object"]), 201
+
+        if backend.supports_presign:
+            checksum = base64.b64encode(bytes.fromhex(sha256)).decode("ascii")
+            upload = backend.presign_put(session["staging_key"], content_type, checksum)
+        else:
+            os.makedirs(SESSIONS_DIR, exist_ok=True)
+            open(_part_path(session["_id"]), "wb").close()
+            upload = {
+                "method": "PUT",
+                "url": f"{request.host_url.rstrip('/')}/upload-sessions/{session['_id']}/chunks/0",
+                "headers": {},
+                "requires_auth": True
+            }
+
+        upload_sessions_collection.insert_one(session)
+        return jsonify(success=True, upload_id=session["_id"], upload_required=True, upload=upload), 201
+
+    except Exception as e:
+        print(f"Error creating direct upload: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+
+@upload_sessions_bp.route("/<upload_id>/confirm", methods=["POST"])
+@jwt_required()
+def confirm_direct_session(upload_id):
+    """Record a presigned upload once the object store has it"""
+    try:
+        session = _find_session(upload_id)
+        if not session:
+            return jsonify(success=False, message="Upload not found"), 404
+        if session["status"] == "complete":
+            return jsonify(success=True, upload_id=upload_id, file=session["object"])
+        if session.get("mode") == "chunked":
+            return complete_session(upload_id)
+        if session["status"] != "open":
+            return jsonify(success=False, message="Upload not found"), 404
+
+        # The store already verified the SHA-256 sent with the presigned PUT to this session's staging key
+        backend = storage.get_storage()
+        head = backend.head(session["staging_key"])
+        if not head:
+            return jsonify(success=False, message="Object has not been uploaded yet"), 409
+        if head["size"] != session["size"]:
+            backend.delete(session["staging_key"])
+            upload_sessions_collection.delete_one({"_id": upload_id})
+            return jsonify(success=False, message="Uploaded size does not match, upload discarded"), 422
+
+        if backend.exists(session["key"]):
+            backend.delete(session["staging_key"])
+        else:
+            backend.move(session["staging_key"], session["key"])
+
+        name = session["key"].rsplit("/", 1)[-1]
+        media_store.add_reference(name, size=session["size"], content_type=session["content_type"],
+                                  filename=session["filename"], count=0)
+        stored = {
+            "name": name,
+            "url": media_store.media_url(name),
+            "sha256": session["sha256"],
+            "size": session["size"],
+            "content_type": session["content_type"],
+            "filename": session["filename"]
+        }
+        upload_sessions_collection.update_one(
+            {"_id": upload_id},
+            {"$set": {"status": "complete", "object": stored, "completed_at": datetime.utcnow()}}
+        )
+
+        return jsonify(success=True, upload_id=upload_id, file=stored)
+
+    except Exception as e:
+        print(f"Error confirming upload: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
+
+
+@upload_sessions_bp.route("/<upload_id>", methods=["DELETE"])
+@jwt_required()
+def abort_session(upload_id):
+    """Abandon an open upload and remove its part file"""
+    try:
+        session = _find_session(upload_id)
+        if not session:
+            return jsonify(success=False, message="Upload not found"), 404
+        if os.path.exists(_part_path(upload_id)):
+            os.remove(_part_path(upload_id))
+        if session.get("mode") == "direct" and session["status"] == "open":
+            storage.get_storage().delete(session["staging_key"])
+        upload_sessions_collection.delete_one({"_id": upload_id})
+        return jsonify(success=True)
+    except Exception as e:
+        print(f"Error aborting upload: {str(e)}")
+        return jsonify(success=False, message=str(e)), 500
@@ -2,9 +2,9 @@ import os
 from flask import Blueprint, request, jsonify
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
 from bson import ObjectId
 from app import users_collection, bcrypt, product_collection
+from app.utils import autocomplete, counters, image_pipeline, media_store
 
 user_bp = Blueprint('user_service', __name__)  # Changed the name to 'user_service'
 
@@ -29,9 +29,9 @@ def register():
     if "profile_photo" in request.files:
         file = request.files["profile_photo"]
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
-            file.save(filepath)
+            stored = media_store.store(file)
+            filename = stored["name"]
+            filepath = stored["path"]
         else:
             return jsonify(success=False, message="Invalid file type"), 400
     else:
@@ -39,6 +39,7 @@ def register():
 
     # Check if the user already exists
     if users_collection.find_one({"email": email}):
+        media_store.release(filename)
         return jsonify(success=False, message="Email already registered"), 400
 
     # Hash the password before storing it
@@ -58,6 +59,11 @@ def register():
     }
     
     users_collection.insert_one(user_data)
+    counters.record("users")
+    autocomplete.index_entity("user", user_data)
+    if filename:
+        image_pipeline.schedule(os.path.join(UPLOAD_FOLDER, filename), users_collection,
+                                {"_id": user_data["_id"]}, "profile_photo_variants")
 
     # Create token
     access_token = create_access_token(identity=email)
@@ -184,9 +190,11 @@ def update_user():
         if "profile_photo" in request.files:
             file = request.files["profile_photo"]
             if file and file.filename and allowed_file(file.filename):
-                # Delete old profile photo if exists
+                # Release the old profile photo; legacy files are deleted directly
                 old_photo = user.get('profile_photo')
-                if old_photo:
+                if old_photo and media_store.is_object_name(old_photo):
+                    media_store.release(old_photo)
+                elif old_photo:
                     old_photo_path = os.path.join(UPLOAD_FOLDER, old_photo)
                     if os.path.exists(old_photo_path):
                         try:
@@ -194,11 +202,11 @@ def update_user():
                         except Exception as e:
                             print(f"Error deleting old profile photo: {e}")
 
-                # Save new profile photo
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(filepath)
-                update_data['profile_photo'] = filename
+                # Save new profile photo in the content-addressed store
+                stored = media_store.store(file)
+                filepath = stored["path"]
+                update_data['profile_photo'] = stored["name"]
+                update_data['profile_photo_variants'] = None
 
         if not update_data:
             return jsonify(success=False, message="No data to update"), 400
@@ -210,6 +218,10 @@ def update_user():
         )
 
         if result.modified_count > 0:
+            autocomplete.refresh_entity("user", {"email": user_email})
+            if update_data.get('profile_photo'):
+                image_pipeline.schedule(filepath, users_collection, {"email": user_email},
+                                        "profile_photo_variants")
             return jsonify(success=True, message="Profile updated successfully")
         else:
             return jsonify(success=True, message="No changes made")
@@ -0,0 +1,192 @@
+"""Paginated, filtered list queries for the admin dashboard.
+
+An ``AdminList`` describes one admin listing: the projection of each view,
+the filters and sort orders it accepts and the fields ``?q=`` searches.
+``page()`` turns the request arguments into a single Mongo query:
+
+    ?limit=50&cursor=<next_cursor>&sort=newest&status=pending&q=ann&view=list
+
+Pages are keyset-paginated: ``next_cursor`` encodes the sort value and
+``_id`` of the last row, so page N costs the same as page 1 (no
+``skip``) and rows inserted meanwhile do not shift later pages. Every
+sort order ends on ``_id`` so the order is total.
+
+``total`` is only computed for the first page. An unfiltered listing
+uses ``estimated_document_count`` (collection metadata, no scan);
+filtered counts and other aggregates go through ``cached()`` and are
+recomputed at most every ``COUNT_TTL`` seconds.
+"""
+import base64
+import re
+import threading
+import time
+from datetime import datetime
+
+from bson import ObjectId, json_util
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+COUNT_TTL = 60  # seconds
+# Expired entries are dropped once the cache holds this many
+CACHE_PRUNE_AT = 1000
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def cached(key, compute, ttl=COUNT_TTL):
+    """``compute()`` memoized under ``key`` for ``ttl`` seconds"""
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+    value = compute()
+    with _cache_lock:
+        if len(_cache) >= CACHE_PRUNE_AT:
+            for stale in [k for k, (expires, _) in _cache.items() if expires <= now]:
+                del _cache[stale]
+        _cache[key] = (now + ttl, value)
+    return value
+
+
+def choice(field, values):
+    """Filter on ``field`` equal to one of ``values``"""
+    def build(value):
+        if value not in values:
+            raise ValueError(f"{field} must be one of {', '.join(values)}")
+        return {field: value}
+    return build
+
+
+def equals(field, convert=str):
+    """Filter on ``field`` equal to the (converted) argument"""
+    return lambda value: {field: convert(value)}
+
+
+class AdminList:
+    """One admin listing; ``views`` maps a view name to its projection, the first is the default"""
+
+    def __init__(self, name, collection, views, sorts, filters=None, search=()):
+        self.name = name
+        self.collection = collection
+        self.views = views
+        self.sorts = sorts
+        self.filters = filters or {}
+        self.search = search
+
+    def query(self, args, base=None):
+        """Mongo filter for the request's filter and ``q`` arguments; raises ValueError"""
+        clauses = [base] if base else []
+        for param, build in self.filters.items():
+            if args.get(param):
+                clauses.append(build(args.get(param)))
+
+        text = (args.get("q") or "").strip()
+        if text and self.search:
+            pattern = re.compile(re.escape(text), re.IGNORECASE)
+            clauses.append({"$or": [{field: pattern} for field in self.search]})
+
+        if not clauses:
+            return {}
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def page(self, args, base=None):
+        """``{"items", "next_cursor", "total", "limit"}`` for the request arguments; raises ValueError"""
+        try:
+            limit = min(max(int(args.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            raise ValueError("limit must be a number")
+
+        sort_name = args.get("sort") or next(iter(self.sorts))
+        if sort_name not in self.sorts:
+            raise ValueError(f"Invalid sort. Must be one of: {', '.join(self.sorts)}")
+        field, direction = self.sorts[sort_name]
+
+        view = args.get("view") or next(iter(self.views))
+        if view not in self.views:
+            raise ValueError(f"Invalid view. Must be one of: {', '.join(self.views)}")
+        projection = dict(self.views[view])
+        # The cursor needs the sort field; an exclusion view already returns it
+        # and MongoDB rejects a projection mixing inclusion and exclusion
+        if _is_inclusion(projection):
+            projection[field] = 1
+
+        query = self.query(args, base)
+        filtered = query
+        if args.get("cursor"):
+            after = _after(field, direction, *_decode(args.get("cursor"), sort_name))
+            query = {"$and": [query, after]} if query else after
+
+        order = [(field, direction)] if field == "_id" else [(field, direction), ("_id", direction)]
+        items = list(self.collection.find(query, projection).sort(order).limit(limit + 1))
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = _encode(sort_name, last.get(field) if field != "_id" else None, last["_id"])
+
+        total = None
+        if not args.get("cursor"):
+            total = self.count(filtered)
+        return {"items": items, "next_cursor": next_cursor, "total": total, "limit": limit}
+
+    def count(self, query):
+        if not query:
+            return self.collection.estimated_document_count()
+        key = ("count", self.name, json_util.dumps(query, sort_keys=True, default=str))
+        return cached(key, lambda: self.collection.count_documents(query))
+
+
+def _is_inclusion(projection):
+    """True unless every field but ``_id`` is excluded (``{}`` returns everything)"""
+    return any(value not in (0, False) for key, value in projection.items() if key != "_id")
+
+
+def _encode(sort_name, value, last_id):
+    payload = json_util.dumps([sort_name, value, last_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor, sort_name):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        name, value, last_id = json_util.loads(base64.urlsafe_b64decode(padded).decode("utf-8"))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if name != sort_name:
+        raise ValueError("cursor belongs to a different sort order")
+    return value, last_id
+
+
+def _after(field, direction, value, last_id):
+    """Rows after (``value``, ``last_id``) in (``field``, ``_id``) order.
+
+    Missing values sort first ascending and last descending, and Mongo's
+    ``$gt``/``$lt`` never match null, so they get their own branches.
+    """
+    beyond = "$gt" if direction == 1 else "$lt"
+    if field == "_id":
+        return {"_id": {beyond: last_id}}
+    if value is None:
+        same = {field: None, "_id": {beyond: last_id}}
+        return {"$or": [same, {field: {"$ne": None}}]} if direction == 1 else same
+
+    branches = [{field: {beyond: value}}, {field: value, "_id": {beyond: last_id}}]
+    if direction == -1:
+        branches.append({field: None})
+    return {"$or": branches}
+
+
+def serialize(value):
+    """ObjectIds and datetimes of a listing row as JSON-friendly strings"""
+    if isinstance(value, dict):
+        return {key: serialize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [serialize(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
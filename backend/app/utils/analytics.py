@@ -0,0 +1,285 @@
+"""Daily platform analytics materialized into ``analytics_daily``.
+
+One document per day, keyed by the day's midnight::
+
+    {"_id": datetime(2026, 10, 19), "orders": 42, "gmv": 3120.5,
+     "new_users": 17, "new_auctions": 3, "active_auctions": 25, "updated_at": ...}
+
+Each ``SOURCES`` entry is an aggregation over one transactional
+collection that groups by day and ends in ``$merge`` with
+``whenMatched: "merge"``, so it only rewrites its own fields of the days it
+covers. ``rollup()`` runs every source from its high-water mark (kept in
+``job_state``) to now. It starts from the midnight of the mark's day, less
+``LATE_MARGIN``, so the partial day and writes that landed just after the
+previous run are recounted in full. Recounting whole days makes a run
+idempotent. A source without a mark starts from its oldest document, so
+the first run backfills; after that only the recent slice of each
+collection is read, through its ``created_at`` (or ``_id``) index.
+
+``active_auctions`` is a gauge: the number of approved auctions open
+(``created_at`` to ``last_date``) at the end of the day. Charts read the
+buckets through ``series()`` and never touch the raw collections.
+
+Rebuild the history from the ``backend`` directory::
+
+    python -m app.utils.analytics backfill [--since 2024-01-01]
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+ROLLUP_INTERVAL = 900  # seconds
+LATE_MARGIN = timedelta(minutes=10)
+METRICS = ("orders", "gmv", "new_users", "new_auctions", "active_auctions")
+# Summed when buckets are grouped by week or month; the gauge keeps its peak
+GAUGES = ("active_auctions",)
+INTERVALS = ("day", "week", "month")
+MAX_DAYS = 731
+STATE_ID = "analytics-rollup"
+TARGET = "analytics_daily"
+
+
+def order_amount():
+    """total_amount, or the sum of the item prices for orders stored without one"""
+    def to_double(value, default):
+        return {"$convert": {"input": value, "to": "double", "onError": default, "onNull": default}}
+    items_total = {"$sum": {"$map": {"input": {"$ifNull": ["$items", []]}, "in": to_double("$$this.price", 0)}}}
+    return {"$ifNull": [to_double("$total_amount", None), items_total]}
+
+
+def _day(expression):
+    return {"$dateTrunc": {"date": expression, "unit": "day"}}
+
+
+def _merge(fields):
+    now = datetime.utcnow()
+    return [
+        {"$set": {"updated_at": now, **{field: {"$ifNull": [f"${field}", 0]} for field in fields}}},
+        {"$merge": {"into": TARGET, "on": "_id", "whenMatched": "merge", "whenNotMatched": "insert"}}
+    ]
+
+
+def orders_pipeline(start, end):
+    """Orders and gross merchandise value per day; cancelled orders are left out of both"""
+    return [
+        {"$match": {"created_at": {"$gte": start, "$lt": end}, "status": {"$ne": "cancelled"}}},
+        {"$group": {"_id": _day("$created_at"), "orders": {"$sum": 1}, "gmv": {"$sum": order_amount()}}},
+        {"$set": {"gmv": {"$round": ["$gmv", 2]}}}
+    ] + _merge(["orders", "gmv"])
+
+
+def users_pipeline(start, end):
+    """Sign-ups per day by ObjectId time (not every sign-up path stores created_at)"""
+    return [
+        {"$match": {"_id": {"$gte": ObjectId.from_datetime(start), "$lt": ObjectId.from_datetime(end)}}},
+        {"$group": {"_id": _day({"$toDate": "$_id"}), "new_users": {"$sum": 1}}}
+    ] + _merge(["new_users"])
+
+
+def auctions_pipeline(start, end):
+    """Auction requests per day and approved auctions open at the end of each day"""
+    open_days = {"$range": [
+        0, {"$add": [{"$dateDiff": {"startDate": "$from", "endDate": "$to", "unit": "day"}}, 1]}
+    ]}
+    return [
+        {"$match": {"created_at": {"$lt": end}, "$or": [
+            {"created_at": {"$gte": start}},
+            {"status": "approved", "last_date": {"$gte": start}}
+        ]}},
+        {"$facet": {
+            "created": [
+                {"$match": {"created_at": {"$gte": start}}},
+                {"$group": {"_id": _day("$created_at"), "new_auctions": {"$sum": 1}}}
+            ],
+            "open": [
+                {"$match": {"status": "approved", "last_date": {"$gte": start}}},
+                # Open at the end of day D: created before D + 1 and closing after it
+                {"$project": {
+                    "from": {"$max": [_day("$created_at"), start]},
+                    "to": {"$min": [
+                        {"$dateSubtract": {"startDate": _day({"$dateSubtract": {
+                            "startDate": "$last_date", "unit": "millisecond", "amount": 1
+                        }}), "unit": "day", "amount": 1}},
+                        {"$dateSubtract": {"startDate": end, "unit": "day", "amount": 1}}
+                    ]}
+                }},
+                {"$project": {"day": {"$map": {
+                    "input": open_days,
+                    "in": {"$dateAdd": {"startDate": "$from", "unit": "day", "amount": "$$this"}}
+                }}}},
+                {"$unwind": "$day"},
+                {"$group": {"_id": "$day", "active_auctions": {"$sum": 1}}}
+            ]
+        }},
+        {"$project": {"day": {"$concatArrays": ["$created", "$open"]}}},
+        {"$unwind": "$day"},
+        {"$replaceWith": "$day"},
+        {"$group": {
+            "_id": "$_id",
+            "new_auctions": {"$sum": "$new_auctions"},
+            "active_auctions": {"$sum": "$active_auctions"}
+        }}
+    ] + _merge(["new_auctions", "active_auctions"])
+
+
+# Source name -> (collection, pipeline(start, end))
+SOURCES = {
+    "orders": ("orders", orders_pipeline),
+    "users": ("users", users_pipeline),
+    "auctions": ("bids", auctions_pipeline)
+}
+
+
+def _db():
+    from app import db
+    return db
+
+
+def _midnight(value):
+    return datetime(value.year, value.month, value.day)
+
+
+def _earliest(db, collection):
+    """Oldest day with data in ``collection``, or None"""
+    field = "_id" if collection == "users" else "created_at"
+    first = db[collection].find_one({field: {"$ne": None}}, {field: 1}, sort=[(field, 1)])
+    if not first:
+        return None
+    value = first[field]
+    return _midnight(value.generation_time.replace(tzinfo=None) if isinstance(value, ObjectId) else value)
+
+
+def run_source(name, start, end=None):
+    """Recount source ``name`` for the whole days from ``start`` to ``end`` (default: through today)"""
+    db = _db()
+    collection, pipeline = SOURCES[name]
+    start = _midnight(start)
+    end = end or _midnight(datetime.utcnow()) + timedelta(days=1)
+    db[collection].aggregate(pipeline(start, end))
+    return start, end
+
+
+def rollup(names=None, since=None):
+    """Bring the daily buckets up to date from each source's high-water mark (or ``since``)"""
+    db = _db()
+    now = datetime.utcnow()
+    state = db["job_state"].find_one({"_id": STATE_ID}) or {}
+    done = {}
+    for name in names or SOURCES:
+        mark = since
+        if mark is None:
+            previous = state.get("marks", {}).get(name)
+            mark = previous - LATE_MARGIN if previous else _earliest(db, SOURCES[name][0])
+        if mark is None:
+            # Nothing to count yet
+            continue
+        done[name] = run_source(name, mark)
+        # Only advance the mark once the source's days are merged
+        db["job_state"].update_one(
+            {"_id": STATE_ID},
+            {"$set": {f"marks.{name}": now, "updated_at": now}},
+            upsert=True
+        )
+    return done
+
+
+def _claim_rollup(db, now):
+    """True for the one process whose turn it is to roll up"""
+    try:
+        db["job_state"].find_one_and_update(
+            {"_id": f"{STATE_ID}-lease", "next_at": {"$lte": now}},
+            {"$set": {"next_at": now + timedelta(seconds=ROLLUP_INTERVAL)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+def scheduled_rollup():
+    if _claim_rollup(_db(), datetime.utcnow()):
+        rollup()
+
+
+def series(start, end, metrics=METRICS, interval="day"):
+    """Buckets from ``start`` to ``end`` (inclusive days) as ``[{"date", <metric>...}]``, zero-filled"""
+    start, end = _midnight(start), _midnight(end) + timedelta(days=1)
+    query = {"_id": {"$gte": start, "$lt": end}}
+    if interval == "day":
+        rows = {doc["_id"]: doc for doc in _db()[TARGET].find(query, dict.fromkeys(metrics, 1))}
+    else:
+        trunc = {"date": "$_id", "unit": interval}
+        if interval == "week":
+            trunc["startOfWeek"] = "monday"
+        rows = {doc["_id"]: doc for doc in _db()[TARGET].aggregate([
+            {"$match": query},
+            {"$group": {"_id": {"$dateTrunc": trunc}, **{
+                metric: {"$max" if metric in GAUGES else "$sum": f"${metric}"} for metric in metrics
+            }}}
+        ])}
+    return [{"date": bucket.strftime("%Y-%m-%d"), **{
+        metric: rows.get(bucket, {}).get(metric) or 0 for metric in metrics
+    }} for bucket in _buckets(start, end, interval)]
+
+
+def _buckets(start, end, interval):
+    """Bucket starts covering [start, end); a week or month bucket may begin before ``start``"""
+    if interval == "week":
+        bucket = start - timedelta(days=start.weekday())
+    elif interval == "month":
+        bucket = start.replace(day=1)
+    else:
+        bucket = start
+    buckets = []
+    while bucket < end:
+        buckets.append(bucket)
+        if interval == "month":
+            bucket = bucket.replace(year=bucket.year + bucket.month // 12, month=bucket.month % 12 + 1)
+        else:
+            bucket += timedelta(days=7 if interval == "week" else 1)
+    return buckets
+
+
+def rolled_up_to():
+    """Oldest high-water mark over the sources, i.e. how fresh every bucket is"""
+    marks = (_db()["job_state"].find_one({"_id": STATE_ID}, {"marks": 1}) or {}).get("marks", {})
+    return min(marks.values()) if len(marks) == len(SOURCES) else None
+
+
+def init_app(app):
+    """Start the periodic rollup"""
+    from app.utils.scheduler import start_periodic
+
+    start_periodic("analytics-rollup", ROLLUP_INTERVAL, scheduled_rollup)
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError("dates are YYYY-MM-DD")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roll up the daily platform analytics")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rollup", help="catch up from the high-water marks")
+    backfill = commands.add_parser("backfill", help="recount the history (default: from the oldest data)")
+    backfill.add_argument("--since", type=_date, help="first day to recount, YYYY-MM-DD")
+    for command in commands.choices.values():
+        command.add_argument("--source", action="append", choices=list(SOURCES), help="only this source (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill" and args.since is None:
+        # Without a mark rollup() starts from each source's oldest document
+        _db()["job_state"].update_one({"_id": STATE_ID}, {"$unset": {
+            f"marks.{name}": "" for name in args.source or SOURCES
+        }})
+    for name, (start, end) in rollup(args.source, getattr(args, "since", None)).items():
+        print(f"{name}: {start:%Y-%m-%d} to {end - timedelta(days=1):%Y-%m-%d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""In-memory prefix index for typeahead over catalog and people names.
+
+Each entity type gets its own sorted array of ``(term, entity_id)`` pairs,
+where the terms are the normalized full name plus every word suffix of it
+("blue clay vase" is found by "blu", "clay v" and "vase"). A prefix lookup is
+two binary searches into that array, so queries stay well under a
+millisecond even with 100k entities. Ranked results for one and two character
+prefixes, whose ranges can cover a large part of the array, are memoized:
+inserts are merged into them and deletes drop them.
+
+The indexes are built once at startup, kept current by the write paths
+through ``index_entity``/``remove_entity``, and fully rebuilt periodically to
+pick up writes made by other worker processes.
+"""
+import bisect
+import heapq
+import threading
+import unicodedata
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+REBUILD_INTERVAL = 600  # seconds
+
+# Prefixes up to this length get their ranked results memoized
+CACHED_PREFIX_LENGTH = 2
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.lower().split())
+
+
+def _terms(label):
+    """Every word suffix of the normalized label"""
+    words = normalize(label).split(" ")
+    return {" ".join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+class PrefixIndex:
+    """Sorted-array prefix index for a single entity type"""
+
+    def __init__(self):
+        self._keys = []      # sorted list of (term, entity_id)
+        self._entries = {}   # entity_id -> entry dict
+        self._top_cache = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entity_id, label, weight=0, extra=None):
+        """Insert or replace an entity"""
+        entity_id = str(entity_id)
+        with self._lock:
+            self._discard(entity_id)
+            terms = _terms(label)
+            if not terms:
+                return
+            self._entries[entity_id] = {
+                "id": entity_id,
+                "label": label,
+                "normalized": normalize(label),
+                "weight": weight or 0,
+                "extra": extra or {},
+                "terms": terms
+            }
+            for term in terms:
+                bisect.insort(self._keys, (term, entity_id))
+            self._merge_into_cache(self._entries[entity_id])
+
+    def remove(self, entity_id):
+        with self._lock:
+            self._discard(str(entity_id))
+
+    def _discard(self, entity_id):
+        entry = self._entries.pop(entity_id, None)
+        if not entry:
+            return
+        for term in entry["terms"]:
+            position = bisect.bisect_left(self._keys, (term, entity_id))
+            if position < len(self._keys) and self._keys[position] == (term, entity_id):
+                del self._keys[position]
+        self._invalidate(entry["terms"])
+
+    def _invalidate(self, terms):
+        if not self._top_cache:
+            return
+        for term in terms:
+            for length in range(1, CACHED_PREFIX_LENGTH + 1):
+                self._top_cache.pop(term[:length], None)
+
+    def _merge_into_cache(self, entry):
+        """Slot a new entry into memoized short-prefix results instead of dropping them"""
+        prefixes = {term[:length] for term in entry["terms"] for length in range(1, CACHED_PREFIX_LENGTH + 1)}
+        for prefix in prefixes:
+            cached = self._top_cache.get(prefix)
+            if cached is None:
+                continue
+            ranked, complete = cached
+            ranked = ranked + [(_rank(entry, prefix), entry)]
+            ranked.sort(key=lambda item: item[0], reverse=True)
+            if len(ranked) > MAX_LIMIT:
+                ranked, complete = ranked[:MAX_LIMIT], False
+            self._top_cache[prefix] = (ranked, complete)
+
+    def bulk_load(self, items):
+        """Replace the whole index from ``(entity_id, label, weight, extra)`` tuples"""
+        entries = {}
+        keys = []
+        for entity_id, label, weight, extra in items:
+            terms = _terms(label)
+            if not terms:
+                continue
+            entity_id = str(entity_id)
+            entries[entity_id] = {
+                "id": entity_id,
+                "label": label,
+                "normalized": normalize(label),
+                "weight": weight or 0,
+                "extra": extra or {},
+                "terms": terms
+            }
+            keys.extend((term, entity_id) for term in terms)
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._entries = entries
+            self._top_cache = {}
+        self.warm()
+
+    def warm(self):
+        """Precompute results for every single-character prefix"""
+        first_chars = {term[0] for term, _ in self._keys}
+        for char in first_chars:
+            self.search(char, MAX_LIMIT)
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        """Return up to ``limit`` entries whose name has a word starting with ``prefix``"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            cacheable = len(prefix) <= CACHED_PREFIX_LENGTH
+            if cacheable and prefix in self._top_cache:
+                ranked, complete = self._top_cache[prefix]
+                if len(ranked) >= limit or complete:
+                    return [entry for _, entry in ranked[:limit]]
+
+            start = bisect.bisect_left(self._keys, (prefix,))
+            matches = {}
+            for index in range(start, len(self._keys)):
+                term, entity_id = self._keys[index]
+                if not term.startswith(prefix):
+                    break
+                if entity_id not in matches:
+                    entry = self._entries[entity_id]
+                    matches[entity_id] = (_rank(entry, prefix), entry)
+
+            size = max(limit, MAX_LIMIT) if cacheable else limit
+            ranked = heapq.nlargest(size, matches.values(), key=lambda item: item[0])
+
+            if cacheable:
+                self._top_cache[prefix] = (ranked, len(ranked) == len(matches))
+            return [entry for _, entry in ranked[:limit]]
+
+
+def _rank(entry, prefix):
+    """Sort key: names starting with the prefix, then weight, then shorter names"""
+    return (
+        entry["normalized"].startswith(prefix),
+        entry["weight"],
+        -len(entry["normalized"]),
+        entry["id"]
+    )
+
+
+# ---------------------------------------------------------------------------
+# Entity loaders: how each type is labelled, weighted and which extra fields
+# the dropdowns need. Used both for the startup build and the write paths.
+# People entries carry no email: any logged in user can search them.
+# ---------------------------------------------------------------------------
+
+def _catalog_entry(doc):
+    return (
+        doc["_id"],
+        doc.get("name"),
+        doc.get("review_count", 0),
+        {"price": doc.get("price"), "image": doc.get("image"), "category": doc.get("category")}
+    )
+
+
+def _event_entry(doc):
+    return (
+        doc["_id"],
+        doc.get("name"),
+        doc.get("registered_count", 0),
+        {"date": doc.get("date"), "type": doc.get("type"), "poster": doc.get("poster")}
+    )
+
+
+def _seller_entry(doc):
+    full_name = f"{doc.get('firstName', '')} {doc.get('lastName', '')}".strip()
+    return (
+        doc["_id"],
+        doc.get("shopName") or full_name,
+        0,
+        {"name": full_name, "shopName": doc.get("shopName", "")}
+    )
+
+
+def _instructor_entry(doc):
+    full_name = f"{doc.get('first_name', '')} {doc.get('last_name', '')}".strip()
+    return (
+        doc["_id"],
+        full_name,
+        0,
+        {"expertise": doc.get("art_specialization", "")}
+    )
+
+
+def _user_entry(doc):
+    full_name = f"{doc.get('first_name', '')} {doc.get('last_name', '')}".strip()
+    return (
+        doc["_id"],
+        full_name,
+        0,
+        {}
+    )
+
+
+_CATALOG_FIELDS = {"name": 1, "review_count": 1, "price": 1, "image": 1, "category": 1}
+
+# type -> (collection attribute in app, projection, entry builder, requires login)
+ENTITY_TYPES = {
+    "product": ("product_collection", _CATALOG_FIELDS, _catalog_entry, False),
+    "material": ("material_collection", _CATALOG_FIELDS, _catalog_entry, False),
+    "event": ("events_collection", {"name": 1, "registered_count": 1, "date": 1, "type": 1, "poster": 1},
+              _event_entry, False),
+    "seller": ("seller_collection", {"firstName": 1, "lastName": 1, "shopName": 1}, _seller_entry, True),
+    "instructor": ("instructor_collection", {"first_name": 1, "last_name": 1, "art_specialization": 1},
+                   _instructor_entry, True),
+    "user": ("users_collection", {"first_name": 1, "last_name": 1}, _user_entry, True),
+}
+
+_indexes = {entity_type: PrefixIndex() for entity_type in ENTITY_TYPES}
+_ready = threading.Event()
+
+
+def get_index(entity_type):
+    return _indexes[entity_type]
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def rebuild(entity_types=None):
+    """Reload the given (default: all) indexes from MongoDB"""
+    import app
+
+    for entity_type in entity_types or ENTITY_TYPES:
+        collection_name, projection, build_entry, _ = ENTITY_TYPES[entity_type]
+        collection = getattr(app, collection_name)
+        cursor = collection.find({}, projection).batch_size(2000)
+        _indexes[entity_type].bulk_load(build_entry(doc) for doc in cursor)
+        print(f"Autocomplete: indexed {len(_indexes[entity_type])} {entity_type} entries")
+    _ready.set()
+
+
+def index_entity(entity_type, doc):
+    """Add or refresh one document after a write; never fails the request"""
+    try:
+        entity_id, label, weight, extra = ENTITY_TYPES[entity_type][2](doc)
+        _indexes[entity_type].add(entity_id, label, weight, extra)
+    except Exception as e:
+        print(f"Autocomplete: could not index {entity_type}: {e}")
+
+
+def refresh_entity(entity_type, query):
+    """Re-read one document matching ``query`` and index it (for partial updates)"""
+    import app
+
+    try:
+        collection_name, projection, _, _ = ENTITY_TYPES[entity_type]
+        doc = getattr(app, collection_name).find_one(query, projection)
+        if doc:
+            index_entity(entity_type, doc)
+    except Exception as e:
+        print(f"Autocomplete: could not refresh {entity_type}: {e}")
+
+
+def remove_entity(entity_type, entity_id):
+    try:
+        _indexes[entity_type].remove(entity_id)
+    except Exception as e:
+        print(f"Autocomplete: could not remove {entity_type} {entity_id}: {e}")
+
+
+def search(entity_type, prefix, limit=DEFAULT_LIMIT):
+    """Return formatted results for one entity type"""
+    return [
+        {"id": entry["id"], "type": entity_type, "label": entry["label"], **entry["extra"]}
+        for entry in _indexes[entity_type].search(prefix, limit)
+    ]
+
+
+def init_app(app):
+    """Build the indexes in the background and keep rebuilding them periodically"""
+    from app.utils.scheduler import start_periodic
+
+    start_periodic("autocomplete-rebuild", REBUILD_INTERVAL, rebuild)
@@ -0,0 +1,245 @@
+"""Numeric price/quantity normalization for the product and material catalogs.
+
+Older products and materials were stored with ``price`` as the raw form
+string, so every consumer had to call ``float()`` in Python and range
+filters/sorts could not use an index. This module holds the parsers used by
+the write paths, the ``$jsonSchema`` validators for the catalog collections
+and a resumable in-place migration for legacy documents.
+
+Run from the ``backend`` directory:
+
+    python -m app.utils.catalog_schema              # migrate + install validators
+    python -m app.utils.catalog_schema --restart    # ignore the saved checkpoint
+    python -m app.utils.catalog_schema --validators-only
+"""
+import argparse
+import math
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+# Collections holding sellable catalog items
+CATALOG_COLLECTIONS = ("product", "materials")
+
+BATCH_SIZE = 500
+
+# Prices are stored as doubles rather than Decimal128: every consumer already
+# works with floats and jsonify cannot serialize Decimal128.
+CATALOG_SCHEMA = {
+    "bsonType": "object",
+    "required": ["name", "price", "quantity"],
+    "properties": {
+        "name": {"bsonType": "string"},
+        "price": {
+            "bsonType": ["double", "int", "long"],
+            "minimum": 0,
+            "description": "price must be a non-negative number"
+        },
+        "quantity": {
+            "bsonType": ["int", "long"],
+            "description": "quantity must be an integer"
+        }
+    }
+}
+
+
+def parse_price(value):
+    """Convert a form or legacy price value into a float rounded to paise"""
+    if value is None or isinstance(value, bool):
+        raise ValueError("Price is required")
+
+    if isinstance(value, (int, float)):
+        price = float(value)
+    else:
+        cleaned = str(value).strip().replace(",", "").lstrip("₹").strip()
+        price = float(cleaned)
+
+    if math.isnan(price) or math.isinf(price) or price < 0:
+        raise ValueError("Price must be a non-negative number")
+
+    return round(price, 2)
+
+
+def parse_quantity(value):
+    """Convert a form or legacy quantity value into an int"""
+    if value is None or isinstance(value, bool):
+        raise ValueError("Quantity is required")
+
+    if isinstance(value, int):
+        return value
+
+    quantity = float(str(value).strip())
+    if math.isnan(quantity) or math.isinf(quantity) or quantity != int(quantity):
+        raise ValueError("Quantity must be a whole number")
+
+    return int(quantity)
+
+
+# Sort orders accepted by the catalog list endpoints
+CATALOG_SORTS = {
+    "price_asc": [("price", 1)],
+    "price_desc": [("price", -1)],
+    "newest": [("_id", -1)]
+}
+
+
+def catalog_filters(args):
+    """Build the Mongo query and sort for ``?category=&min_price=&max_price=&sort=``.
+
+    Raises ValueError for malformed numbers or an unknown sort order.
+    """
+    query = {}
+    if args.get("category"):
+        query["category"] = args.get("category")
+
+    price_range = {}
+    if args.get("min_price"):
+        price_range["$gte"] = parse_price(args.get("min_price"))
+    if args.get("max_price"):
+        price_range["$lte"] = parse_price(args.get("max_price"))
+    if price_range:
+        query["price"] = price_range
+
+    sort = None
+    if args.get("sort"):
+        if args.get("sort") not in CATALOG_SORTS:
+            raise ValueError(f"Invalid sort. Must be one of: {', '.join(CATALOG_SORTS)}")
+        sort = CATALOG_SORTS[args.get("sort")]
+
+    return query, sort
+
+
+def apply_validators(db, validation_level="moderate"):
+    """Install the catalog $jsonSchema validator on every catalog collection.
+
+    ``moderate`` validation only applies to inserts and to updates of
+    documents that already pass, so legacy documents keep working until the
+    migration has rewritten them.
+    """
+    for name in CATALOG_COLLECTIONS:
+        try:
+            db.command(
+                "collMod",
+                name,
+                validator={"$jsonSchema": CATALOG_SCHEMA},
+                validationLevel=validation_level,
+                validationAction="error"
+            )
+        except OperationFailure as e:
+            # NamespaceNotFound: the collection has not been created yet
+            if e.code != 26:
+                raise
+            db.create_collection(
+                name,
+                validator={"$jsonSchema": CATALOG_SCHEMA},
+                validationLevel=validation_level,
+                validationAction="error"
+            )
+        print(f"Installed $jsonSchema validator on '{name}' ({validation_level})")
+
+
+def _normalized_fields(doc):
+    """Return the $set payload for a document, or None if nothing changes"""
+    update = {}
+
+    price = doc.get("price")
+    if not isinstance(price, float) or isinstance(price, bool):
+        update["price"] = parse_price(price)
+
+    quantity = doc.get("quantity", 0)
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        update["quantity"] = parse_quantity(quantity)
+
+    return update or None
+
+
+def normalize_collection(collection, state_collection, batch_size=BATCH_SIZE, restart=False):
+    """Rewrite price/quantity of every document in ``collection`` in batches.
+
+    Progress is checkpointed by ``_id`` in ``state_collection`` after every
+    batch, so an interrupted run resumes where it stopped.
+    """
+    state_id = f"catalog_numeric:{collection.name}"
+    state = {} if restart else (state_collection.find_one({"_id": state_id}) or {})
+
+    last_id = state.get("last_id")
+    converted = state.get("converted", 0) if not restart else 0
+    invalid = state.get("invalid", []) if not restart else []
+
+    if state.get("completed") and not restart:
+        print(f"'{collection.name}' already normalized, use --restart to run again")
+        return converted, invalid
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = list(
+            collection.find(query, {"price": 1, "quantity": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+        )
+        if not batch:
+            break
+
+        operations = []
+        for doc in batch:
+            try:
+                update = _normalized_fields(doc)
+            except (TypeError, ValueError) as e:
+                invalid.append({"_id": doc["_id"], "price": doc.get("price"),
+                                "quantity": doc.get("quantity"), "error": str(e)})
+                continue
+            if update:
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+
+        if operations:
+            result = collection.bulk_write(operations, ordered=False)
+            converted += result.modified_count
+
+        last_id = batch[-1]["_id"]
+        state_collection.update_one(
+            {"_id": state_id},
+            {"$set": {
+                "last_id": last_id,
+                "converted": converted,
+                "invalid": invalid,
+                "completed": False,
+                "updated_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+        print(f"'{collection.name}': processed up to {last_id}, {converted} documents converted")
+
+    state_collection.update_one(
+        {"_id": state_id},
+        {"$set": {"completed": True, "completed_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return converted, invalid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize catalog prices and quantities")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore saved checkpoints")
+    parser.add_argument("--validators-only", action="store_true", help="only install validators")
+    parser.add_argument("--validation-level", choices=["moderate", "strict"], default="moderate")
+    args = parser.parse_args(argv)
+
+    from app import db, job_state_collection
+
+    if not args.validators_only:
+        for name in CATALOG_COLLECTIONS:
+            converted, invalid = normalize_collection(
+                db[name], job_state_collection,
+                batch_size=args.batch_size, restart=args.restart
+            )
+            print(f"'{name}': {converted} documents converted, {len(invalid)} could not be parsed")
+            for entry in invalid:
+                print(f"  {entry['_id']}: price={entry['price']!r} quantity={entry['quantity']!r} ({entry['error']})")
+
+    apply_validators(db, validation_level=args.validation_level)
+
+
+if __name__ == "__main__":
+    main()
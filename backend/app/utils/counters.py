@@ -0,0 +1,260 @@
+"""Platform counters for the admin dashboard without counting on every request.
+
+Each tracked collection has one document in ``counters`` holding its total
+and its counts per group value (e.g. bids per ``status``)::
+
+    {"_id": "bids", "total": 1204, "groups": {"status": {"pending": 17, ...}},
+     "extra": {"open": 85}, "reconciled_at": ..., "updated_at": ...}
+
+Write paths call ``record()`` (insert / delete) and ``move()`` (status
+change); like ``trending.record`` these only touch an in-memory buffer,
+which a background task flushes as ``$inc`` updates. Readers get the
+counts from an in-memory snapshot of ``counters``, refreshed every
+``REFRESH_INTERVAL`` seconds, plus this process's unflushed increments, so
+``get()`` never queries the database and costs the same at any collection
+size. ``as_of`` tells how fresh the snapshot is.
+
+Write paths that do not report (scripts, shell edits, the few updates
+that do not know the previous status) are corrected by ``reconcile()``,
+which recounts with ``count_documents`` / ``$group`` every
+``RECONCILE_INTERVAL`` seconds in one process of the deployment. Groups
+that are not maintained by write paths and the time-dependent ``extra``
+counts are only updated by reconciliation.
+
+Run a reconciliation by hand from the ``backend`` directory::
+
+    python -m app.utils.counters
+"""
+import argparse
+import atexit
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+FLUSH_INTERVAL = 5  # seconds
+REFRESH_INTERVAL = 10  # seconds
+RECONCILE_INTERVAL = 600  # seconds
+
+
+class Tracked:
+    """A counted collection.
+
+    ``groups`` maps a group name to the field it counts by, or to
+    ``(field, match)`` to count only matching documents. ``extra`` maps a
+    name to ``query(now)`` for counts that change with time.
+    """
+
+    def __init__(self, collection, groups=None, extra=None):
+        self.collection = collection
+        self.groups = groups or {}
+        self.extra = extra or {}
+
+
+TRACKED = {
+    "users": Tracked("users"),
+    "instructors": Tracked("instructor"),
+    "sellers": Tracked("seller"),
+    "events": Tracked("events"),
+    "products": Tracked("product"),
+    "orders": Tracked("orders", groups={"status": "status"}),
+    "complaints": Tracked("complaints", groups={"status": "status"}),
+    "bids": Tracked("bids", groups={
+        "status": "status",
+        "approved_category": ("category", {"status": "approved"})
+    }, extra={
+        "open": lambda now: {"status": "approved", "last_date": {"$gt": now}}
+    })
+}
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_snapshot = {}
+_snapshot_at = None
+_snapshot_lock = threading.Lock()
+
+
+def _key(value):
+    """Group value as a field name ('.' and a leading '$' are not allowed in update paths)"""
+    key = str(value) if value not in (None, "") else "none"
+    return key.replace(".", "_").lstrip("$") or "none"
+
+
+def record(name, delta=1, status=None):
+    """Count ``delta`` documents inserted into (or, negative, removed from) ``name``"""
+    if name not in TRACKED:
+        return
+    with _pending_lock:
+        _pending[(name, "total")] += delta
+        if status is not None and "status" in TRACKED[name].groups:
+            _pending[(name, f"groups.status.{_key(status)}")] += delta
+
+
+def move(name, old_status, new_status):
+    """Count a status change of one document of ``name``"""
+    if name not in TRACKED or "status" not in TRACKED[name].groups or old_status == new_status:
+        return
+    with _pending_lock:
+        _pending[(name, f"groups.status.{_key(old_status)}")] -= 1
+        _pending[(name, f"groups.status.{_key(new_status)}")] += 1
+
+
+def _db():
+    from app import db
+    return db
+
+
+def flush():
+    """Write the buffered increments with one ``$inc`` per counter document"""
+    global _pending
+    with _pending_lock:
+        if not _pending:
+            return 0
+        pending, _pending = _pending, Counter()
+
+    increments = {}
+    for (name, path), delta in pending.items():
+        if delta:
+            increments.setdefault(name, {})[path] = delta
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne({"_id": name}, {"$inc": inc, "$set": {"updated_at": now}}, upsert=True)
+        for name, inc in increments.items()
+    ]
+    if not operations:
+        return 0
+    try:
+        _db()["counters"].bulk_write(operations, ordered=False)
+    except Exception:
+        # Put the increments back so the next flush retries them
+        with _pending_lock:
+            _pending.update(pending)
+        raise
+    return len(operations)
+
+
+def refresh():
+    """Reload the snapshot from ``counters`` (one small query)"""
+    global _snapshot, _snapshot_at
+    now = datetime.utcnow()
+    docs = {doc["_id"]: doc for doc in _db()["counters"].find({"_id": {"$in": list(TRACKED)}})}
+    with _snapshot_lock:
+        _snapshot, _snapshot_at = docs, now
+    return docs
+
+
+def _count(db, name, now):
+    tracked = TRACKED[name]
+    collection = db[tracked.collection]
+    doc = {"_id": name, "total": collection.count_documents({}), "groups": {}, "extra": {}}
+    for group, spec in tracked.groups.items():
+        field, match = spec if isinstance(spec, tuple) else (spec, None)
+        pipeline = ([{"$match": match}] if match else []) + [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+        doc["groups"][group] = {_key(row["_id"]): row["count"] for row in collection.aggregate(pipeline)}
+    for extra, query in tracked.extra.items():
+        doc["extra"][extra] = collection.count_documents(query(now))
+    doc["reconciled_at"] = doc["updated_at"] = now
+    return doc
+
+
+def _claim_reconcile(db, now):
+    """True for the one process whose turn it is to reconcile"""
+    try:
+        db["job_state"].find_one_and_update(
+            {"_id": "counters-reconcile", "next_at": {"$lte": now}},
+            {"$set": {"next_at": now + timedelta(seconds=RECONCILE_INTERVAL)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Not due yet: the upsert collided with the existing state document
+        return False
+    return True
+
+
+def reconcile(force=False, names=None):
+    """Recount the tracked collections; skipped unless due for this deployment or ``force``"""
+    db = _db()
+    now = datetime.utcnow()
+    if not force and not _claim_reconcile(db, now):
+        return []
+    # Increments buffered before the recount are already in the collections
+    flush()
+    done = []
+    for name in names or TRACKED:
+        doc = _count(db, name, now)
+        db["counters"].replace_one({"_id": name}, doc, upsert=True)
+        done.append(doc)
+    refresh()
+    return done
+
+
+def get(name):
+    """Counts of ``name``: ``{"total", "groups", "extra", "as_of", "reconciled_at"}``"""
+    with _snapshot_lock:
+        doc, as_of = _snapshot.get(name), _snapshot_at
+    if doc is None:
+        # First use in this process
+        doc = refresh().get(name)
+        as_of = _snapshot_at
+    if doc is None or not doc.get("reconciled_at"):
+        # Never counted: increments alone are not a total
+        doc = reconcile(force=True, names=[name])[0]
+        as_of = _snapshot_at
+
+    counts = {
+        "total": doc.get("total", 0),
+        "groups": {group: dict(values) for group, values in (doc.get("groups") or {}).items()},
+        "extra": dict(doc.get("extra") or {}),
+        "as_of": as_of,
+        "reconciled_at": doc.get("reconciled_at")
+    }
+    # This process's own writes show up before they are flushed
+    with _pending_lock:
+        pending = [(path, delta) for (counter, path), delta in _pending.items() if counter == name]
+    for path, delta in pending:
+        if path == "total":
+            counts["total"] += delta
+        else:
+            _, group, value = path.split(".", 2)
+            values = counts["groups"].setdefault(group, {})
+            values[value] = values.get(value, 0) + delta
+    return counts
+
+
+def total(name):
+    return get(name)["total"]
+
+
+def init_app(app):
+    """Start the flush, refresh and reconcile tasks"""
+    from app.utils.scheduler import start_periodic
+
+    start_periodic("counters-flush", FLUSH_INTERVAL, flush, run_immediately=False)
+    start_periodic("counters-refresh", REFRESH_INTERVAL, refresh)
+    start_periodic("counters-reconcile", RECONCILE_INTERVAL, reconcile)
+    atexit.register(_flush_on_exit)
+
+
+def _flush_on_exit():
+    try:
+        flush()
+    except Exception as e:
+        print(f"Counters: could not flush on exit: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recount the platform counters")
+    parser.add_argument("names", nargs="*", help=f"counters to recount: {', '.join(TRACKED)} (default: all)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in TRACKED]
+    if unknown:
+        parser.error(f"unknown counters: {', '.join(unknown)}")
+
+    for doc in reconcile(force=True, names=args.names or None):
+        print(f"{doc['_id']}: {doc['total']} {doc['groups'] or ''} {doc['extra'] or ''}".rstrip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Streaming CSV / NDJSON exports of admin and seller listings.
+
+A dataset describes the fields a client may ask for; each field names the
+document paths it is read from and how to get its value. ``stream()``
+projects only the requested fields, walks a cursor fetching
+``BATCH_SIZE`` documents per round trip and yields the encoded rows in
+chunks of about ``CHUNK_SIZE`` bytes. The response is a plain generator,
+so the WSGI server only asks for the next chunk once the previous one was
+written to the client: a slow client holds the cursor back instead of
+rows piling up in memory, and memory use does not grow with the number of
+rows exported.
+
+Query parameters understood by ``parse_args``::
+
+    ?format=csv|ndjson&fields=email,first_name,created_at
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from flask import Response, stream_with_context
+
+BATCH_SIZE = 500
+CHUNK_SIZE = 64 * 1024
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson")
+}
+
+# Spreadsheet applications evaluate cells starting with these
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _lookup(doc, path):
+    for key in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+def path(source):
+    """Field read from the (dotted) document path ``source``"""
+    return ((source.split(".")[0],), lambda doc: _lookup(doc, source))
+
+
+def computed(sources, get):
+    """Field computed by ``get(doc)`` from the top-level fields ``sources``"""
+    return (tuple(sources), get)
+
+
+class Dataset:
+    """Exportable fields of a collection; ``default`` is exported when ``?fields`` is absent"""
+
+    def __init__(self, name, fields, default=None, sort=None):
+        self.name = name
+        self.fields = {field: spec if isinstance(spec, tuple) else path(spec) for field, spec in fields.items()}
+        self.default = list(default or self.fields)
+        self.sort = sort
+
+    def select(self, requested):
+        """Requested field names, checked against the dataset"""
+        if not requested:
+            return self.default
+        selected = [field.strip() for field in requested.split(",") if field.strip()]
+        unknown = [field for field in selected if field not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(self.fields)}")
+        if not selected:
+            raise ValueError("fields must name at least one field")
+        return selected
+
+    def projection(self, selected):
+        projection = {"_id": 1}
+        for field in selected:
+            for source in self.fields[field][0]:
+                projection[source] = 1
+        return projection
+
+
+def parse_args(dataset, args):
+    """``(format, fields)`` from the request arguments; raises ValueError"""
+    fmt = (args.get("format") or "csv").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    return fmt, dataset.select(args.get("fields"))
+
+
+def _plain(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _csv_cell(value):
+    value = _plain(value)
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def rows(dataset, cursor, fmt, selected):
+    """Generator of encoded export chunks for the documents of ``cursor``"""
+    getters = [(field, dataset.fields[field][1]) for field in selected]
+    buffer = io.StringIO()
+
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(selected)
+        write = lambda doc: writer.writerow([_csv_cell(get(doc)) for _, get in getters])
+    else:
+        def write(doc):
+            buffer.write(json.dumps({field: _plain(get(doc)) for field, get in getters}, default=str))
+            buffer.write("\n")
+
+    try:
+        for doc in cursor:
+            write(doc)
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        # Release the server-side cursor when the client goes away mid-export
+        close = getattr(cursor, "close", None)
+        if close:
+            close()
+
+
+def stream(dataset, collection, query, fmt, selected, filename=None):
+    """Streamed response exporting the documents of ``collection`` matching ``query``"""
+    cursor = collection.find(query, dataset.projection(selected)).batch_size(BATCH_SIZE)
+    if dataset.sort:
+        cursor = cursor.sort(dataset.sort)
+
+    mimetype, extension = FORMATS[fmt]
+    filename = filename or f"{dataset.name}_{datetime.utcnow():%Y-%m-%d}.{extension}"
+    return Response(stream_with_context(rows(dataset, cursor, fmt, selected)), mimetype=mimetype, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+        # Keep reverse proxies from buffering the whole export
+        "X-Accel-Buffering": "no"
+    })
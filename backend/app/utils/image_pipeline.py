@@ -0,0 +1,290 @@
+"""Resized WebP/JPEG derivatives for uploaded images.
+
+Upload handlers save the original as before and then call ``schedule()``,
+which hands the file to a process pool. The worker decodes the image once,
+applies the EXIF orientation, drops all metadata and writes a ``thumb``,
+``card`` and ``full`` variant in both WebP and JPEG into a ``derived/``
+directory next to the original. When it finishes, the variant URLs are
+``$set`` on the owning document (``image_variants``, ``poster_variants``,
+...), and list endpoints can swap the original for the smallest suitable
+variant with ``apply_variants``.
+
+The same pass stores layout metadata next to the variants (``image_meta``,
+``poster_meta``): the original width, height and aspect ratio, the dominant
+colour and a ~16px blurred JPEG placeholder as a data URI, so cards can be
+sized and painted before the real image loads.
+"""
+import argparse
+import base64
+import os
+import sys
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+from app.utils import storage
+
+# Longest edge in pixels for each variant
+VARIANTS = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1600
+}
+
+FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}
+}
+
+IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp", "bmp", "tiff"}
+DERIVED_DIR = "derived"
+
+# Longest edge of the inline placeholder; ~300-600 bytes once base64 encoded
+PLACEHOLDER_EDGE = 16
+PLACEHOLDER_QUALITY = 50
+# EXIF orientations that rotate the image by 90 degrees
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+MAX_WORKERS = 2
+
+_pool = None
+
+
+def _uploads_root():
+    return os.path.join(os.getcwd(), "uploads")
+
+
+def _url_for_path(path):
+    """Public /uploads/... URL for a file under the uploads directory"""
+    relative = os.path.relpath(path, _uploads_root()).replace(os.sep, "/")
+    return f"/uploads/{relative}"
+
+
+def _oriented_size(image):
+    """Size of an opened (not yet decoded) image as displayed, after EXIF rotation"""
+    width, height = image.size
+    try:
+        if image.getexif().get(0x0112) in ROTATED_ORIENTATIONS:
+            return height, width
+    except Exception:
+        pass
+    return width, height
+
+
+def _flatten(image):
+    """RGB copy of ``image`` with any transparency composited onto white"""
+    if image.mode in ("RGBA", "LA"):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def image_metadata(size, small):
+    """Layout metadata from the original ``(width, height)`` and an already reduced image"""
+    width, height = size
+    rgb = _flatten(small)
+
+    # Most common colour of a 5-colour palette is closer to what the eye
+    # picks than the mean, which tends towards grey
+    sample = rgb.copy()
+    sample.thumbnail((64, 64))
+    quantized = sample.quantize(colors=5)
+    _, index = max(quantized.getcolors())
+    red, green, blue = quantized.getpalette()[index * 3:index * 3 + 3]
+
+    placeholder = rgb.copy()
+    placeholder.thumbnail((PLACEHOLDER_EDGE, PLACEHOLDER_EDGE), Image.BILINEAR)
+    buffer = BytesIO()
+    placeholder.save(buffer, "JPEG", quality=PLACEHOLDER_QUALITY)
+
+    return {
+        "width": width,
+        "height": height,
+        "aspect_ratio": round(width / height, 4) if height else None,
+        "dominant_color": f"#{red:02x}{green:02x}{blue:02x}",
+        "placeholder": "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+    }
+
+
+def generate_variants(source_path):
+    """Write every variant of ``source_path``; returns ``({variant: {format: url}}, metadata)``.
+
+    Runs in a worker process, so it only depends on Pillow and the path.
+    """
+    directory, filename = os.path.split(source_path)
+    stem = os.path.splitext(filename)[0]
+    output_dir = os.path.join(directory, DERIVED_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Content-addressed sources never change, so existing derivatives are reused
+    targets = {
+        variant: {extension: os.path.join(output_dir, f"{stem}_{variant}.{extension}") for extension in FORMATS}
+        for variant in VARIANTS
+    }
+    if all(os.path.exists(path) for paths in targets.values() for path in paths.values()):
+        # Only the header of the original is read; colours come from the thumbnail
+        with Image.open(source_path) as original, Image.open(targets["thumb"]["jpeg"]) as thumb:
+            metadata = image_metadata(_oriented_size(original), thumb)
+        variants = {
+            variant: {extension: _url_for_path(path) for extension, path in paths.items()}
+            for variant, paths in targets.items()
+        }
+        return variants, metadata
+
+    variants = {}
+    with Image.open(source_path) as original:
+        # Read before draft() shrinks the reported size
+        size = _oriented_size(original)
+        # Let the JPEG decoder downscale while decoding huge phone photos
+        original.draft("RGB", (VARIANTS["full"], VARIANTS["full"]))
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        for variant, edge in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+            resized = image.copy()
+            resized.thumbnail((edge, edge), Image.LANCZOS)
+            urls = {}
+            for extension, options in FORMATS.items():
+                target = targets[variant][extension]
+                output = resized
+                if options["format"] == "JPEG" and has_alpha:
+                    output = _flatten(resized)
+                # Saving without exif=/icc_profile= strips the metadata
+                output.save(target, **options)
+                urls[extension] = _url_for_path(target)
+            variants[variant] = urls
+            # Later (smaller) variants are resized from this one
+            image = resized
+
+    # ``image`` is now the thumb variant
+    return variants, image_metadata(size, image)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _pool
+
+
+def is_image(path):
+    return bool(path) and path.rsplit(".", 1)[-1].lower() in IMAGE_EXTENSIONS
+
+
+def meta_field_for(field):
+    """``image_variants`` -> ``image_meta``, ``poster_variants`` -> ``poster_meta``"""
+    return field[:-len("_variants")] + "_meta" if field.endswith("_variants") else f"{field}_meta"
+
+
+def schedule(source_path, collection, doc_filter, field="image_variants"):
+    """Generate variants and metadata in the background and store them on the matching document"""
+    if Image is None or not is_image(source_path):
+        return None
+
+    def on_done(future):
+        try:
+            variants, metadata = future.result()
+            # Derivatives are written locally by the worker; other nodes read them from the store
+            for urls in variants.values():
+                for url in urls.values():
+                    storage.replicate(storage.path_for_key(url[len("/uploads/"):]))
+            collection.update_one(doc_filter, {"$set": {field: variants, meta_field_for(field): metadata}})
+        except Exception as e:
+            print(f"Image pipeline failed for {source_path}: {e}")
+
+    try:
+        future = _get_pool().submit(generate_variants, os.path.abspath(source_path))
+        future.add_done_callback(on_done)
+        return future
+    except Exception as e:
+        print(f"Could not schedule image variants for {source_path}: {e}")
+        return None
+
+
+def pick_variant(variants, size, accept=""):
+    """URL of the requested variant, preferring WebP when the client accepts it"""
+    urls = (variants or {}).get(size)
+    if not urls:
+        return None
+    if "image/webp" in (accept or "") and urls.get("webp"):
+        return urls["webp"]
+    return urls.get("jpeg") or urls.get("webp")
+
+
+def apply_variants(docs, size, request, variants_field="image_variants", target="image"):
+    """Set ``target`` on each doc to the URL of its ``size`` variant when one exists"""
+    if size not in VARIANTS:
+        return docs
+    accept = request.headers.get("Accept", "")
+    host = request.host_url.rstrip("/")
+    for doc in docs:
+        url = pick_variant(doc.get(variants_field), size, accept)
+        if url:
+            doc[target] = f"{host}{url}"
+    return docs
+
+
+# (collection attribute in app, image field, variants field, legacy upload folder)
+BACKFILL_TARGETS = {
+    "product": ("product_collection", "image", "image_variants", "product_images"),
+    "material": ("material_collection", "image", "image_variants", "material_images"),
+    "event": ("events_collection", "poster", "poster_variants", "event_posters"),
+    "auction": ("bids_collection", "image", "image_variants", "event_posters")
+}
+
+
+def backfill(kind, limit=None):
+    """Generate variants and metadata for documents uploaded before the pipeline stored them"""
+    import app
+    from app.utils import media_store
+
+    attr, image_field, variants_field, legacy_folder = BACKFILL_TARGETS[kind]
+    collection = getattr(app, attr)
+    meta_field = meta_field_for(variants_field)
+
+    cursor = collection.find(
+        {image_field: {"$nin": [None, ""]}, meta_field: {"$exists": False}},
+        {image_field: 1}
+    )
+    if limit:
+        cursor = cursor.limit(limit)
+
+    futures = []
+    for doc in cursor:
+        path = media_store.locate(doc[image_field], os.path.join(_uploads_root(), legacy_folder))
+        if path:
+            future = schedule(path, collection, {"_id": doc["_id"]}, variants_field)
+            if future:
+                futures.append(future)
+
+    for future in futures:
+        try:
+            future.result()
+        except Exception:
+            pass  # Already logged by the done callback
+    return len(futures)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill image variants, dimensions and placeholders")
+    parser.add_argument("--kind", choices=sorted(BACKFILL_TARGETS) + ["all"], default="all")
+    parser.add_argument("--limit", type=int, default=None, help="documents per kind")
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        print("Pillow is not installed")
+        sys.exit(1)
+
+    kinds = sorted(BACKFILL_TARGETS) if args.kind == "all" else [args.kind]
+    for kind in kinds:
+        print(f"{kind}: processed {backfill(kind, args.limit)} images")
+
+
+if __name__ == "__main__":
+    main()
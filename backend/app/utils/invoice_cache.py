@@ -0,0 +1,94 @@
+"""Rendered invoice PDFs cached on disk.
+
+A cached file is named after the document ID, a version of the document and
+``invoice_engine.TEMPLATE_VERSION``::
+
+    invoice_cache/order/65f0a1b2c3d4e5f6a7b8c9d0-3fa1c2b4d5e6f708-t1.pdf
+
+The version is a hash of the document fields the invoice is built from, so
+an unchanged order or auction is served straight from disk (no catalog
+lookups, no ReportLab) and any change to those fields, or a template
+version bump, renders a new file. Older renders of the same document are
+removed when a new one is written.
+
+The cache lives outside ``uploads/`` so invoices are never publicly served
+and the upload garbage collector does not see them.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from flask import send_file
+
+from app.utils import invoice_engine
+
+CACHE_DIR = os.path.join(os.getcwd(), "invoice_cache")
+
+
+def document_version(doc, fields):
+    """Short hash of the ``fields`` of ``doc`` an invoice is rendered from"""
+    payload = json.dumps({field: doc.get(field) for field in fields}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def viewer_key(doc_id, identity):
+    """Cache key for invoices that differ per viewer, without the identity in the file name"""
+    return f"{doc_id}.{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:12]}"
+
+
+def cache_path(template, doc_id, version):
+    name = f"{doc_id}-{version}-t{invoice_engine.TEMPLATE_VERSION}.pdf"
+    return os.path.join(CACHE_DIR, template, name)
+
+
+def _drop_stale(path, doc_id):
+    directory = os.path.dirname(path)
+    for name in os.listdir(directory):
+        if name.startswith(f"{doc_id}-") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def render_file(template, doc_id, version, data):
+    """Render ``data`` into the cache and return the path; runs in export worker processes too"""
+    path = cache_path(template, doc_id, version)
+    buffer = invoice_engine.render(template, data)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so a concurrent download never sees a partial file
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as temp:
+            temp.write(buffer.getbuffer())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    _drop_stale(path, doc_id)
+    return path
+
+
+def get_or_render(template, doc_id, version, build):
+    """Path of the cached PDF; ``build()`` supplies the render data on a miss"""
+    path = cache_path(template, doc_id, version)
+    if os.path.exists(path):
+        return path
+    return render_file(template, doc_id, version, build())
+
+
+def send_invoice(path, download_name):
+    """Send a cached PDF with ETag, Content-Length and 304 support"""
+    response = send_file(
+        path,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=download_name,
+        etag=os.path.basename(path)[:-len(".pdf")],
+        conditional=True
+    )
+    # Invoices are per user; clients may keep them but must revalidate
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
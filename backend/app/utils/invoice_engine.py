@@ -0,0 +1,491 @@
+"""Invoice and receipt rendering for orders, event registrations and auctions.
+
+Every document is described declaratively in ``TEMPLATES`` (a title and a
+list of blocks) and compiled once, at import, into a render function. The
+ReportLab stylesheet, paragraph styles, table styles and fonts are built
+once at module level as well, so a render only lays out the data.
+
+Text is set in the core Helvetica fonts, which are never embedded. They
+have no "₹", so a TrueType font with a rupee glyph is registered when one
+can be found (``INVOICE_FONT_PATH``, then DejaVu Sans, Noto Sans, Nirmala UI
+or Arial) and used for that one glyph only, so each PDF embeds a
+few-kilobyte subset instead of a full text font. Without such a font
+amounts are printed as "Rs.".
+
+    from app.utils import invoice_engine
+    pdf_buffer = invoice_engine.render("order", order_data)
+"""
+import os
+from datetime import datetime
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+RUPEE = "\u20b9"
+
+FONT_DIRECTORIES = [
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/dejavu",
+    "/usr/share/fonts/TTF",
+    "/usr/share/fonts/truetype/noto",
+    "/usr/share/fonts/noto",
+    "/Library/Fonts",
+    "/System/Library/Fonts/Supplemental",
+    os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts")
+]
+
+FONT_FILES = ["DejaVuSans.ttf", "NotoSans-Regular.ttf", "Nirmala.ttf", "arial.ttf", "Arial.ttf"]
+
+FONT, FONT_BOLD = "Helvetica", "Helvetica-Bold"
+
+# PDF streams are compressed; ASCII85 on top only costs time
+rl_config.useA85 = 0
+
+
+def _has_rupee(font):
+    return ord(RUPEE) in getattr(font.face, "charToGlyph", {})
+
+
+def _cache_subsets(face):
+    """Every invoice embeds the same one-glyph subset; build it once instead of per document"""
+    make_subset = face.makeSubset
+    subsets = {}
+
+    def cached(subset):
+        key = tuple(subset)
+        if key not in subsets:
+            subsets[key] = make_subset(subset)
+        return subsets[key]
+
+    face.makeSubset = cached
+
+
+def _font_candidates():
+    if os.environ.get("INVOICE_FONT_PATH"):
+        yield os.environ["INVOICE_FONT_PATH"]
+    for directory in FONT_DIRECTORIES:
+        for name in FONT_FILES:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                yield path
+
+
+def _register_symbol_font():
+    """Register a rupee-capable TTF; returns (font name or None, currency symbol)"""
+    for path in _font_candidates():
+        try:
+            # Only the glyphs actually used are embedded, not the whole ASCII range
+            font = TTFont("InvoiceSymbol", path, asciiReadable=False)
+            if _has_rupee(font):
+                _cache_subsets(font.face)
+                pdfmetrics.registerFont(font)
+                return "InvoiceSymbol", RUPEE
+        except Exception as e:
+            print(f"Could not load invoice font {path}: {e}")
+    print("No rupee-capable TTF found for invoices; set INVOICE_FONT_PATH. Using 'Rs.'")
+    return None, "Rs."
+
+
+SYMBOL_FONT, CURRENCY = _register_symbol_font()
+
+_sample = getSampleStyleSheet()
+
+STYLES = {
+    "title": ParagraphStyle("InvoiceTitle", parent=_sample["Heading1"], fontName=FONT_BOLD, alignment=1),
+    "heading": ParagraphStyle("InvoiceHeading", parent=_sample["Heading2"], fontName=FONT_BOLD),
+    "subheading": ParagraphStyle("InvoiceSubheading", parent=_sample["Heading3"], fontName=FONT_BOLD),
+    "body": ParagraphStyle("InvoiceBody", parent=_sample["BodyText"], fontName=FONT),
+    "date": ParagraphStyle("InvoiceDate", parent=_sample["Normal"], fontName=FONT, alignment=2),
+    "cell": ParagraphStyle("InvoiceCell", parent=_sample["Normal"], fontName=FONT, fontSize=10, leading=12)
+}
+STYLES["cell_bold"] = ParagraphStyle("InvoiceCellBold", parent=STYLES["cell"], fontName=FONT_BOLD)
+STYLES["cell_right"] = ParagraphStyle("InvoiceCellRight", parent=STYLES["cell"], alignment=2)
+STYLES["cell_bold_right"] = ParagraphStyle("InvoiceCellBoldRight", parent=STYLES["cell_bold"], alignment=2)
+
+# Longer cell values are wrapped in a Paragraph so they break inside the column
+WRAP_CELLS_OVER = 40
+
+# Paragraph style for value cells per table style: (other rows, last row)
+VALUE_CELL_STYLES = {
+    "items_total": ("cell", "cell_bold"),
+    "summary": ("cell_right", "cell_bold_right")
+}
+
+TABLE_STYLES = {
+    # Label column on grey, value column plain, full grid
+    "details": TableStyle([
+        ("BACKGROUND", (0, 0), (0, -1), colors.lightgrey),
+        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("FONTNAME", (0, 0), (0, -1), FONT_BOLD),
+        ("FONTNAME", (1, 0), (1, -1), FONT),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
+        ("TOPPADDING", (0, 0), (-1, -1), 10),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black)
+    ]),
+    # Bold labels without borders
+    "pairs": TableStyle([
+        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+        ("ALIGN", (0, 0), (0, -1), "LEFT"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("FONTNAME", (0, 0), (0, -1), FONT_BOLD),
+        ("FONTNAME", (1, 0), (1, -1), FONT)
+    ]),
+    # Line items with a dark header row
+    "items": TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, 0), FONT_BOLD),
+        ("FONTNAME", (0, 1), (-1, -1), FONT),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black)
+    ]),
+    # Line items whose last row is a bold total
+    "items_total": TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("FONTNAME", (0, 0), (-1, 0), FONT_BOLD),
+        ("FONTNAME", (0, 1), (-1, -2), FONT),
+        ("FONTNAME", (0, -1), (-1, -1), FONT_BOLD),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.black)
+    ]),
+    # Amount breakdown, right aligned, total row ruled and bold
+    "summary": TableStyle([
+        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+        ("ALIGN", (0, 0), (0, -1), "LEFT"),
+        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("FONTNAME", (0, 0), (0, -1), FONT_BOLD),
+        ("FONTNAME", (1, 0), (1, -2), FONT),
+        ("FONTNAME", (0, -1), (-1, -1), FONT_BOLD),
+        ("LINEABOVE", (0, -1), (-1, -1), 1, colors.black)
+    ])
+}
+
+
+# -- value formatting ---------------------------------------------------------
+
+def text(value, default="N/A"):
+    if value is None or value == "":
+        return default
+    if isinstance(value, datetime):
+        return value.strftime("%B %d, %Y")
+    return str(value)
+
+
+def money(value):
+    try:
+        return f"{CURRENCY}{float(value):,.2f}"
+    except (TypeError, ValueError):
+        return f"{CURRENCY}{value}" if value not in (None, "") else f"{CURRENCY}0.00"
+
+
+def field(*keys, default="N/A"):
+    """Value of the first present key, as text"""
+    def get(data):
+        for key in keys:
+            if data.get(key) not in (None, ""):
+                return text(data[key])
+        return default
+    return get
+
+
+def optional(*keys):
+    """Like ``field`` but the row is left out when no key is present"""
+    return field(*keys, default=None)
+
+
+def amount(*keys, multiplier=1):
+    def get(data):
+        for key in keys:
+            if data.get(key) not in (None, ""):
+                try:
+                    return money(float(data[key]) * multiplier)
+                except (TypeError, ValueError):
+                    return money(data[key])
+        return money(0)
+    return get
+
+
+def reference(prefix, *keys):
+    def get(data):
+        for key in keys:
+            if data.get(key):
+                return f"{prefix}-{str(data[key])[:8]}"
+        return f"{prefix}-"
+    return get
+
+
+def _resolve(spec, data):
+    return spec(data) if callable(spec) else spec
+
+
+def markup(value):
+    """Escape text for a Paragraph and switch to the symbol font for the rupee sign"""
+    value = escape(value)
+    if SYMBOL_FONT:
+        value = value.replace(RUPEE, f'<font name="{SYMBOL_FONT}">{RUPEE}</font>')
+    return value
+
+
+# -- blocks ------------------------------------------------------------------
+# Each block compiles to a function ``data -> [flowables]``
+
+def _paragraph_block(style):
+    def compile_block(content):
+        def build(data):
+            return [Paragraph(markup(_resolve(content, data)), STYLES[style])]
+        return build
+    return compile_block
+
+
+def _spacer_block(height):
+    flowable = Spacer(1, height * inch)
+    return lambda data: [flowable]
+
+
+def _date_block(label="Invoice Date"):
+    def build(data):
+        return [Paragraph(f"{label}: {datetime.now().strftime('%B %d, %Y')}", STYLES["date"])]
+    return build
+
+
+def _pairs_block(rows, style="details", col_widths=(2, 3.5)):
+    widths = [width * inch for width in col_widths]
+    table_style = TABLE_STYLES[style]
+    cell_style, last_style = VALUE_CELL_STYLES.get(style, ("cell", "cell"))
+
+    def build(data):
+        values = [(label, _resolve(value, data)) for label, value in rows]
+        values = [(label, value) for label, value in values if value is not None]
+        last = len(values) - 1
+        table = Table(
+            [[label, _cell(value, last_style if i == last else cell_style)] for i, (label, value) in enumerate(values)],
+            colWidths=widths
+        )
+        table.setStyle(table_style)
+        return [table]
+    return build
+
+
+def _cell(value, style="cell"):
+    """Plain strings stay strings; long ones and amounts with a rupee sign become Paragraphs"""
+    if isinstance(value, str) and (len(value) > WRAP_CELLS_OVER or (SYMBOL_FONT and RUPEE in value)):
+        return Paragraph(markup(value), STYLES[style])
+    return value
+
+
+def _items_block(columns, rows_key, style="items", col_widths=None, total=None):
+    """One row per ``data[rows_key]`` entry; ``total`` adds a final (label, value) row"""
+    header = [label for label, _ in columns]
+    widths = [width * inch for width in col_widths] if col_widths else None
+    table_style = TABLE_STYLES[style]
+    total_style = VALUE_CELL_STYLES.get(style, ("cell", "cell"))[1]
+
+    def build(data):
+        rows = [header]
+        for item in data.get(rows_key) or []:
+            rows.append([_cell(_resolve(value, item)) for _, value in columns])
+        if total:
+            label, value = total
+            rows.append([label] + [""] * (len(columns) - 2) + [_cell(_resolve(value, data), total_style)])
+        table = Table(rows, colWidths=widths)
+        table.setStyle(table_style)
+        return [table]
+    return build
+
+
+BLOCKS = {
+    "title": _paragraph_block("title"),
+    "heading": _paragraph_block("heading"),
+    "subheading": _paragraph_block("subheading"),
+    "text": _paragraph_block("body"),
+    "spacer": _spacer_block,
+    "date": _date_block,
+    "pairs": _pairs_block,
+    "items": _items_block
+}
+
+
+def _receipt_total(data):
+    return money(sum(float(item.get("price") or 0) for item in data.get("items") or []))
+
+
+def _auction_item(data):
+    return [{
+        "title": field("title", "item_name")(data),
+        "description": field("description", "item_description")(data),
+        "amount": amount("current_amount", "winning_bid", "final_amount")(data)
+    }]
+
+
+AUCTION_TERMS = (
+    "Terms and Conditions: "
+    "1. This is an official receipt for your auction purchase. "
+    "2. The artwork will be shipped within 5 business days. "
+    "3. For any inquiries, please contact support@artisianmarket.com. "
+    "4. All sales are final. No returns or exchanges are allowed."
+)
+
+# Bump when a template or style changes so cached PDFs are rendered again
+TEMPLATE_VERSION = 1
+
+TEMPLATES = {
+    "order": [
+        ("title", "Order Invoice"),
+        ("spacer", 0.5),
+        ("date",),
+        ("spacer", 0.5),
+        ("pairs", [
+            ("Invoice Number:", reference("INV", "_id")),
+            ("Order Date:", field("created_at")),
+            ("Payment ID:", field("payment_id")),
+            ("Total Amount:", amount("total_amount"))
+        ]),
+        ("spacer", 0.5),
+        ("subheading", "Items Purchased:"),
+        ("spacer", 0.25),
+        ("items", [("Item", field("name", default="Unknown Item")), ("Price", amount("price"))], "items",
+         "items", (4, 1.5)),
+        ("spacer", 0.5),
+        ("text", "Thank you for your purchase!")
+    ],
+    "order_receipt": [
+        ("title", "Artisian Market - Receipt"),
+        ("spacer", 0.3),
+        ("text", lambda data: f"Order ID: {str(data.get('_id', 'N/A'))[:8]}"),
+        ("date", "Date"),
+        ("spacer", 0.15),
+        ("items", [("Item", field("name")), ("Price", amount("price"))], "items", "items_total", None,
+         ("Total", _receipt_total))
+    ],
+    "event_receipt": [
+        ("title", "Event Registration Receipt"),
+        ("spacer", 0.5),
+        ("date", "Receipt Date"),
+        ("spacer", 0.5),
+        ("heading", field("name", default="Event")),
+        ("spacer", 0.25),
+        ("pairs", [
+            ("Receipt Number:", reference("EVT", "registration_id", "_id")),
+            ("Attendee:", field("attendee_name", "user_id")),
+            ("Email:", optional("user_id")),
+            ("Event Date:", field("date")),
+            ("Time:", optional("time")),
+            ("Venue:", field("place", default="Online")),
+            ("Registered On:", field("registration_date")),
+            ("Payment Status:", field("payment_status", default="pending")),
+            ("Fee:", amount("fee"))
+        ]),
+        ("spacer", 0.5),
+        ("text", "Please bring this receipt with you to the event.")
+    ],
+    "auction": [
+        ("title", "Art Auction Invoice"),
+        ("spacer", 0.3),
+        ("pairs", [
+            ("Invoice Date:", lambda data: datetime.now().strftime("%Y-%m-%d")),
+            ("Auction ID:", field("auction_id", "_id")),
+            ("End Date:", field("last_date", "end_date"))
+        ], "pairs", (1.4, 4.2)),
+        ("spacer", 0.3),
+        ("heading", "Auction Details"),
+        ("items", [("Item", field("title")), ("Description", field("description")), ("Winning Bid", field("amount"))],
+         "auction_items", "items", (1.4, 4.2, 1.4)),
+        ("spacer", 0.3),
+        ("heading", "Bidder Information"),
+        ("pairs", [
+            ("Bidder Email:", field("highest_bidder", "bidder_email", "winner")),
+            ("Bidder Role:", field("bidder_role", default="Buyer"))
+        ], "pairs", (1.4, 4.2)),
+        ("spacer", 0.3),
+        ("heading", "Payment Summary"),
+        ("pairs", [
+            ("Winning Bid Amount:", amount("current_amount", "winning_bid")),
+            ("Platform Fee (5%):", amount("current_amount", "winning_bid", multiplier=0.05)),
+            ("Total Amount Due:", amount("current_amount", "winning_bid", multiplier=1.05))
+        ], "summary", (2.1, 2.1)),
+        ("spacer", 0.55),
+        ("text", AUCTION_TERMS)
+    ],
+    "bid": [
+        ("title", "Auction Invoice"),
+        ("spacer", 0.5),
+        ("date",),
+        ("spacer", 0.5),
+        ("heading", lambda data: f"Auction Item: {text(data.get('title'), 'Auction Item')}"),
+        ("spacer", 0.25),
+        ("text", lambda data: f"Description: {text(data.get('description'), 'No description available')}"),
+        ("spacer", 0.5),
+        ("pairs", [
+            ("Invoice Number:", reference("AUC", "_id")),
+            ("Winner Name:", optional("winner_name")),
+            ("Winner Email:", optional("winner_email")),
+            ("Winner:", optional("winner")),
+            ("Seller:", optional("seller_name")),
+            ("Category:", field("category", default="Art")),
+            ("Condition:", field("condition", default="New")),
+            ("Auction Date:", field("auction_date")),
+            ("End Date:", field("end_date")),
+            ("Final Bid Amount:", amount("final_amount"))
+        ]),
+        ("spacer", 0.5),
+        ("text", "Thank you for participating in our auction!"),
+        ("spacer", 0.25),
+        ("text", "This is an automatically generated invoice for your successful bid.")
+    ]
+}
+
+# Data preparation applied before a template's blocks run
+PREPARE = {
+    "auction": lambda data: {**data, "auction_items": _auction_item(data)}
+}
+
+
+def compile_template(name, blocks):
+    """Turn a declarative template into a ``render(data) -> BytesIO`` function"""
+    builders = [BLOCKS[block[0]](*block[1:]) for block in blocks]
+    prepare = PREPARE.get(name)
+
+    def render_template(data):
+        data = prepare(data) if prepare else data
+        story = []
+        for build in builders:
+            story.extend(build(data))
+
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=letter,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=72
+        )
+        doc.build(story)
+        buffer.seek(0)
+        return buffer
+
+    return render_template
+
+
+RENDERERS = {name: compile_template(name, blocks) for name, blocks in TEMPLATES.items()}
+
+
+def render(template, data):
+    """Render ``data`` with a compiled template and return the PDF in a BytesIO"""
+    try:
+        return RENDERERS[template](data)
+    except Exception as e:
+        print(f"Error rendering {template} PDF: {str(e)}")
+        raise
@@ -0,0 +1,205 @@
+"""Bulk invoice export as a streamed ZIP.
+
+``stream_zip()`` walks the orders of a date range with a cursor, loads the
+catalog entries of each batch with one ``$in`` query per collection, and
+renders invoices that are not in ``invoice_cache`` yet in a process pool.
+Finished PDFs are added to the archive in order as soon as they are ready
+and every archive chunk is yielded straight to the response, so neither
+the invoices nor the ZIP are ever held in memory as a whole.
+
+Progress (``total``, ``done``, ``status``) is written to the ``exports``
+collection every ``PROGRESS_EVERY`` invoices and can be polled with the ID
+returned in the ``X-Export-Id`` header.
+"""
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+
+from bson import ObjectId
+
+from app.utils import invoice_cache
+
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+BATCH_SIZE = 50
+# Renders in flight ahead of the archive writer
+WINDOW = MAX_WORKERS * 4
+PROGRESS_EVERY = 25
+EXPORT_LIFETIME = timedelta(days=1)
+
+# Order fields an invoice is rendered from
+INVOICE_FIELDS = ["payment_id", "created_at", "product_ids", "material_ids", "items"]
+ORDER_PROJECTION = {field: 1 for field in INVOICE_FIELDS}
+CATALOG_PROJECTION = {"name": 1, "price": 1, "category": 1, "seller_id": 1}
+
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _pool
+
+
+def load_catalog(orders, product_collection, material_collection):
+    """Products and materials referenced by ``orders``, by ``_id``"""
+    product_ids = {pid for order in orders for pid in order.get("product_ids") or []}
+    material_ids = {mid for order in orders for mid in order.get("material_ids") or []}
+    products = {doc["_id"]: doc for doc in product_collection.find({"_id": {"$in": list(product_ids)}}, CATALOG_PROJECTION)} if product_ids else {}
+    materials = {doc["_id"]: doc for doc in material_collection.find({"_id": {"$in": list(material_ids)}}, CATALOG_PROJECTION)} if material_ids else {}
+    return products, materials
+
+
+def order_invoice_data(order, products, materials, seller=None):
+    """Render data for an order invoice; ``seller`` limits it to that seller's items"""
+    items = []
+    if order.get("items"):
+        # Cart checkouts store the purchased items on the order
+        for item in order["items"]:
+            if seller is None or item.get("seller_id") == seller:
+                items.append({"name": item.get("name", "Unknown Item"), "price": item.get("price", "0")})
+    else:
+        for ids, catalog, fallback in ((order.get("product_ids"), products, "Unknown Product"),
+                                       (order.get("material_ids"), materials, "Unknown Material")):
+            for item_id in ids or []:
+                doc = catalog.get(item_id)
+                if doc and (seller is None or str(doc.get("seller_id")) == seller):
+                    items.append({"name": doc.get("name", fallback), "price": doc.get("price", "0")})
+
+    return {
+        "_id": str(order["_id"]),
+        "payment_id": order.get("payment_id", ""),
+        "created_at": order.get("created_at", datetime.now()),
+        "items": items,
+        "total_amount": sum(float(item.get("price") or 0) for item in items)
+    }
+
+
+def seller_filter(seller, product_collection, material_collection):
+    """Orders containing at least one item sold by ``seller``"""
+    return {"$or": [
+        {"items.seller_id": seller},
+        {"product_ids": {"$in": product_collection.distinct("_id", {"seller_id": seller})}},
+        {"material_ids": {"$in": material_collection.distinct("_id", {"seller_id": seller})}}
+    ]}
+
+
+def _renders(orders, product_collection, material_collection, seller):
+    """Yield ``(arcname, path or Future)`` in order, rendering cache misses in the pool"""
+    orders = iter(orders)
+    while True:
+        batch = list(islice(orders, BATCH_SIZE))
+        if not batch:
+            return
+        products, materials = load_catalog(batch, product_collection, material_collection)
+        for order in batch:
+            order_id = str(order["_id"])
+            key = invoice_cache.viewer_key(order_id, seller) if seller else order_id
+            version = invoice_cache.document_version(order, INVOICE_FIELDS)
+            created = order.get("created_at")
+            prefix = created.strftime("%Y-%m-%d") if isinstance(created, datetime) else "undated"
+            arcname = f"{prefix}_invoice_{order_id}.pdf"
+
+            path = invoice_cache.cache_path("order", key, version)
+            if os.path.exists(path):
+                yield arcname, path
+                continue
+            data = order_invoice_data(order, products, materials, seller)
+            try:
+                yield arcname, _get_pool().submit(invoice_cache.render_file, "order", key, version, data)
+            except Exception as e:
+                print(f"Could not schedule invoice render for {order_id}: {e}")
+                yield arcname, invoice_cache.render_file("order", key, version, data)
+
+
+class _ChunkSink:
+    """Write-only file object collecting what ZipFile writes until it is drained"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def start(exports_collection, owner, query, date_from, date_to, orders_collection):
+    """Create the progress record of an export and return its ID"""
+    now = datetime.utcnow()
+    export_id = str(ObjectId())
+    exports_collection.insert_one({
+        "_id": export_id,
+        "kind": "invoices",
+        "owner": owner,
+        "from": date_from,
+        "to": date_to,
+        "total": orders_collection.count_documents(query),
+        "done": 0,
+        "status": "running",
+        "created_at": now,
+        "expires_at": now + EXPORT_LIFETIME
+    })
+    return export_id
+
+
+def stream_zip(export_id, exports_collection, orders, product_collection, material_collection, seller=None):
+    """Generator of ZIP bytes for the invoices of ``orders`` (a cursor)"""
+    sink = _ChunkSink()
+    done = 0
+    pending = deque()
+
+    def add(arcname, result):
+        if isinstance(result, Future):
+            try:
+                result = result.result()
+            except Exception as e:
+                print(f"Invoice render failed in worker for {arcname}: {e}")
+                raise
+        archive.write(result, arcname)
+
+    try:
+        # PDF streams are already compressed, deflating them again only costs CPU
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            for entry in _renders(orders, product_collection, material_collection, seller):
+                pending.append(entry)
+                if len(pending) < WINDOW:
+                    continue
+                add(*pending.popleft())
+                done += 1
+                yield sink.drain()
+                if done % PROGRESS_EVERY == 0:
+                    exports_collection.update_one({"_id": export_id}, {"$set": {"done": done}})
+
+            while pending:
+                add(*pending.popleft())
+                done += 1
+                yield sink.drain()
+        # Central directory
+        yield sink.drain()
+
+        exports_collection.update_one(
+            {"_id": export_id},
+            {"$set": {"done": done, "status": "complete", "finished_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        print(f"Error exporting invoices: {str(e)}")
+        exports_collection.update_one(
+            {"_id": export_id},
+            {"$set": {"done": done, "status": "failed", "error": str(e), "finished_at": datetime.utcnow()}}
+        )
+        raise
+    finally:
+        for _, result in pending:
+            if isinstance(result, Future):
+                result.cancel()
@@ -0,0 +1,289 @@
+"""Background document rendering through a Mongo-backed job queue.
+
+A job is a document in ``jobs`` naming a handler from ``HANDLERS`` and its
+keyword arguments. ``enqueue()`` inserts it as ``queued``; a dispatcher
+claims queued jobs with an atomic ``find_one_and_update`` (highest
+``priority`` first, then oldest) and runs them in a process pool, so
+ReportLab layout never runs on a request thread. Results and errors are
+written back to the job, which ``GET /jobs/<id>`` reports.
+
+Limits:
+
+- at most ``MAX_WORKERS`` jobs run per dispatcher process;
+- at most ``MAX_RUNNING_PER_USER`` jobs of one owner run at once across
+  all dispatchers, so one user exporting hundreds of invoices cannot starve
+  everyone else;
+- a claimed job holds a lease; if its dispatcher dies the job is queued
+  again once the lease expires, up to ``MAX_ATTEMPTS`` times.
+
+The web app runs a dispatcher thread (``init_app``) unless
+``JOB_DISPATCHER=off``, in which case a separate process does the work::
+
+    python -m app.utils.job_queue
+
+Documents that can be requested as jobs are registered by the controllers
+that own them with ``register_document``, so ``POST /jobs`` and the
+synchronous download routes share one authorization and data path.
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import jsonify
+from pymongo import ReturnDocument
+
+from app.utils import invoice_cache
+
+MAX_WORKERS = int(os.environ.get("JOB_WORKERS", max(1, min(4, (os.cpu_count() or 2) - 1))))
+MAX_RUNNING_PER_USER = 2
+MAX_ATTEMPTS = 3
+LEASE = timedelta(minutes=5)
+# Finished jobs are kept this long for status polling
+RESULT_LIFETIME = timedelta(days=1)
+POLL_INTERVAL = 0.5  # seconds
+REQUEUE_INTERVAL = 30  # seconds
+# How long a download request waits for its render before answering 202;
+# short, so a cache miss never ties up a web worker
+SYNC_WAIT = 1.5  # seconds
+SYNC_POLL = 0.1  # seconds
+
+PRIORITIES = {"low": 0, "normal": 5, "high": 10}
+
+# Functions a job may run; they execute in worker processes
+HANDLERS = {
+    "render_invoice": invoice_cache.render_file
+}
+
+# Requestable documents: kind -> (prepare, download name)
+DOCUMENTS = {}
+
+WORKER_ID = f"{os.uname().nodename if hasattr(os, 'uname') else 'node'}:{os.getpid()}"
+
+_pool = None
+_running = {}
+_dispatch_lock = threading.Lock()
+# Set when this process runs a dispatcher (web thread or standalone)
+_dispatching = False
+
+
+class JobError(Exception):
+    """A job request that cannot be served; carries the HTTP status"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def register_document(kind, prepare, download_name):
+    """Make ``kind`` requestable as a job.
+
+    ``prepare(identity, doc_id)`` checks access and returns
+    ``(template, cache key, version, build)`` or raises ``JobError``;
+    ``download_name(doc_id)`` is the file name the PDF is sent as.
+    """
+    DOCUMENTS[kind] = (prepare, download_name)
+
+
+def _jobs():
+    from app import jobs_collection
+    return jobs_collection
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _pool
+
+
+def enqueue(job_type, params, owner, priority="normal", result=None, document=None):
+    """Insert a job; ``result`` creates it already complete (e.g. a cache hit)"""
+    now = datetime.utcnow()
+    job = {
+        "_id": str(ObjectId()),
+        "type": job_type,
+        "params": params,
+        "document": document,
+        "owner": owner,
+        "priority": PRIORITIES.get(priority, PRIORITIES["normal"]),
+        "status": "complete" if result is not None else "queued",
+        "result": result,
+        "error": None,
+        "attempts": 0,
+        "created_at": now,
+        "expires_at": now + RESULT_LIFETIME if result is not None else None
+    }
+    _jobs().insert_one(job)
+    if result is None and _dispatching:
+        # Start it right away if this process has a free worker
+        dispatch()
+    return job
+
+
+def _prepare(kind, doc_id, identity):
+    if kind not in DOCUMENTS:
+        raise JobError(f"Unknown document type: {kind}")
+    template, key, version, build = DOCUMENTS[kind][0](identity, doc_id)
+    params = {"template": template, "doc_id": key, "version": version}
+    return params, invoice_cache.cache_path(template, key, version), build
+
+
+def request_document(kind, doc_id, identity, priority="normal"):
+    """Queue the render of a registered document; returns the job"""
+    params, path, build = _prepare(kind, doc_id, identity)
+    document = {"kind": kind, "id": doc_id}
+    if os.path.exists(path):
+        return enqueue("render_invoice", params, identity, priority, result=path, document=document)
+
+    params["data"] = build()
+    return enqueue("render_invoice", params, identity, priority, document=document)
+
+
+def wait(job_id, timeout):
+    """Poll a job until it finishes or ``timeout`` seconds pass; returns the job, or None if it is gone"""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = _jobs().find_one({"_id": job_id})
+        if not job or job["status"] in ("complete", "failed") or time.monotonic() >= deadline:
+            return job
+        time.sleep(SYNC_POLL)
+
+
+def download_response(kind, doc_id, identity):
+    """Send a registered document, rendering it through the queue on a cache miss.
+
+    The request thread waits at most ``SYNC_WAIT`` seconds, and only when
+    this process runs a dispatcher; otherwise, or if the render takes longer,
+    it answers 202 with the job's ``status_url`` for the client to poll.
+    """
+    params, path, build = _prepare(kind, doc_id, identity)
+    if not os.path.exists(path):
+        params["data"] = build()
+        job = enqueue("render_invoice", params, identity, "high", document={"kind": kind, "id": doc_id})
+        job_id = job["_id"]
+        job = wait(job_id, SYNC_WAIT) if _dispatching else job
+        if job is None:
+            raise JobError("The render job was removed before it finished, please retry", 503)
+        if job["status"] == "failed":
+            raise RuntimeError(job["error"])
+        if job["status"] != "complete":
+            return jsonify(success=True, job_id=job_id, status=job["status"], status_url=f"/jobs/{job_id}"), 202
+        path = job["result"]
+    return invoice_cache.send_invoice(path, DOCUMENTS[kind][1](doc_id))
+
+
+def _busy_owners(jobs):
+    pipeline = [
+        {"$match": {"status": "running"}},
+        {"$group": {"_id": "$owner", "running": {"$sum": 1}}},
+        {"$match": {"running": {"$gte": MAX_RUNNING_PER_USER}}}
+    ]
+    return [row["_id"] for row in jobs.aggregate(pipeline)]
+
+
+def _claim(jobs, busy):
+    now = datetime.utcnow()
+    return jobs.find_one_and_update(
+        {"status": "queued", "owner": {"$nin": busy}},
+        {"$set": {"status": "running", "started_at": now, "lease_until": now + LEASE, "worker": WORKER_ID},
+         "$inc": {"attempts": 1}},
+        sort=[("priority", -1), ("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _finish(job_id, future):
+    _running.pop(job_id, None)
+    now = datetime.utcnow()
+    try:
+        update = {"status": "complete", "result": future.result(), "error": None}
+    except Exception as e:
+        print(f"Job {job_id} failed: {e}")
+        update = {"status": "failed", "error": str(e)}
+    update.update(finished_at=now, expires_at=now + RESULT_LIFETIME)
+    try:
+        _jobs().update_one({"_id": job_id, "worker": WORKER_ID}, {"$set": update, "$unset": {"lease_until": ""}})
+    except Exception as e:
+        print(f"Could not record result of job {job_id}: {e}")
+    # A worker is free again
+    threading.Thread(target=dispatch, daemon=True).start()
+
+
+def requeue_expired(jobs=None):
+    """Give jobs of dead dispatchers back to the queue, or fail them after MAX_ATTEMPTS"""
+    jobs = jobs if jobs is not None else _jobs()
+    now = datetime.utcnow()
+    expired = {"status": "running", "lease_until": {"$lt": now}}
+    jobs.update_many({**expired, "attempts": {"$gte": MAX_ATTEMPTS}},
+                     {"$set": {"status": "failed", "error": "Worker lost", "finished_at": now,
+                               "expires_at": now + RESULT_LIFETIME}})
+    jobs.update_many(expired, {"$set": {"status": "queued"}, "$unset": {"lease_until": "", "worker": ""}})
+
+
+def dispatch():
+    """Claim and start queued jobs while this process has free workers"""
+    if not _dispatch_lock.acquire(blocking=False):
+        return 0
+    started = 0
+    try:
+        jobs = _jobs()
+        busy = None
+        while len(_running) < MAX_WORKERS:
+            if busy is None:
+                busy = _busy_owners(jobs)
+            job = _claim(jobs, busy)
+            if not job:
+                break
+            handler = HANDLERS.get(job["type"])
+            if handler is None:
+                jobs.update_one({"_id": job["_id"]}, {"$set": {"status": "failed", "error": f"Unknown job type {job['type']}"}})
+                continue
+            future = _get_pool().submit(handler, **job["params"])
+            _running[job["_id"]] = future
+            future.add_done_callback(lambda done, job_id=job["_id"]: _finish(job_id, done))
+            started += 1
+            # The claimed job may have put its owner at the cap
+            busy = None
+    finally:
+        _dispatch_lock.release()
+    return started
+
+
+def init_app(app):
+    """Run a dispatcher thread in this process unless JOB_DISPATCHER=off"""
+    global _dispatching
+    if os.environ.get("JOB_DISPATCHER", "on").lower() == "off":
+        return
+    from app.utils.scheduler import start_periodic
+
+    _dispatching = True
+    start_periodic("job-dispatch", POLL_INTERVAL, dispatch)
+    start_periodic("job-requeue", REQUEUE_INTERVAL, requeue_expired)
+
+
+def main(argv=None):
+    global _dispatching
+    parser = argparse.ArgumentParser(description="Run the document job dispatcher")
+    parser.parse_args(argv)
+
+    _dispatching = True
+    print(f"Job dispatcher {WORKER_ID} running with {MAX_WORKERS} workers")
+    last_requeue = 0
+    while True:
+        try:
+            if time.monotonic() - last_requeue >= REQUEUE_INTERVAL:
+                requeue_expired()
+                last_requeue = time.monotonic()
+            dispatch()
+        except Exception as e:
+            print(f"Job dispatcher error: {e}")
+        time.sleep(POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    main()
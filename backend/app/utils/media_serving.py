@@ -0,0 +1,106 @@
+"""Response helper for serving uploaded files.
+
+``send_media()`` sets the caching headers (immutable for content-addressed
+objects, a short revalidating lifetime for legacy files that can be
+overwritten), a strong ETag and Last-Modified, answers conditional requests
+with 304 and lets werkzeug handle ``Range`` requests.
+
+When ``MEDIA_OFFLOAD`` is configured the body is not streamed by the app
+worker at all: ``x-accel`` returns an ``X-Accel-Redirect`` to an internal
+nginx location mapped onto the uploads directory, ``x-sendfile`` sets
+Flask's ``USE_X_SENDFILE`` so Apache/lighttpd send the file.
+
+    MEDIA_OFFLOAD=x-accel MEDIA_ACCEL_PREFIX=/protected-uploads/ python run.py
+
+with an nginx location such as::
+
+    location /protected-uploads/ { internal; alias /srv/artisian/backend/uploads/; }
+"""
+import mimetypes
+import os
+
+from flask import current_app, request, send_file, Response
+
+from app.utils import media_store
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+LEGACY_MAX_AGE = 3600
+
+
+def _uploads_root():
+    return os.path.join(os.getcwd(), "uploads")
+
+
+def is_immutable(path):
+    """Objects (and their derivatives) are named by content hash and never change"""
+    objects_dir = os.path.abspath(media_store.OBJECTS_DIR)
+    return os.path.abspath(path).startswith(objects_dir + os.sep)
+
+
+def _cache_control(immutable):
+    if immutable:
+        return f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={LEGACY_MAX_AGE}, must-revalidate"
+
+
+def _etag(path, stat):
+    name = os.path.basename(path)
+    digest = name.split(".", 1)[0].split("_", 1)[0]
+    if media_store.is_object_name(name) or (is_immutable(path) and len(digest) == 64):
+        return name
+    return f"{int(stat.st_mtime)}-{stat.st_size}"
+
+
+def _offload_response(path, stat, immutable, download_name, as_attachment):
+    """Empty response that tells nginx to send the file itself"""
+    prefix = current_app.config.get("MEDIA_ACCEL_PREFIX", "/protected-uploads/")
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(_uploads_root())).replace(os.sep, "/")
+
+    response = Response(status=200)
+    response.headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + relative
+    response.content_type = mimetypes.guess_type(download_name or path)[0] or "application/octet-stream"
+    response.set_etag(_etag(path, stat))
+    response.last_modified = stat.st_mtime
+    response.headers["Cache-Control"] = _cache_control(immutable)
+    if as_attachment:
+        response.headers["Content-Disposition"] = f'attachment; filename="{download_name or os.path.basename(path)}"'
+    # Answer If-None-Match / If-Modified-Since here; nginx handles Range
+    return response.make_conditional(request.environ)
+
+
+def send_media(path, immutable=None, download_name=None, as_attachment=False):
+    """Serve a file from the uploads tree with caching, conditional and Range support"""
+    if not path or not os.path.isfile(path):
+        return Response("File not found", status=404)
+
+    stat = os.stat(path)
+    if immutable is None:
+        immutable = is_immutable(path)
+
+    offload = current_app.config.get("MEDIA_OFFLOAD")
+    if offload == "x-accel":
+        # Only files inside the uploads tree are reachable through the internal location
+        if os.path.abspath(path).startswith(os.path.abspath(_uploads_root()) + os.sep):
+            return _offload_response(path, stat, immutable, download_name, as_attachment)
+
+    # x-sendfile is handled by send_file through USE_X_SENDFILE
+    response = send_file(
+        path,
+        etag=_etag(path, stat),
+        last_modified=stat.st_mtime,
+        max_age=IMMUTABLE_MAX_AGE if immutable else LEGACY_MAX_AGE,
+        conditional=True,
+        download_name=download_name,
+        as_attachment=as_attachment
+    )
+    response.headers["Cache-Control"] = _cache_control(immutable)
+    return response
+
+
+def init_app(app):
+    """Read MEDIA_OFFLOAD / MEDIA_ACCEL_PREFIX from the environment"""
+    offload = os.environ.get("MEDIA_OFFLOAD", "").lower() or None
+    app.config.setdefault("MEDIA_OFFLOAD", offload)
+    app.config.setdefault("MEDIA_ACCEL_PREFIX", os.environ.get("MEDIA_ACCEL_PREFIX", "/protected-uploads/"))
+    if app.config["MEDIA_OFFLOAD"] == "x-sendfile":
+        app.config["USE_X_SENDFILE"] = True
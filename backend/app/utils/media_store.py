@@ -0,0 +1,445 @@
+"""Content-addressed storage for uploaded files.
+
+Every upload is streamed to a temporary file while its SHA-256 is computed
+and then moved to ``uploads/objects/<aa>/<bb>/<sha256>.<ext>``. Identical
+bytes always end up at the same path, so re-uploads cost no extra disk, and
+because an object never changes its ``/media/<sha256>.<ext>`` URL can be
+cached forever.
+
+Each object has a ``media_objects`` document holding its size, content type
+and a reference count. ``store()`` adds a reference and ``release()`` drops
+one when a document stops pointing at the object (replaced photo, deleted
+product, ...); unreferenced objects are left on disk for the upload garbage
+collector rather than deleted inline.
+
+Form uploads are streamed straight into ``objects/tmp`` by ``UploadRequest``
+while being hashed, so ``store()`` only has to rename the finished file, and
+per-type size limits (``SIZE_LIMITS``) are enforced while the body is still
+arriving. Large files can also be sent in chunks through ``/upload-sessions``
+and then attached with ``claim_upload()``.
+
+New objects are also written to the configured storage backend (see
+``app.utils.storage``), so other app nodes can serve them.
+
+Private files (complaint attachments) are stored with ``private=True`` under
+``uploads/private/`` instead. They get no ``media_objects`` record and no
+URL: ``/media`` only resolves names under ``objects/`` and the ``/uploads``
+handler refuses the private tree, so the owning controller is the only way
+to read them. Documents keep their storage key (``private/ab/cd/<sha256>.pdf``).
+Move attachments stored before this from the ``backend`` directory::
+
+    python -m app.utils.media_store privatize-attachments
+"""
+import argparse
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime
+
+from flask import Request, jsonify, request
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+from app import media_collection, upload_sessions_collection
+from app.utils import storage
+
+OBJECTS_DIR = os.path.join(os.getcwd(), "uploads", "objects")
+PRIVATE_DIR = os.path.join(os.getcwd(), "uploads", "private")
+PRIVATE_PREFIX = "private/"
+TMP_DIR = os.path.join(OBJECTS_DIR, "tmp")
+SESSIONS_DIR = os.path.join(TMP_DIR, "sessions")
+CHUNK_SIZE = 64 * 1024
+
+# Largest accepted file per kind, in bytes
+SIZE_LIMITS = {
+    "image": 10 * 1024 * 1024,
+    "document": 25 * 1024 * 1024,
+    "other": 10 * 1024 * 1024
+}
+# Whole-request cap (MAX_CONTENT_LENGTH); chunked uploads stay below it per chunk
+MAX_REQUEST_SIZE = 32 * 1024 * 1024
+
+IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp", "bmp", "tiff", "svg"}
+DOCUMENT_EXTENSIONS = {"pdf", "doc", "docx", "txt"}
+
+OBJECT_NAME = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]{1,8})$")
+
+
+def is_object_name(name):
+    return bool(name) and bool(OBJECT_NAME.match(name))
+
+
+def object_path(name):
+    """Absolute path of a stored object, or None for a malformed name"""
+    match = OBJECT_NAME.match(name or "")
+    if not match:
+        return None
+    digest = match.group(1)
+    return os.path.join(OBJECTS_DIR, digest[:2], digest[2:4], name)
+
+
+def private_path(name):
+    """Absolute path of a private object; nothing under it is served publicly"""
+    match = OBJECT_NAME.match(name or "")
+    if not match:
+        return None
+    digest = match.group(1)
+    return os.path.join(PRIVATE_DIR, digest[:2], digest[2:4], name)
+
+
+def is_private_key(value):
+    return isinstance(value, str) and value.startswith(PRIVATE_PREFIX)
+
+
+def media_url(name):
+    """Stable, immutable URL path of a stored object"""
+    return f"/media/{name}"
+
+
+def upload_kind(filename, content_type=None):
+    """``image``, ``document`` or ``other``, used to pick the size limit"""
+    extension = (filename or "").rsplit(".", 1)[-1].lower() if "." in (filename or "") else ""
+    if extension in IMAGE_EXTENSIONS or (content_type or "").startswith("image/"):
+        return "image"
+    if extension in DOCUMENT_EXTENSIONS or content_type == "application/pdf":
+        return "document"
+    return "other"
+
+
+def size_limit(filename, content_type=None):
+    return SIZE_LIMITS[upload_kind(filename, content_type)]
+
+
+def _too_large(filename, limit):
+    return RequestEntityTooLarge(
+        description=f"{filename or 'Upload'} exceeds the {limit // (1024 * 1024)} MB limit"
+    )
+
+
+class StreamingUpload:
+    """Upload target that writes to ``objects/tmp`` and hashes as the form is parsed.
+
+    Werkzeug writes each multipart file part into this object, so the body is
+    never buffered in memory and ``store()`` can move the finished temp file
+    into place without reading it again. Exceeding ``limit`` aborts the
+    request with 413 as soon as the limit is crossed.
+    """
+
+    def __init__(self, filename, limit):
+        os.makedirs(TMP_DIR, exist_ok=True)
+        handle, self.path = tempfile.mkstemp(dir=TMP_DIR)
+        self.file = os.fdopen(handle, "w+b")
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.filename = filename
+        self.limit = limit
+        self.committed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.limit:
+            raise _too_large(self.filename, self.limit)
+        self.hasher.update(data)
+        return self.file.write(data)
+
+    def close(self):
+        """Close the handle and drop the temp file unless ``store()`` kept it"""
+        if not self.file.closed:
+            self.file.close()
+        if not self.committed and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        # read/seek/tell/flush/... go to the underlying file
+        return getattr(self.file, name)
+
+
+class UploadRequest(Request):
+    """Request class that streams uploaded files to disk through ``StreamingUpload``"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        limit = size_limit(filename, content_type)
+        # Reject before reading the part when its own declared size rules it out. The
+        # request's total length covers every part, so it says nothing about this one;
+        # MAX_CONTENT_LENGTH caps the total and StreamingUpload.write() the actual bytes.
+        if content_length and content_length > limit:
+            raise _too_large(filename, limit)
+        return StreamingUpload(filename, limit)
+
+
+def _extension(filename, content_type=None):
+    extension = secure_filename(filename or "").rsplit(".", 1)
+    if len(extension) == 2 and re.match(r"^[A-Za-z0-9]{1,8}$", extension[1]):
+        return extension[1].lower()
+    guessed = mimetypes.guess_extension(content_type or "") if content_type else None
+    return guessed.lstrip(".") if guessed else "bin"
+
+
+def object_name(digest, filename, content_type=None):
+    return f"{digest}.{_extension(filename, content_type)}"
+
+
+def store(file, filename=None, private=False):
+    """Store an uploaded file (werkzeug FileStorage or binary stream) and add a reference.
+
+    Returns ``{"name", "path", "key", "url", "sha256", "size", "content_type", "filename"}``;
+    ``url`` is None for a private file.
+    """
+    stream = getattr(file, "stream", file)
+    filename = filename or getattr(file, "filename", "") or ""
+    content_type = getattr(file, "mimetype", None) or mimetypes.guess_type(filename)[0]
+
+    if isinstance(stream, StreamingUpload) and not stream.committed:
+        # Already on disk and hashed while the request was parsed
+        stream.flush()
+        stream.file.close()
+        stream.committed = True
+        return store_path(stream.path, stream.hasher.hexdigest(), stream.size, filename, content_type,
+                          private=private)
+
+    os.makedirs(TMP_DIR, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    handle, temp_path = tempfile.mkstemp(dir=TMP_DIR)
+    try:
+        with os.fdopen(handle, "wb") as temp_file:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                temp_file.write(chunk)
+                size += len(chunk)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return store_path(temp_path, hasher.hexdigest(), size, filename, content_type, private=private)
+
+
+def store_path(temp_path, digest, size, filename, content_type, reference=True, private=False):
+    """Move a hashed temp file to its object path and record it"""
+    name = object_name(digest, filename, content_type)
+    path = private_path(name) if private else object_path(name)
+    try:
+        if os.path.exists(path):
+            # Same bytes already stored: keep the existing object
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+            storage.replicate(path, content_type)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if not private:
+        add_reference(name, size=size, content_type=content_type, filename=filename, count=1 if reference else 0)
+
+    return {
+        "name": name,
+        "path": path,
+        "key": storage.key_for_path(path),
+        "url": None if private else media_url(name),
+        "sha256": digest,
+        "size": size,
+        "content_type": content_type,
+        "filename": filename
+    }
+
+
+def add_reference(name, size=None, content_type=None, filename=None, count=1):
+    """Count one more document pointing at ``name``"""
+    now = datetime.utcnow()
+    media_collection.update_one(
+        {"_id": name},
+        {
+            "$inc": {"refcount": count},
+            "$set": {"last_referenced_at": now},
+            "$setOnInsert": {
+                "size": size,
+                "content_type": content_type,
+                "original_filename": filename,
+                "created_at": now
+            }
+        },
+        upsert=True
+    )
+
+
+def name_from_reference(value):
+    """Object name from a stored field value (name, /media URL, absolute URL or path)"""
+    if not value:
+        return None
+    name = str(value).replace("\\", "/").rsplit("/", 1)[-1].split("?", 1)[0]
+    return name if is_object_name(name) else None
+
+
+def release(value):
+    """Drop one reference to the object behind ``value``; legacy (non-object) values are ignored"""
+    name = name_from_reference(value)
+    if not name:
+        return
+    try:
+        media_collection.update_one(
+            {"_id": name, "refcount": {"$gt": 0}},
+            {"$inc": {"refcount": -1}, "$set": {"released_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        print(f"Error releasing media object {name}: {e}")
+
+
+def locate(value, legacy_folder=None):
+    """Absolute path of an existing file for a stored value, checking legacy folders first"""
+    if not value:
+        return None
+    value = str(value)
+    if is_private_key(value):
+        path = storage.path_for_key(value)
+        if os.path.abspath(path).startswith(os.path.abspath(PRIVATE_DIR) + os.sep):
+            _fetch_remote(path)
+            return path if os.path.exists(path) else None
+        return None
+    if os.path.isabs(value) and os.path.exists(value):
+        return value
+    filename = os.path.basename(value.replace("\\", "/"))
+    if legacy_folder:
+        legacy_path = os.path.join(legacy_folder, filename)
+        if os.path.exists(legacy_path):
+            return legacy_path
+    path = object_path(filename)
+    if path and os.path.exists(path):
+        return path
+    return None
+
+
+def claim_upload(upload_id, identity, private=False):
+    """Take a completed chunked upload owned by ``identity`` and add a reference to it.
+
+    Returns the same dict as ``store()``, or None when there is no such upload.
+    A private claim copies the bytes into the private tree and leaves the
+    public object unreferenced, for the upload garbage collector.
+    """
+    session = upload_sessions_collection.find_one_and_update(
+        {"_id": upload_id, "owner": identity, "status": "complete"},
+        {"$set": {"status": "claimed", "claimed_at": datetime.utcnow()}}
+    )
+    if not session:
+        return None
+    stored = session["object"]
+    if private:
+        return _copy_private(stored)
+    add_reference(stored["name"])
+    # Presigned uploads went straight to the object store; fetch a local copy for the image pipeline
+    return {**stored, "path": ensure_local(stored["name"])}
+
+
+def _copy_private(stored):
+    source = ensure_local(stored["name"])
+    if not source or not os.path.exists(source):
+        return None
+    os.makedirs(TMP_DIR, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=TMP_DIR)
+    os.close(handle)
+    shutil.copyfile(source, temp_path)
+    return store_path(temp_path, stored["sha256"], stored["size"], stored["filename"],
+                      stored.get("content_type"), private=True)
+
+
+def _fetch_remote(path):
+    """Download ``path`` from the storage backend when this node lacks it"""
+    if path and not os.path.exists(path) and storage.get_storage().remote:
+        try:
+            storage.get_storage().download(storage.key_for_path(path), path)
+        except Exception as e:
+            print(f"Error downloading media object {os.path.basename(path)}: {e}")
+
+
+def ensure_local(name):
+    """Local path of an object, downloading it from the storage backend when this node lacks it"""
+    path = object_path(name)
+    _fetch_remote(path)
+    return path
+
+
+def make_private(value, legacy_folder=None):
+    """Storage key of a private copy of the file behind ``value``, releasing the public one.
+
+    Returns ``value`` unchanged when it is already private, None when the file is missing.
+    """
+    if is_private_key(value):
+        return value
+    path = locate(value, legacy_folder)
+    if not path:
+        return None
+    with open(path, "rb") as file:
+        stored = store(file, filename=os.path.basename(path), private=True)
+    release(value)
+    return stored["key"]
+
+
+def store_from_request(field, identity=None, private=False):
+    """Store ``request.files[field]`` or claim the chunked upload named by ``<field>_upload_id``"""
+    file = request.files.get(field)
+    if file and file.filename:
+        return store(file, private=private)
+    upload_id = request.form.get(f"{field}_upload_id")
+    if upload_id and identity:
+        return claim_upload(upload_id, identity, private=private)
+    return None
+
+
+def init_app(app):
+    """Stream form uploads to disk and cap request sizes"""
+    app.request_class = UploadRequest
+    app.config.setdefault("MAX_CONTENT_LENGTH", MAX_REQUEST_SIZE)
+
+    @app.before_request
+    def parse_uploads():
+        # Parse multipart bodies before the view runs so a 413 from a size
+        # limit reaches the error handler instead of a view's generic except
+        if request.mimetype == "multipart/form-data":
+            request.files
+
+    @app.errorhandler(RequestEntityTooLarge)
+    def upload_too_large(e):
+        return jsonify(success=False, message=e.description), 413
+
+
+LEGACY_ATTACHMENTS_DIR = os.path.join(os.getcwd(), "uploads", "complaints")
+
+
+def privatize_attachments(complaints):
+    """Move every complaint attachment still under ``objects/`` or ``uploads/complaints`` to the private tree"""
+    moved = missing = 0
+    query = {"attachment": {"$nin": [None, ""], "$not": {"$regex": f"^{PRIVATE_PREFIX}"}}}
+    for complaint in complaints.find(query, {"attachment": 1}):
+        key = make_private(complaint["attachment"], LEGACY_ATTACHMENTS_DIR)
+        if key is None:
+            missing += 1
+            print(f"Attachment of complaint {complaint['_id']} not found: {complaint['attachment']}")
+            continue
+        complaints.update_one({"_id": complaint["_id"]}, {"$set": {"attachment": key}})
+        moved += 1
+    return moved, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Content-addressed media maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("privatize-attachments", help="move complaint attachments out of the public media tree")
+    parser.parse_args(argv)
+
+    from app import db
+
+    moved, missing = privatize_attachments(db["complaints"])
+    print(f"{moved} attachments moved, {missing} missing; run the upload GC to drop the public copies")
+
+
+if __name__ == "__main__":
+    main()
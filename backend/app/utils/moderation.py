@@ -0,0 +1,86 @@
+"""Apply one admin action to many documents with a single ``bulk_write``.
+
+The bulk moderation endpoints accept ``{"ids": [...], ...}`` and answer
+with one result per id, in request order::
+
+    {"id": "...", "result": "updated" | "unchanged" | "not_found" | "invalid_id" | "conflict"}
+
+``apply()`` costs three round trips for the whole batch: one ``find`` for
+the current state of the documents, one unordered ``bulk_write`` and, only
+if another request changed some of them in between, one more ``find``.
+Status changes are written with the previously read status in the filter,
+so a concurrent change is reported as ``conflict`` instead of being
+overwritten, and the platform counters move exactly once per change.
+"""
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.utils import counters
+
+MAX_BATCH = 500
+RESULTS = ("updated", "unchanged", "not_found", "invalid_id", "conflict")
+
+
+def parse_ids(data):
+    """The request's ``ids`` (deduplicated, order kept); raises ValueError"""
+    ids = (data or {}).get("ids")
+    if not isinstance(ids, list) or not ids:
+        raise ValueError("ids must be a non-empty list")
+    if len(ids) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} ids per request")
+    return list(dict.fromkeys(str(item) for item in ids))
+
+
+def apply(collection, ids, update, status=None, counter=None, skip=None, projection=None, always=False):
+    """``$set`` ``update`` on the documents ``ids``; returns ``(results, summary)``.
+
+    ``status`` is the status the update sets: documents already in it are
+    ``unchanged`` (unless ``always``, for updates carrying more than the
+    status) and the move is recorded on ``counter``. Without a status,
+    ``skip(doc)`` may mark documents that need no change; ``projection``
+    names the fields it reads.
+    """
+    results = {}
+    object_ids = {}
+    for item in ids:
+        if ObjectId.is_valid(item):
+            object_ids[item] = ObjectId(item)
+        else:
+            results[item] = "invalid_id"
+
+    projection = {"status": 1} if status is not None else (projection or {"_id": 1})
+    current = {str(doc["_id"]): doc for doc in collection.find({"_id": {"$in": list(object_ids.values())}}, projection)}
+
+    operations, previous = [], {}
+    for item, object_id in object_ids.items():
+        doc = current.get(item)
+        if doc is None:
+            results[item] = "not_found"
+        elif (status is not None and not always and doc.get("status") == status) or (skip and skip(doc)):
+            results[item] = "unchanged"
+        else:
+            query = {"_id": object_id}
+            if status is not None:
+                previous[item] = query["status"] = doc.get("status")
+            operations.append(UpdateOne(query, {"$set": update}))
+            results[item] = "updated"
+
+    if operations:
+        written = collection.bulk_write(operations, ordered=False)
+        if status is not None and written.matched_count < len(operations):
+            # Some changed since they were read: keep those whose status we did set
+            attempted = [object_ids[item] for item in previous]
+            now = {str(doc["_id"]): doc.get("status") for doc in collection.find({"_id": {"$in": attempted}}, {"status": 1})}
+            for item in previous:
+                if now.get(item) != status:
+                    results[item] = "conflict"
+        if counter:
+            for item, old in previous.items():
+                if results[item] == "updated":
+                    counters.move(counter, old, status)
+
+    ordered = [{"id": item, "result": results[item]} for item in ids]
+    summary = {name: 0 for name in RESULTS}
+    for row in ordered:
+        summary[row["result"]] += 1
+    return ordered, summary
@@ -0,0 +1,271 @@
+"""Offline "frequently bought together" recommendations.
+
+Builds item-to-item co-occurrence counts from order line items and stores the
+top-K neighbours of every product/material in the ``recommendations``
+collection, keyed by the item id, so ``/product/<id>/related`` is a single
+primary-key read.
+
+Two order shapes exist: checkout orders with ``product_ids``/``material_ids``
+arrays and cart orders with an ``items[]`` list of ``{"id": ...}``. Both are
+flattened into one basket of item ids per order.
+
+The running totals live in ``item_cooccurrence`` (one document per item with
+the number of orders it appeared in and per-neighbour pair counts). A full
+run recomputes them from scratch; an incremental run only folds in orders
+created after the last processed ``_id`` and re-ranks the items they touched.
+
+Run from the ``backend`` directory:
+
+    python -m app.utils.recommendations            # incremental refresh
+    python -m app.utils.recommendations --full     # rebuild from all orders
+"""
+import argparse
+import heapq
+import math
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne, ReplaceOne
+
+# numpy/scipy are optional; without them the pair counts are accumulated in
+# plain dictionaries, which is fine for small order histories.
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+TOP_K = 12
+MIN_PAIR_COUNT = 1
+BATCH_SIZE = 1000
+STATE_ID = "recommendations"
+
+
+def order_basket(order):
+    """Distinct item ids (as strings) bought together in one order"""
+    basket = set()
+    for key in ("product_ids", "material_ids"):
+        for item_id in order.get(key) or []:
+            basket.add(str(item_id))
+    for item in order.get("items") or []:
+        if isinstance(item, dict) and item.get("id"):
+            basket.add(str(item["id"]))
+    for item in order.get("material_items") or []:
+        if isinstance(item, dict) and item.get("id"):
+            basket.add(str(item["id"]))
+    return basket
+
+
+def count_cooccurrence(baskets):
+    """Return ``({item: order_count}, {item: {other: pair_count}})`` for the baskets"""
+    baskets = [basket for basket in baskets if basket]
+    if not baskets:
+        return {}, {}
+    if sparse is not None:
+        return _count_sparse(baskets)
+    return _count_python(baskets)
+
+
+def _count_sparse(baskets):
+    """C = Bᵀ·B over the binary order×item incidence matrix B"""
+    items = sorted(set().union(*baskets))
+    position = {item: i for i, item in enumerate(items)}
+
+    rows = np.repeat(np.arange(len(baskets)), [len(basket) for basket in baskets])
+    cols = np.fromiter((position[item] for basket in baskets for item in basket), dtype=np.int64)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(cols), dtype=np.int32), (rows, cols)),
+        shape=(len(baskets), len(items))
+    )
+    cooccurrence = (incidence.T @ incidence).tocsr()
+
+    item_counts = {}
+    pair_counts = {}
+    diagonal = cooccurrence.diagonal()
+    for i, item in enumerate(items):
+        item_counts[item] = int(diagonal[i])
+        start, end = cooccurrence.indptr[i], cooccurrence.indptr[i + 1]
+        neighbours = {
+            items[j]: int(count)
+            for j, count in zip(cooccurrence.indices[start:end], cooccurrence.data[start:end])
+            if j != i
+        }
+        if neighbours:
+            pair_counts[item] = neighbours
+    return item_counts, pair_counts
+
+
+def _count_python(baskets):
+    item_counts = Counter()
+    pair_counts = defaultdict(Counter)
+    for basket in baskets:
+        item_counts.update(basket)
+        for item in basket:
+            row = pair_counts[item]
+            for other in basket:
+                if other != item:
+                    row[other] += 1
+    return dict(item_counts), {item: dict(row) for item, row in pair_counts.items()}
+
+
+def top_neighbours(item, neighbours, item_counts, k=TOP_K):
+    """Rank neighbours by cosine similarity of their order vectors"""
+    own_count = item_counts.get(item, 0)
+    if not own_count:
+        return []
+    scored = []
+    for other, together in neighbours.items():
+        if together < MIN_PAIR_COUNT or not item_counts.get(other):
+            continue
+        score = together / math.sqrt(own_count * item_counts[other])
+        scored.append((score, together, other))
+    return heapq.nlargest(k, scored)
+
+
+def _load_orders(orders_collection, after_id=None):
+    query = {"_id": {"$gt": after_id}} if after_id else {}
+    projection = {"product_ids": 1, "material_ids": 1, "items.id": 1, "material_items.id": 1}
+    last_id = after_id
+    baskets = []
+    for order in orders_collection.find(query, projection).sort("_id", 1).batch_size(BATCH_SIZE):
+        baskets.append(order_basket(order))
+        last_id = order["_id"]
+    return baskets, last_id
+
+
+def _item_details(db, item_ids):
+    """Name/price/image of the given items, looked up in products then materials"""
+    object_ids = [ObjectId(item_id) for item_id in item_ids if ObjectId.is_valid(item_id)]
+    details = {}
+    projection = {"name": 1, "price": 1, "image": 1, "category": 1, "quantity": 1}
+    for kind, collection in (("product", db["product"]), ("material", db["materials"])):
+        for doc in collection.find({"_id": {"$in": object_ids}}, projection):
+            details[str(doc["_id"])] = {
+                "id": str(doc["_id"]),
+                "kind": kind,
+                "name": doc.get("name"),
+                "price": doc.get("price"),
+                "image": doc.get("image"),
+                "category": doc.get("category"),
+                "in_stock": doc.get("quantity", 0) > 0
+            }
+    return details
+
+
+def _write_recommendations(db, items, item_counts, pair_counts, k=TOP_K):
+    """Re-rank ``items`` and upsert their recommendation documents"""
+    ranked = {item: top_neighbours(item, pair_counts.get(item, {}), item_counts, k) for item in items}
+    neighbour_ids = {other for rows in ranked.values() for _, _, other in rows}
+    details = _item_details(db, neighbour_ids)
+
+    now = datetime.utcnow()
+    operations = []
+    for item, rows in ranked.items():
+        related = []
+        for score, together, other in rows:
+            # Items deleted since they were ordered are dropped
+            if other in details:
+                related.append({**details[other], "score": round(score, 4), "count": together})
+        operations.append(ReplaceOne(
+            {"_id": item},
+            {"_id": item, "related": related, "order_count": item_counts.get(item, 0), "updated_at": now},
+            upsert=True
+        ))
+        if len(operations) >= BATCH_SIZE:
+            db["recommendations"].bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        db["recommendations"].bulk_write(operations, ordered=False)
+    return len(ranked)
+
+
+def full_rebuild(db, state_collection, k=TOP_K):
+    """Recompute every count and recommendation from the whole order history"""
+    baskets, last_id = _load_orders(db["orders"])
+    item_counts, pair_counts = count_cooccurrence(baskets)
+
+    db["item_cooccurrence"].delete_many({})
+    operations = [
+        ReplaceOne(
+            {"_id": item},
+            {"_id": item, "orders": count, "pairs": pair_counts.get(item, {})},
+            upsert=True
+        )
+        for item, count in item_counts.items()
+    ]
+    for start in range(0, len(operations), BATCH_SIZE):
+        db["item_cooccurrence"].bulk_write(operations[start:start + BATCH_SIZE], ordered=False)
+
+    db["recommendations"].delete_many({})
+    written = _write_recommendations(db, item_counts, item_counts, pair_counts, k)
+
+    state_collection.update_one(
+        {"_id": STATE_ID},
+        {"$set": {"last_order_id": last_id, "orders": len(baskets), "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return len(baskets), written
+
+
+def incremental_refresh(db, state_collection, k=TOP_K):
+    """Fold orders created since the last run into the counts and re-rank touched items"""
+    state = state_collection.find_one({"_id": STATE_ID})
+    if not state or not state.get("last_order_id"):
+        return full_rebuild(db, state_collection, k)
+
+    baskets, last_id = _load_orders(db["orders"], after_id=state["last_order_id"])
+    delta_counts, delta_pairs = count_cooccurrence(baskets)
+    if not delta_counts:
+        return 0, 0
+
+    operations = []
+    for item, count in delta_counts.items():
+        increments = {"orders": count}
+        for other, together in delta_pairs.get(item, {}).items():
+            increments[f"pairs.{other}"] = together
+        operations.append(UpdateOne({"_id": item}, {"$inc": increments}, upsert=True))
+    db["item_cooccurrence"].bulk_write(operations, ordered=False)
+
+    # Only items that appeared in new orders get re-ranked; their neighbours'
+    # scores drift slightly until the next --full run.
+    touched = set(delta_counts)
+    item_counts = {}
+    pair_counts = {}
+    rows = list(db["item_cooccurrence"].find({"_id": {"$in": list(touched)}}))
+    neighbour_ids = {other for row in rows for other in row.get("pairs", {})}
+    for row in rows:
+        item_counts[row["_id"]] = row.get("orders", 0)
+        pair_counts[row["_id"]] = row.get("pairs", {})
+    for row in db["item_cooccurrence"].find({"_id": {"$in": list(neighbour_ids - touched)}}, {"orders": 1}):
+        item_counts[row["_id"]] = row.get("orders", 0)
+
+    written = _write_recommendations(db, touched, item_counts, pair_counts, k)
+
+    state_collection.update_one(
+        {"_id": STATE_ID},
+        {"$set": {"last_order_id": last_id, "updated_at": datetime.utcnow()},
+         "$inc": {"orders": len(baskets)}},
+        upsert=True
+    )
+    return len(baskets), written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build frequently-bought-together recommendations")
+    parser.add_argument("--full", action="store_true", help="rebuild from the whole order history")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    args = parser.parse_args(argv)
+
+    from app import db, job_state_collection
+
+    if args.full:
+        orders, written = full_rebuild(db, job_state_collection, args.top_k)
+    else:
+        orders, written = incremental_refresh(db, job_state_collection, args.top_k)
+    print(f"Processed {orders} orders, wrote recommendations for {written} items")
+
+
+if __name__ == "__main__":
+    main()
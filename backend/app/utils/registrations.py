@@ -0,0 +1,279 @@
+"""Event registrations, one document per (event, user) in ``event_registrations``.
+
+Registrations used to be pushed into a ``registered_users`` array on the
+event, so every event listing loaded every attendee. Now the event only
+carries two numbers:
+
+* ``registered_count``: registrations held, kept by ``$inc`` alongside
+  every insert and delete here;
+* ``capacity``: the maximum, or ``None`` for no limit.
+
+``register()`` first takes a seat with one conditional ``$inc`` (matching
+only while ``registered_count < capacity``), so concurrent sign-ups can
+never overbook, then inserts the registration. The unique
+``(event_id, user_id)`` index turns a double registration into a
+``DuplicateKeyError``, which gives the seat back.
+
+Readers only look at ``event_registrations``, so the legacy arrays must be
+moved before this code serves requests: until then their users could
+register again and ``registered_count`` reads 0. ``create_app()`` runs
+``ensure_migrated()`` for that, which finishes an interrupted migration and
+is a single ``job_state`` lookup once it has completed. Large deployments
+can run it ahead of the rollout from the ``backend`` directory (resumable,
+safe to run again)::
+
+    python -m app.utils.registrations
+    python -m app.utils.registrations --restart
+"""
+import argparse
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+BATCH_SIZE = 200
+STATE_ID = "event_registrations"
+
+
+class RegistrationError(Exception):
+    """A registration request that cannot be served; carries the HTTP status"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _collections():
+    from app import event_registrations_collection, events_collection
+    return events_collection, event_registrations_collection
+
+
+def _event_id(event_id):
+    if not ObjectId.is_valid(str(event_id)):
+        raise RegistrationError("Invalid event ID")
+    return ObjectId(str(event_id))
+
+
+def parse_capacity(value):
+    """Capacity from a form value: a positive whole number, or None (blank) for no limit"""
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        capacity = int(str(value).strip())
+    except ValueError:
+        raise RegistrationError("Capacity must be a whole number")
+    if capacity < 1:
+        raise RegistrationError("Capacity must be at least 1")
+    return capacity
+
+
+def has_room(event):
+    capacity = event.get("capacity")
+    return capacity is None or event.get("registered_count", 0) < capacity
+
+
+def _take_seat(events, event_id, enforce_capacity):
+    query = {"_id": event_id}
+    if enforce_capacity:
+        query["$or"] = [
+            {"capacity": None},
+            {"$expr": {"$lt": [{"$ifNull": ["$registered_count", 0]}, "$capacity"]}}
+        ]
+    if events.update_one(query, {"$inc": {"registered_count": 1}}).matched_count:
+        return
+    if events.count_documents({"_id": event_id}, limit=1):
+        raise RegistrationError("This event is full", 409)
+    raise RegistrationError("Event not found", 404)
+
+
+def register(event_id, user_id, enforce_capacity=True, **fields):
+    """Register ``user_id`` for the event; raises RegistrationError (full, duplicate, not found)"""
+    events, registrations = _collections()
+    event_id = _event_id(event_id)
+    _take_seat(events, event_id, enforce_capacity)
+
+    registration = {
+        "event_id": event_id,
+        "user_id": user_id,
+        "payment_status": "pending",
+        "registration_date": datetime.now(),
+        **fields
+    }
+    try:
+        registrations.insert_one(registration)
+    except DuplicateKeyError:
+        events.update_one({"_id": event_id}, {"$inc": {"registered_count": -1}})
+        raise RegistrationError("You are already registered for this event")
+    except Exception:
+        events.update_one({"_id": event_id}, {"$inc": {"registered_count": -1}})
+        raise
+    return registration
+
+
+def cancel(event_id, user_id):
+    """Remove the registration and give its seat back; False if there was none"""
+    events, registrations = _collections()
+    event_id = _event_id(event_id)
+    if not registrations.delete_one({"event_id": event_id, "user_id": user_id}).deleted_count:
+        return False
+    events.update_one({"_id": event_id}, {"$inc": {"registered_count": -1}})
+    return True
+
+
+def record_payment(event_id, user_id, payment_id):
+    """Mark the user's registration paid, registering them if needed (idempotent per payment).
+
+    The seat was paid for, so capacity is checked when the checkout is
+    created rather than here.
+    """
+    events, registrations = _collections()
+    event_id = _event_id(event_id)
+    paid = {"payment_status": "completed", "payment_id": payment_id, "payment_date": datetime.now()}
+    if registrations.find_one({"payment_id": payment_id}, {"_id": 1}):
+        return False
+    if registrations.update_one({"event_id": event_id, "user_id": user_id}, {"$set": paid}).matched_count:
+        return True
+    try:
+        register(event_id, user_id, enforce_capacity=False, **paid)
+    except RegistrationError as e:
+        if e.status != 400:
+            raise
+        # Registered concurrently: mark that registration paid instead
+        registrations.update_one({"event_id": event_id, "user_id": user_id}, {"$set": paid})
+    return True
+
+
+def find(event_id, user_id, projection=None):
+    """The user's registration for the event, or None"""
+    _, registrations = _collections()
+    return registrations.find_one({"event_id": _event_id(event_id), "user_id": user_id}, projection)
+
+
+def for_user(user_id):
+    """The user's registrations keyed by event id"""
+    _, registrations = _collections()
+    return {reg["event_id"]: reg for reg in registrations.find({"user_id": user_id})}
+
+
+def for_event(event_id):
+    _, registrations = _collections()
+    return list(registrations.find({"event_id": _event_id(event_id)}).sort("registration_date", 1))
+
+
+def delete_for_event(event_id):
+    """Drop the registrations of a deleted event"""
+    _, registrations = _collections()
+    return registrations.delete_many({"event_id": _event_id(event_id)}).deleted_count
+
+
+def ensure_indexes(registrations):
+    registrations.create_index([("event_id", 1), ("user_id", 1)], unique=True)
+    registrations.create_index([("user_id", 1)])
+    registrations.create_index([("payment_id", 1)], sparse=True)
+
+
+def _legacy_registrations(event):
+    """Registration documents for an event's ``registered_users`` array, one per user"""
+    found = {}
+    for entry in event.get("registered_users") or []:
+        user_id = entry.get("user_id")
+        if not user_id:
+            continue
+        doc = {key: value for key, value in entry.items() if key != "_id"}
+        doc["event_id"] = event["_id"]
+        doc.setdefault("payment_status", "pending")
+        doc.setdefault("registration_date", doc.get("payment_date"))
+        # A user registered twice keeps the paid entry
+        if user_id not in found or doc.get("payment_status") == "completed":
+            found[user_id] = doc
+    return list(found.values())
+
+
+def migrate(events, registrations, state_collection, batch_size=BATCH_SIZE, restart=False):
+    """Move every ``registered_users`` array into ``registrations`` and set ``registered_count``.
+
+    Checkpointed by event ``_id``; upserts on (event_id, user_id) make an
+    interrupted batch safe to repeat. Events without the array still get
+    their count recomputed, so the run also repairs drifted counters.
+    """
+    state = {} if restart else (state_collection.find_one({"_id": STATE_ID}) or {})
+    last_id = state.get("last_id")
+    moved = state.get("moved", 0) if not restart else 0
+    if state.get("completed") and not restart:
+        print("Registrations already migrated, use --restart to run again")
+        return moved
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = list(events.find(query, {"registered_users": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        operations = []
+        for event in batch:
+            for doc in _legacy_registrations(event):
+                key = {"event_id": doc["event_id"], "user_id": doc["user_id"]}
+                operations.append(UpdateOne(key, {"$setOnInsert": doc}, upsert=True))
+                if doc.get("payment_status") == "completed":
+                    # A paid legacy entry wins over a pending registration made since
+                    operations.append(UpdateOne({**key, "payment_status": {"$ne": "completed"}}, {"$set": doc}))
+        if operations:
+            moved += registrations.bulk_write(operations, ordered=False).upserted_count
+
+        event_ids = [event["_id"] for event in batch]
+        counts = {row["_id"]: row["count"] for row in registrations.aggregate([
+            {"$match": {"event_id": {"$in": event_ids}}},
+            {"$group": {"_id": "$event_id", "count": {"$sum": 1}}}
+        ])}
+        # The array is only dropped once its registrations are stored
+        events.bulk_write([
+            UpdateOne({"_id": event_id}, {
+                "$set": {"registered_count": counts.get(event_id, 0)},
+                "$unset": {"registered_users": ""}
+            }) for event_id in event_ids
+        ], ordered=False)
+
+        last_id = batch[-1]["_id"]
+        state_collection.update_one(
+            {"_id": STATE_ID},
+            {"$set": {"last_id": last_id, "moved": moved, "completed": False, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        print(f"Events up to {last_id}: {moved} registrations moved")
+
+    state_collection.update_one(
+        {"_id": STATE_ID},
+        {"$set": {"completed": True, "completed_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return moved
+
+
+def ensure_migrated():
+    """Run (or finish) the migration unless it has completed; called before serving requests"""
+    from app import event_registrations_collection, events_collection, job_state_collection
+
+    if (job_state_collection.find_one({"_id": STATE_ID}, {"completed": 1}) or {}).get("completed"):
+        return 0
+    print("Moving event registrations into event_registrations before serving requests")
+    return migrate(events_collection, event_registrations_collection, job_state_collection)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move event registrations into event_registrations")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args(argv)
+
+    from app import event_registrations_collection, events_collection, job_state_collection
+
+    ensure_indexes(event_registrations_collection)
+    moved = migrate(events_collection, event_registrations_collection, job_state_collection,
+                    batch_size=args.batch_size, restart=args.restart)
+    print(f"{moved} registrations moved")
+
+
+if __name__ == "__main__":
+    main()
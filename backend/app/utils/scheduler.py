@@ -0,0 +1,50 @@
+"""Tiny in-process scheduler for periodic background work.
+
+Each task runs on its own daemon thread, so a slow task never delays the
+others and the threads never keep the process alive on shutdown.
+"""
+import threading
+import time
+import traceback
+
+_tasks = {}
+_tasks_lock = threading.Lock()
+
+
+def start_periodic(name, interval, func, run_immediately=True):
+    """Run ``func()`` every ``interval`` seconds on a daemon thread.
+
+    Starting a task that is already running is a no-op, so this is safe to
+    call from ``create_app`` even when the app factory runs more than once.
+    """
+    with _tasks_lock:
+        if name in _tasks:
+            return _tasks[name]
+
+        stop_event = threading.Event()
+
+        def loop():
+            if not run_immediately:
+                stop_event.wait(interval)
+            while not stop_event.is_set():
+                started = time.monotonic()
+                try:
+                    func()
+                except Exception as e:
+                    print(f"Scheduled task '{name}' failed: {e}")
+                    traceback.print_exc()
+                elapsed = time.monotonic() - started
+                stop_event.wait(max(interval - elapsed, 0))
+
+        thread = threading.Thread(target=loop, name=f"periodic-{name}", daemon=True)
+        _tasks[name] = stop_event
+        thread.start()
+        return stop_event
+
+
+def stop_all():
+    """Signal every periodic task to stop after its current run"""
+    with _tasks_lock:
+        for stop_event in _tasks.values():
+            stop_event.set()
+        _tasks.clear()
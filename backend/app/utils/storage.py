@@ -0,0 +1,222 @@
+"""Where uploaded media lives: local disk or an S3-compatible object store.
+
+Files are addressed by a key equal to their path under ``uploads/``
+(``objects/ab/cd/<sha256>.jpg``, ``objects/ab/cd/derived/<sha256>_thumb.webp``),
+so every backend uses the same layout as the local uploads directory.
+
+The default ``local`` backend keeps everything on this node's disk. With
+``MEDIA_STORAGE=s3`` every stored object and derivative is also written to
+the bucket, nodes that do not have a file locally redirect to the bucket
+instead of returning 404, and clients can upload directly with presigned PUT
+URLs. MinIO works through ``S3_ENDPOINT_URL``::
+
+    MEDIA_STORAGE=s3 S3_BUCKET=artisian-media S3_ENDPOINT_URL=http://localhost:9000 \\
+    AWS_ACCESS_KEY_ID=minioadmin AWS_SECRET_ACCESS_KEY=minioadmin python run.py
+
+Private files (``private/...`` keys, see ``app.utils.media_store``) are
+written to the bucket too but only ever read back through the app; a
+public bucket (``S3_PUBLIC_URL``) must not expose the ``private/`` prefix.
+
+Credentials are read by boto3 from the usual AWS environment/config files.
+This module must not import ``app`` because image worker processes use it.
+"""
+import os
+import shutil
+import tempfile
+
+try:
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+UPLOADS_ROOT = os.path.join(os.getcwd(), "uploads")
+PRESIGN_EXPIRES = 15 * 60
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_backend = None
+
+
+def key_for_path(path):
+    """Storage key of a file under the uploads directory"""
+    return os.path.relpath(os.path.abspath(path), UPLOADS_ROOT).replace(os.sep, "/")
+
+
+def path_for_key(key):
+    return os.path.join(UPLOADS_ROOT, *key.split("/"))
+
+
+class LocalStorage:
+    """Files stay in the uploads directory of this node"""
+
+    name = "local"
+    remote = False
+    supports_presign = False
+
+    def put_file(self, path, key, content_type=None):
+        target = path_for_key(key)
+        if os.path.abspath(path) != os.path.abspath(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(path, target)
+
+    def head(self, key):
+        path = path_for_key(key)
+        if not os.path.isfile(path):
+            return None
+        return {"size": os.path.getsize(path), "content_type": None}
+
+    def exists(self, key):
+        return os.path.isfile(path_for_key(key))
+
+    def download(self, key, path):
+        self.put_file(path_for_key(key), key_for_path(path))
+
+    def move(self, key, target_key):
+        target = path_for_key(target_key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path_for_key(key), target)
+
+    def delete(self, key):
+        path = path_for_key(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def url(self, key):
+        """Local files are served by the app itself"""
+        return None
+
+    def presign_put(self, key, content_type=None, sha256_b64=None, expires=PRESIGN_EXPIRES):
+        return None
+
+
+class S3Storage:
+    """S3 or any S3-compatible store (MinIO, R2, ...)"""
+
+    name = "s3"
+    remote = True
+    supports_presign = True
+
+    def __init__(self, bucket, endpoint_url=None, region=None, public_url=None):
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            # MinIO and most self-hosted stores need path-style addressing
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if endpoint_url else "auto"})
+        )
+
+    def put_file(self, path, key, content_type=None):
+        extra = {"CacheControl": IMMUTABLE_CACHE_CONTROL}
+        if content_type:
+            extra["ContentType"] = content_type
+        self.client.upload_file(path, self.bucket, key, ExtraArgs=extra)
+
+    def head(self, key):
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {"size": response["ContentLength"], "content_type": response.get("ContentType")}
+
+    def exists(self, key):
+        return self.head(key) is not None
+
+    def download(self, key, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        os.close(handle)
+        try:
+            self.client.download_file(self.bucket, key, temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def move(self, key, target_key):
+        """Server-side copy (metadata included) followed by removal of the source"""
+        self.client.copy_object(Bucket=self.bucket, Key=target_key, CopySource={"Bucket": self.bucket, "Key": key})
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key):
+        """Public bucket URL when configured, otherwise a presigned GET"""
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=PRESIGN_EXPIRES
+        )
+
+    def presign_put(self, key, content_type=None, sha256_b64=None, expires=PRESIGN_EXPIRES):
+        """URL and headers for a direct PUT; the store rejects bodies whose SHA-256 differs"""
+        params = {"Bucket": self.bucket, "Key": key, "CacheControl": IMMUTABLE_CACHE_CONTROL}
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if content_type:
+            params["ContentType"] = content_type
+            headers["Content-Type"] = content_type
+        if sha256_b64:
+            params["ChecksumSHA256"] = sha256_b64
+            headers["x-amz-checksum-sha256"] = sha256_b64
+        url = self.client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires)
+        return {"method": "PUT", "url": url, "headers": headers, "expires_in": expires}
+
+
+def _from_env():
+    backend = os.environ.get("MEDIA_STORAGE", "local").lower()
+    if backend == "local":
+        return LocalStorage()
+    if backend == "s3":
+        if boto3 is None:
+            raise RuntimeError("MEDIA_STORAGE=s3 requires boto3 (pip install boto3)")
+        bucket = os.environ.get("S3_BUCKET")
+        if not bucket:
+            raise RuntimeError("MEDIA_STORAGE=s3 requires S3_BUCKET")
+        return S3Storage(
+            bucket,
+            endpoint_url=os.environ.get("S3_ENDPOINT_URL"),
+            region=os.environ.get("S3_REGION"),
+            public_url=os.environ.get("S3_PUBLIC_URL")
+        )
+    raise RuntimeError(f"Unknown MEDIA_STORAGE backend: {backend}")
+
+
+def get_storage():
+    global _backend
+    if _backend is None:
+        _backend = _from_env()
+    return _backend
+
+
+def replicate(path, content_type=None):
+    """Copy a local uploads file to the configured remote store (no-op for local)"""
+    backend = get_storage()
+    if not backend.remote:
+        return
+    try:
+        backend.put_file(path, key_for_path(path), content_type)
+    except Exception as e:
+        print(f"Error replicating {path} to {backend.name}: {e}")
+
+
+def remote_url(path):
+    """Redirect target for a file this node does not have, or None"""
+    backend = get_storage()
+    if not backend.remote:
+        return None
+    key = key_for_path(path)
+    if key.startswith("..") or not backend.exists(key):
+        return None
+    return backend.url(key)
+
+
+def init_app(app):
+    """Select the backend at startup so configuration errors surface immediately"""
+    backend = get_storage()
+    app.config.setdefault("MEDIA_STORAGE", backend.name)
+    print(f"Media storage backend: {backend.name}")
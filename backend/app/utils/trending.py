@@ -0,0 +1,176 @@
+"""Trending products and auctions from time-bucketed activity counters.
+
+Request handlers call ``record()``, which only bumps an in-memory counter.
+A background task flushes the buffer every few seconds as one ``bulk_write``
+of ``$inc`` upserts into ``activity_counters`` (one document per item per
+hour), so hot paths such as product views never wait on the database.
+
+Another task periodically folds the last ``WINDOW_HOURS`` of buckets into an
+exponentially decayed score per item and stores the ranked, denormalized
+lists in the ``trending`` collection, which ``/home/trending`` reads with a
+single primary-key lookup.
+"""
+import atexit
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# How much each kind of activity contributes to the score
+EVENT_WEIGHTS = {
+    "view": 1,
+    "cart_add": 3,
+    "bid": 4,
+    "review": 5,
+    "purchase": 8
+}
+
+# Item kinds and the collection their details come from
+ITEM_COLLECTIONS = {
+    "product": "product",
+    "material": "materials",
+    "auction": "bids"
+}
+
+BUCKET_HOURS = 1
+WINDOW_HOURS = 7 * 24
+HALF_LIFE_HOURS = 24
+TOP_N = 20
+
+FLUSH_INTERVAL = 10      # seconds
+RECOMPUTE_INTERVAL = 300  # seconds
+
+_buffer = Counter()
+_buffer_lock = threading.Lock()
+
+
+def _bucket_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record(kind, item_id, event, count=1):
+    """Count one activity in memory; never touches the database"""
+    if not item_id or event not in EVENT_WEIGHTS or kind not in ITEM_COLLECTIONS:
+        return
+    key = (kind, str(item_id), _bucket_start(datetime.utcnow()), event)
+    with _buffer_lock:
+        _buffer[key] += count
+
+
+def flush():
+    """Write the buffered counters with one bulk $inc upsert per item bucket"""
+    global _buffer
+    with _buffer_lock:
+        if not _buffer:
+            return 0
+        pending, _buffer = _buffer, Counter()
+
+    increments = {}
+    for (kind, item_id, bucket, event), count in pending.items():
+        increments.setdefault((kind, item_id, bucket), {})[f"counts.{event}"] = count
+
+    from app import db
+
+    operations = [
+        UpdateOne(
+            {"_id": f"{kind}:{item_id}:{bucket:%Y%m%d%H}"},
+            {
+                "$inc": counts,
+                "$setOnInsert": {"kind": kind, "item_id": item_id, "bucket": bucket}
+            },
+            upsert=True
+        )
+        for (kind, item_id, bucket), counts in increments.items()
+    ]
+    try:
+        db["activity_counters"].bulk_write(operations, ordered=False)
+    except Exception:
+        # Put the counts back so the next flush retries them
+        with _buffer_lock:
+            _buffer.update(pending)
+        raise
+    return len(operations)
+
+
+def _score_pipeline(kind, now):
+    weighted = {"$add": [
+        {"$multiply": [{"$ifNull": [f"$counts.{event}", 0]}, weight]}
+        for event, weight in EVENT_WEIGHTS.items()
+    ]}
+    age_hours = {"$divide": [{"$subtract": [now, "$bucket"]}, 3600 * 1000]}
+    # 0.5 ** (age / half_life)
+    decay = {"$pow": [0.5, {"$divide": [age_hours, HALF_LIFE_HOURS]}]}
+    return [
+        {"$match": {"kind": kind, "bucket": {"$gte": now - timedelta(hours=WINDOW_HOURS)}}},
+        {"$group": {
+            "_id": "$item_id",
+            "score": {"$sum": {"$multiply": [weighted, decay]}},
+            "views": {"$sum": {"$ifNull": ["$counts.view", 0]}},
+            "purchases": {"$sum": {"$ifNull": ["$counts.purchase", 0]}},
+            "bids": {"$sum": {"$ifNull": ["$counts.bid", 0]}}
+        }},
+        {"$sort": {"score": -1}},
+        {"$limit": TOP_N * 2}
+    ]
+
+
+def _details(db, kind, item_ids):
+    object_ids = [ObjectId(item_id) for item_id in item_ids if ObjectId.is_valid(item_id)]
+    if kind == "auction":
+        projection = {"name": 1, "image": 1, "current_amount": 1, "end_time": 1, "status": 1}
+        query = {"_id": {"$in": object_ids}, "status": "approved"}
+    else:
+        projection = {"name": 1, "image": 1, "price": 1, "category": 1, "quantity": 1}
+        query = {"_id": {"$in": object_ids}}
+    return {str(doc["_id"]): doc for doc in db[ITEM_COLLECTIONS[kind]].find(query, projection)}
+
+
+def recompute():
+    """Rebuild the ranked trending list of every item kind"""
+    from app import db
+
+    now = datetime.utcnow()
+    for kind in ITEM_COLLECTIONS:
+        scored = list(db["activity_counters"].aggregate(_score_pipeline(kind, now)))
+        details = _details(db, kind, [row["_id"] for row in scored])
+
+        items = []
+        for row in scored:
+            doc = details.get(row["_id"])
+            # Deleted items and closed auctions drop out of the list
+            if not doc:
+                continue
+            doc["_id"] = str(doc["_id"])
+            items.append({
+                **doc,
+                "score": round(row["score"], 3),
+                "views": row["views"],
+                "purchases": row["purchases"],
+                "bids": row["bids"]
+            })
+            if len(items) >= TOP_N:
+                break
+
+        db["trending"].replace_one(
+            {"_id": kind},
+            {"_id": kind, "items": items, "computed_at": now},
+            upsert=True
+        )
+
+
+def init_app(app):
+    """Start the flush and recompute tasks"""
+    from app.utils.scheduler import start_periodic
+
+    start_periodic("trending-flush", FLUSH_INTERVAL, flush, run_immediately=False)
+    start_periodic("trending-recompute", RECOMPUTE_INTERVAL, recompute)
+    atexit.register(_flush_on_exit)
+
+
+def _flush_on_exit():
+    try:
+        flush()
+    except Exception as e:
+        print(f"Trending: could not flush counters on exit: {e}")
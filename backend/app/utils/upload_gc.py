@@ -0,0 +1,226 @@
+"""Mark-and-sweep garbage collection for files under ``uploads/``.
+
+Mark: stream every document field that can point at an upload (product and
+material images, event posters, auction images, complaint attachments,
+profile photos and the image snapshots kept on order items) with a narrow
+projection and collect the referenced file names. Completed chunked/presigned uploads that are waiting to be claimed
+are live too.
+
+Sweep: walk the uploads directory and report every file that is not live
+and was last modified before the grace period. Derivatives in ``derived/``
+live as long as their original does; leftover temp files and part files of
+expired upload sessions are swept as well. Objects whose ``media_objects``
+reference count is still positive are never removed, even if no document
+field was found for them.
+
+Dry run by default; pass ``--apply`` to delete::
+
+    python -m app.utils.upload_gc                 # report only
+    python -m app.utils.upload_gc --apply --grace-days 14
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from app.utils import storage
+
+GRACE_DAYS = 7
+REPORT_LIMIT = 20
+
+# (collection name, fields holding an upload reference); dotted paths
+# descend into arrays of subdocuments
+REFERENCE_FIELDS = [
+    ("product", ["image"]),
+    ("materials", ["image"]),
+    ("events", ["poster"]),
+    ("bids", ["image"]),
+    ("complaints", ["attachment"]),
+    ("users", ["profile_photo"]),
+    ("seller", ["profilePhoto", "profile_photo"]),
+    ("instructor", ["profile_photo"]),
+    # Orders copy the product image, which must outlive a replaced product photo
+    ("orders", ["items.image"])
+]
+
+
+def file_name(value):
+    """Bare file name from a stored name, path, /uploads or /media URL"""
+    if not value or not isinstance(value, str):
+        return None
+    return value.replace("\\", "/").split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1] or None
+
+
+def _values(doc, path):
+    """Values at a dotted ``path``, following arrays along the way"""
+    values = [doc]
+    for key in path.split("."):
+        found = []
+        for value in values:
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, dict) and key in item:
+                    found.append(item[key])
+        values = found
+    return [item for value in values for item in (value if isinstance(value, list) else [value])]
+
+
+def _stem(name):
+    return name.rsplit(".", 1)[0]
+
+
+def mark(db):
+    """Set of file names referenced by any document"""
+    live = set()
+    for collection_name, fields in REFERENCE_FIELDS:
+        projection = {field: 1 for field in fields}
+        # Any non-empty string; on an array path, any element holding one
+        query = {"$or": [{field: {"$gt": ""}} for field in fields]}
+        for doc in db[collection_name].find(query, projection).batch_size(1000):
+            for field in fields:
+                for value in _values(doc, field):
+                    name = file_name(value)
+                    if name:
+                        live.add(name)
+
+    # Finished uploads that a form has not claimed yet
+    for session in db["upload_sessions"].find({"status": "complete"}, {"object.name": 1}):
+        name = (session.get("object") or {}).get("name")
+        if name:
+            live.add(name)
+    return live
+
+
+def _walk(root):
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def sweep_candidates(db, live, grace_days, root=None):
+    """Yield ``(path, size, reason)`` for every collectable file older than the grace period"""
+    from app.utils import media_store, image_pipeline
+
+    root = root or storage.UPLOADS_ROOT
+    cutoff = time.time() - grace_days * 86400
+    live_stems = {_stem(name) for name in live}
+    open_sessions = {session["_id"] for session in db["upload_sessions"].find({}, {"_id": 1})}
+    tmp_dir = os.path.abspath(media_store.TMP_DIR)
+    sessions_dir = os.path.abspath(media_store.SESSIONS_DIR)
+
+    for entry in _walk(root):
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > cutoff:
+            continue
+        directory = os.path.abspath(os.path.dirname(entry.path))
+        name = entry.name
+
+        if directory == sessions_dir:
+            if _stem(name) not in open_sessions:
+                yield entry.path, stat.st_size, "expired upload session"
+        elif directory == tmp_dir:
+            yield entry.path, stat.st_size, "stale temp file"
+        elif os.path.basename(directory) == image_pipeline.DERIVED_DIR:
+            if _stem(name).rsplit("_", 1)[0] not in live_stems:
+                yield entry.path, stat.st_size, "orphaned derivative"
+        elif name not in live:
+            yield entry.path, stat.st_size, "unreferenced"
+
+
+def collect(db, media_collection, grace_days=GRACE_DAYS, apply=False, root=None):
+    """Run a full mark and sweep; returns a summary dict"""
+    from app.utils import media_store
+
+    started = datetime.utcnow()
+    live = mark(db)
+    summary = {
+        "live": len(live),
+        "files": 0,
+        "bytes": 0,
+        "by_reason": defaultdict(lambda: {"files": 0, "bytes": 0}),
+        "samples": [],
+        "skipped_referenced": 0,
+        "deleted": 0
+    }
+
+    for path, size, reason in sweep_candidates(db, live, grace_days, root):
+        name = os.path.basename(path)
+        if media_store.is_object_name(name):
+            # Count-based safety net for references the mark phase cannot see
+            record = media_collection.find_one({"_id": name}, {"refcount": 1})
+            if record and record.get("refcount", 0) > 0:
+                summary["skipped_referenced"] += 1
+                continue
+
+        summary["files"] += 1
+        summary["bytes"] += size
+        summary["by_reason"][reason]["files"] += 1
+        summary["by_reason"][reason]["bytes"] += size
+        if len(summary["samples"]) < REPORT_LIMIT:
+            summary["samples"].append((os.path.relpath(path, root or storage.UPLOADS_ROOT), size, reason))
+
+        if apply:
+            try:
+                os.remove(path)
+                if storage.get_storage().remote:
+                    storage.get_storage().delete(storage.key_for_path(path))
+                if media_store.is_object_name(name):
+                    media_collection.delete_one({"_id": name, "refcount": {"$lte": 0}})
+                summary["deleted"] += 1
+            except Exception as e:
+                print(f"Error deleting {path}: {e}")
+
+    summary["by_reason"] = dict(summary["by_reason"])
+    summary["started_at"] = started
+    summary["finished_at"] = datetime.utcnow()
+    return summary
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove uploaded files no document references")
+    parser.add_argument("--apply", action="store_true", help="delete files (default is a dry-run report)")
+    parser.add_argument("--grace-days", type=float, default=GRACE_DAYS,
+                        help="only collect files last modified more than this many days ago")
+    args = parser.parse_args(argv)
+
+    from app import db, media_collection, job_state_collection
+
+    summary = collect(db, media_collection, args.grace_days, args.apply)
+
+    mode = "Deleted" if args.apply else "Would delete"
+    print(f"Live references: {summary['live']}")
+    print(f"{mode} {summary['files']} files ({_format_bytes(summary['bytes'])})")
+    for reason, totals in sorted(summary["by_reason"].items()):
+        print(f"  {reason}: {totals['files']} files ({_format_bytes(totals['bytes'])})")
+    if summary["skipped_referenced"]:
+        print(f"Kept {summary['skipped_referenced']} objects that still have a positive reference count")
+    for path, size, reason in summary["samples"]:
+        print(f"  {path}  {_format_bytes(size)}  [{reason}]")
+
+    job_state_collection.update_one(
+        {"_id": "upload_gc"},
+        {"$set": {
+            "last_run": summary["finished_at"],
+            "applied": args.apply,
+            "files": summary["files"],
+            "bytes": summary["bytes"],
+            "deleted": summary["deleted"]
+        }},
+        upsert=True
+    )
+
+
+if __name__ == "__main__":
+    main()
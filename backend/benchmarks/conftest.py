@@ -0,0 +1,174 @@
+"""Fixtures for the invoice rendering benchmarks.
+
+Run from ``backend/``::
+
+    pip install pytest pytest-benchmark
+    python -m pytest benchmarks --benchmark-only
+    python -m pytest benchmarks --benchmark-only --benchmark-json=bench.json
+
+Each benchmark records the mean render time (pytest-benchmark), the peak
+memory of one render (tracemalloc) and the PDF size, and fails when any of
+them exceeds its limit in ``thresholds.json``. Benchmarks without an entry
+only report. The limits are about twice the time and memory (and 1.5x the
+size) measured with pure-Python ReportLab, without its C accelerators.
+``BENCHMARK_TIME_SCALE`` multiplies every time limit, e.g.
+``BENCHMARK_TIME_SCALE=2`` on a slow CI runner.
+"""
+import json
+import os
+import random
+import sys
+import tracemalloc
+import types
+from datetime import datetime, timedelta
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# app/__init__ connects to MongoDB on import; the renderers only need app.utils
+if "app" not in sys.modules:
+    _app = types.ModuleType("app")
+    _app.__path__ = [os.path.join(BACKEND_DIR, "app")]
+    sys.modules["app"] = _app
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+TIME_SCALE = float(os.environ.get("BENCHMARK_TIME_SCALE", "1"))
+
+ITEM_NAMES = ["Hand-painted Vase", "Madhubani Canvas", "Terracotta Bowl", "Brass Lamp", "Pashmina Shawl",
+              "Block-printed Cushion Cover with Extra Long Descriptive Title"]
+
+
+def _random():
+    # Same synthetic documents on every run
+    return random.Random(42)
+
+
+def make_order(item_count):
+    rng = _random()
+    items = [{"name": rng.choice(ITEM_NAMES), "price": round(rng.uniform(50, 5000), 2)} for _ in range(item_count)]
+    return {
+        "_id": "65f0a1b2c3d4e5f6a7b8c9d0",
+        "payment_id": "cs_test_a1b2c3d4e5f6",
+        "created_at": datetime(2024, 3, 15, 10, 30),
+        "items": items,
+        "total_amount": sum(item["price"] for item in items)
+    }
+
+
+def make_bids(bid_count):
+    rng = _random()
+    start = datetime(2024, 3, 1)
+    amount = 1000.0
+    bids = []
+    for index in range(bid_count):
+        amount += rng.uniform(10, 250)
+        bids.append({
+            "user_email": f"bidder{rng.randrange(500)}@example.com",
+            "amount": round(amount, 2),
+            "timestamp": start + timedelta(minutes=index)
+        })
+    return bids
+
+
+def make_auction(bid_count):
+    bids = make_bids(bid_count)
+    return {
+        "_id": "65f0a1b2c3d4e5f6a7b8c9d1",
+        "auction_id": "65f0a1b2c3d4e5f6a7b8c9d1",
+        "title": "Mughal Miniature Painting",
+        "description": "Opaque watercolour and gold on wasli paper, signed by the artist. " * 3,
+        "current_amount": bids[-1]["amount"] if bids else 1000.0,
+        "highest_bidder": bids[-1]["user_email"] if bids else None,
+        "last_date": "2024-04-01",
+        "bids": bids
+    }
+
+
+def make_bid_invoice(bid_count):
+    auction = make_auction(bid_count)
+    return {
+        **auction,
+        "final_amount": auction["current_amount"],
+        "auction_date": "2024-03-01",
+        "end_date": "2024-04-01",
+        "winner_name": "Asha Verma",
+        "winner_email": "asha@example.com",
+        "seller_name": "Ravi Kumar",
+        "category": "Painting",
+        "condition": "New"
+    }
+
+
+def make_event_registration():
+    return {
+        "_id": "65f0a1b2c3d4e5f6a7b8c9d2",
+        "name": "Block Printing Workshop",
+        "date": "2024-05-04",
+        "time": "10:00",
+        "place": "Jaipur Craft Centre",
+        "fee": 1500,
+        "user_id": "asha@example.com",
+        "attendee_name": "Asha Verma",
+        "registration_date": datetime(2024, 4, 20, 18, 5),
+        "payment_status": "paid"
+    }
+
+
+@pytest.fixture(scope="session")
+def thresholds():
+    with open(THRESHOLDS_PATH) as handle:
+        return json.load(handle)
+
+
+def _output_size(result):
+    if hasattr(result, "getbuffer"):
+        return result.getbuffer().nbytes
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    return None
+
+
+@pytest.fixture
+def measure(benchmark, request, thresholds):
+    """Benchmark ``func(*args)`` and check time, peak memory and output size against thresholds.json"""
+
+    def run(func, *args):
+        # Warm up first so one-time work (font subsets, imports) is not counted,
+        # then one traced call for memory and size; tracing would distort the timings
+        func(*args)
+        tracemalloc.start()
+        try:
+            result = func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        size = _output_size(result)
+
+        benchmark(func, *args)
+        # No timings with --benchmark-disable; memory and size are still checked
+        mean_ms = benchmark.stats.stats.mean * 1000 if benchmark.stats else None
+
+        benchmark.extra_info["peak_kib"] = round(peak / 1024, 1)
+        if mean_ms is not None:
+            benchmark.extra_info["mean_ms"] = round(mean_ms, 3)
+        if size is not None:
+            benchmark.extra_info["size_kib"] = round(size / 1024, 1)
+
+        limits = thresholds.get(request.node.name)
+        if not limits:
+            return result
+        failures = []
+        if "mean_ms" in limits and mean_ms is not None and mean_ms > limits["mean_ms"] * TIME_SCALE:
+            failures.append(f"mean {mean_ms:.2f} ms > {limits['mean_ms'] * TIME_SCALE:.2f} ms")
+        if "peak_kib" in limits and peak / 1024 > limits["peak_kib"]:
+            failures.append(f"peak memory {peak / 1024:.0f} KiB > {limits['peak_kib']} KiB")
+        if "size_kib" in limits and size is not None and size / 1024 > limits["size_kib"]:
+            failures.append(f"output {size / 1024:.1f} KiB > {limits['size_kib']} KiB")
+        if failures:
+            pytest.fail(f"{request.node.name} regressed: " + "; ".join(failures))
+        return result
+
+    return run
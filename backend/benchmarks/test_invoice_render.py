@@ -0,0 +1,50 @@
+"""Render time, peak memory and size of every invoice template.
+
+Orders scale with line items; auction and bid invoices are rendered from
+documents carrying their full bid history, which the templates must not
+depend on. The cache benchmarks cover the repeat-download path.
+"""
+import pytest
+
+from app.utils import invoice_cache, pdf_generator
+
+from conftest import make_auction, make_bid_invoice, make_event_registration, make_order
+
+ITEM_COUNTS = [1, 10, 100, 500]
+BID_COUNTS = [0, 100, 1000, 10000]
+
+
+@pytest.mark.parametrize("items", ITEM_COUNTS)
+def test_order_invoice(measure, items):
+    measure(pdf_generator.generate_invoice_pdf, make_order(items))
+
+
+@pytest.mark.parametrize("items", ITEM_COUNTS)
+def test_order_receipt(measure, items):
+    measure(pdf_generator.generate_receipt_pdf, make_order(items))
+
+
+@pytest.mark.parametrize("bids", BID_COUNTS)
+def test_auction_invoice(measure, bids):
+    measure(pdf_generator.generate_auction_invoice_pdf, make_auction(bids))
+
+
+@pytest.mark.parametrize("bids", BID_COUNTS)
+def test_bid_invoice(measure, bids):
+    measure(pdf_generator.generate_bid_invoice_pdf, make_bid_invoice(bids))
+
+
+def test_event_receipt(measure):
+    measure(pdf_generator.generate_event_receipt_pdf, make_event_registration())
+
+
+def test_cached_invoice_hit(measure, tmp_path, monkeypatch):
+    monkeypatch.setattr(invoice_cache, "CACHE_DIR", str(tmp_path))
+    order = make_order(100)
+    version = invoice_cache.document_version(order, ["payment_id", "created_at", "items"])
+    invoice_cache.get_or_render("order", order["_id"], version, lambda: order)
+
+    def repeat_download():
+        return invoice_cache.get_or_render("order", order["_id"], version, lambda: pytest.fail("cache miss"))
+
+    measure(repeat_download)
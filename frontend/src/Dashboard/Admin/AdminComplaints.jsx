@@ -104,8 +104,11 @@ const AdminComplaints = () => {
 
   const fetchAttachment = async (complaintId) => {
     try {
-      // Use the public endpoint that doesn't require authentication
-      const response = await axios.get(`http://localhost:8080/complaints/public-attachment/${complaintId}`);
+      // Exchange the admin token for a short-lived signed URL the viewer can load directly
+      const token = localStorage.getItem('admintoken');
+      const response = await axios.get(`http://localhost:8080/complaints/attachment/${complaintId}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
       
       if (response.data.success) {
         console.log("Attachment data:", response.data);
@@ -613,7 +616,7 @@ const AdminComplaints = () => {
                       <div className="card-body text-center">
                         {attachmentType === 'image' ? (
                           <img 
-                            src={`http://localhost:8080/complaints/view-attachment/${selectedComplaint._id}`} 
+                            src={attachmentUrl} 
                             alt="Complaint Attachment" 
                             className="attachment-image img-fluid" 
                             style={{ maxHeight: '400px' }}
@@ -626,7 +629,7 @@ const AdminComplaints = () => {
                         ) : attachmentType === 'pdf' ? (
                           <div className="pdf-container">
                             <iframe
-                              src={`http://localhost:8080/complaints/view-attachment/${selectedComplaint._id}`}
+                              src={attachmentUrl}
                               width="100%"
                               height="500px"
                               title="PDF Viewer"
@@ -642,7 +645,7 @@ const AdminComplaints = () => {
                             <p className="mb-1">This type of file cannot be previewed directly in the browser.</p>
                             <div className="mt-3">
                               <a 
-                                href={`http://localhost:8080/complaints/view-attachment/${selectedComplaint._id}`}
+                                href={attachmentUrl}
                                 target="_blank" 
                                 rel="noopener noreferrer"
                                 className="btn btn-primary"
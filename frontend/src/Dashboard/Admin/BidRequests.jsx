@@ -8,12 +8,16 @@ const BidRequests = () => {
     const [selectedBid, setSelectedBid] = useState(null);
     const [showDetailsModal, setShowDetailsModal] = useState(false);
     const [filterStatus, setFilterStatus] = useState('all');
+    const [statusCounts, setStatusCounts] = useState({});
+    const [nextCursor, setNextCursor] = useState(null);
+    const [selectedIds, setSelectedIds] = useState([]);
 
     useEffect(() => {
+        setSelectedIds([]);
         fetchBids();
-    }, []);
+    }, [filterStatus]);
 
-    const fetchBids = async () => {
+    const fetchBids = async (cursor = null) => {
         try {
             const token = localStorage.getItem('admintoken');
             if (!token) {
@@ -21,13 +25,19 @@ const BidRequests = () => {
                 return;
             }
 
+            // Filtered and paged on the server
+            const params = {};
+            if (filterStatus !== 'all') params.status = filterStatus;
+            if (cursor) params.cursor = cursor;
             const response = await axios.get('http://localhost:8080/admin/bid-requests', {
-                headers: { Authorization: `Bearer ${token}` }
+                headers: { Authorization: `Bearer ${token}` },
+                params
             });
 
             if (response.data.success) {
-                console.log('Fetched bid requests:', response.data.bids);
-                setBids(response.data.bids);
+                setBids(prev => cursor ? [...prev, ...response.data.bids] : response.data.bids);
+                setNextCursor(response.data.next_cursor);
+                if (!cursor) setStatusCounts(response.data.status_counts || {});
             } else {
                 throw new Error(response.data.message || 'Failed to fetch bids');
             }
@@ -91,9 +101,53 @@ const BidRequests = () => {
         }
     };
 
-    const viewBidDetails = (bid) => {
+    const handleBulkUpdate = async (status) => {
+        try {
+            const token = localStorage.getItem('admintoken');
+            const response = await axios.post(
+                'http://localhost:8080/admin/bid-requests/bulk',
+                { ids: selectedIds, status },
+                { headers: { Authorization: `Bearer ${token}` } }
+            );
+
+            const changed = new Set(response.data.results
+                .filter(row => row.result === 'updated' || row.result === 'unchanged')
+                .map(row => row.id));
+            setBids(prevBids => prevBids.map(bid =>
+                changed.has(bid._id) ? { ...bid, status } : bid
+            ));
+            setSelectedIds([]);
+
+            const { updated, conflict, not_found } = response.data.summary;
+            toast.success(`${updated} bid request(s) ${status}`);
+            if (conflict + not_found > 0) {
+                toast.warning(`${conflict + not_found} request(s) changed or were removed meanwhile`);
+            }
+        } catch (error) {
+            console.error('Error updating bid requests:', error);
+            toast.error(error.response?.data?.message || 'Failed to update bid requests');
+        }
+    };
+
+    const toggleSelected = (bidId) => {
+        setSelectedIds(prev => prev.includes(bidId) ? prev.filter(id => id !== bidId) : [...prev, bidId]);
+    };
+
+    const viewBidDetails = async (bid) => {
         setSelectedBid(bid);
         setShowDetailsModal(true);
+        // The list rows leave out the bid history
+        try {
+            const token = localStorage.getItem('admintoken');
+            const response = await axios.get(`http://localhost:8080/admin/bid-requests/${bid._id}`, {
+                headers: { Authorization: `Bearer ${token}` }
+            });
+            if (response.data.success) {
+                setSelectedBid(current => current && current._id === bid._id ? { ...current, ...response.data.bid } : current);
+            }
+        } catch (error) {
+            console.error('Error fetching bid details:', error);
+        }
     };
 
     const closeDetailsModal = () => {
@@ -114,9 +168,10 @@ const BidRequests = () => {
         }
     };
 
-    const filteredBids = filterStatus === 'all' 
-        ? bids 
-        : bids.filter(bid => bid.status.toLowerCase() === filterStatus.toLowerCase());
+    const filteredBids = bids;
+    const pendingIds = filteredBids.filter(bid => bid.status === 'pending').map(bid => bid._id);
+    const allPendingSelected = pendingIds.length > 0 && pendingIds.every(id => selectedIds.includes(id));
+    const totalCount = Object.values(statusCounts).reduce((sum, count) => sum + count, 0);
 
     const getBidderType = (bid) => {
         if (bid.requester_email) return 'User';
@@ -151,7 +206,7 @@ const BidRequests = () => {
                         onClick={() => setFilterStatus('all')}
                     >
                         All Requests
-                        <span className="badge bg-secondary ms-2">{bids.length}</span>
+                        <span className="badge bg-secondary ms-2">{totalCount}</span>
                     </button>
                 </li>
                 <li className="nav-item">
@@ -161,7 +216,7 @@ const BidRequests = () => {
                     >
                         Pending
                         <span className="badge bg-warning ms-2">
-                            {bids.filter(bid => bid.status === 'pending').length}
+                            {statusCounts.pending || 0}
                         </span>
                     </button>
                 </li>
@@ -172,7 +227,7 @@ const BidRequests = () => {
                     >
                         Approved
                         <span className="badge bg-success ms-2">
-                            {bids.filter(bid => bid.status === 'approved').length}
+                            {statusCounts.approved || 0}
                         </span>
                     </button>
                 </li>
@@ -183,7 +238,7 @@ const BidRequests = () => {
                     >
                         Rejected
                         <span className="badge bg-danger ms-2">
-                            {bids.filter(bid => bid.status === 'rejected').length}
+                            {statusCounts.rejected || 0}
                         </span>
                     </button>
                 </li>
@@ -191,10 +246,31 @@ const BidRequests = () => {
 
             <div className="card shadow-sm">
                 <div className="card-body">
+                    {selectedIds.length > 0 && (
+                        <div className="d-flex align-items-center gap-2 mb-3">
+                            <span>{selectedIds.length} selected</span>
+                            <button className="btn btn-success btn-sm" onClick={() => handleBulkUpdate('approved')}>
+                                Approve selected
+                            </button>
+                            <button className="btn btn-danger btn-sm" onClick={() => handleBulkUpdate('rejected')}>
+                                Reject selected
+                            </button>
+                        </div>
+                    )}
                     <div className="table-responsive">
                         <table className="table table-hover">
                             <thead className="table-light">
                                 <tr>
+                                    <th>
+                                        <input
+                                            type="checkbox"
+                                            className="form-check-input"
+                                            title="Select all pending"
+                                            checked={allPendingSelected}
+                                            disabled={pendingIds.length === 0}
+                                            onChange={() => setSelectedIds(allPendingSelected ? [] : pendingIds)}
+                                        />
+                                    </th>
                                     <th>Title</th>
                                     <th>Base Amount</th>
                                     <th>Category</th>
@@ -209,6 +285,16 @@ const BidRequests = () => {
                                 {filteredBids.length > 0 ? (
                                     filteredBids.map(bid => (
                                         <tr key={bid._id}>
+                                            <td>
+                                                {bid.status === 'pending' && (
+                                                    <input
+                                                        type="checkbox"
+                                                        className="form-check-input"
+                                                        checked={selectedIds.includes(bid._id)}
+                                                        onChange={() => toggleSelected(bid._id)}
+                                                    />
+                                                )}
+                                            </td>
                                             <td>{bid.title}</td>
                                             <td>₹{bid.base_amount}</td>
                                             <td>{bid.category}</td>
@@ -252,12 +338,19 @@ const BidRequests = () => {
                                     ))
                                 ) : (
                                     <tr>
-                                        <td colSpan="8" className="text-center">No bid requests found</td>
+                                        <td colSpan="9" className="text-center">No bid requests found</td>
                                     </tr>
                                 )}
                             </tbody>
                         </table>
                     </div>
+                    {nextCursor && (
+                        <div className="text-center">
+                            <button className="btn btn-outline-primary btn-sm" onClick={() => fetchBids(nextCursor)}>
+                                Load more
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
 
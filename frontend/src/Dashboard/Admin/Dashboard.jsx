@@ -24,6 +24,8 @@ ChartJS.register(
 
 function Dashboard() {
     const [stats, setStats] = useState(null);
+    const [series, setSeries] = useState([]);
+    const [period, setPeriod] = useState('day');
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
@@ -44,24 +46,42 @@ function Dashboard() {
         fetchStats();
     }, []);
 
+    useEffect(() => {
+        const fetchAnalytics = async () => {
+            try {
+                const token = localStorage.getItem('admintoken');
+                const days = { day: 30, week: 182, month: 365 }[period];
+                const from = new Date(Date.now() - (days - 1) * 24 * 3600 * 1000).toISOString().slice(0, 10);
+                const response = await axios.get(
+                    'http://localhost:8080/admin/analytics',
+                    { headers: { Authorization: `Bearer ${token}` }, params: { from, interval: period } }
+                );
+                setSeries(response.data.series);
+            } catch (error) {
+                console.error('Error fetching analytics:', error);
+            }
+        };
+        fetchAnalytics();
+    }, [period]);
+
     if (loading) return <div className="text-center">Loading...</div>;
 
-    const chartData = {
-        labels: ['Users', 'Instructors', 'Events', 'Products'],
+    const labels = series.map(bucket => bucket.date);
+    const line = (label, key, color) => ({
+        label,
+        data: series.map(bucket => bucket[key]),
+        borderColor: color,
+        tension: 0.1
+    });
+    const activityData = {
+        labels,
         datasets: [
-            {
-                label: 'Platform Statistics',
-                data: [
-                    stats.total_users,
-                    stats.total_instructors,
-                    stats.total_events,
-                    stats.total_products
-                ],
-                borderColor: 'rgb(75, 192, 192)',
-                tension: 0.1
-            }
+            line('Orders', 'orders', 'rgb(75, 192, 192)'),
+            line('New users', 'new_users', 'rgb(54, 162, 235)'),
+            line('Active auctions', 'active_auctions', 'rgb(255, 159, 64)')
         ]
     };
+    const gmvData = { labels, datasets: [line('GMV', 'gmv', 'rgb(153, 102, 255)')] };
 
     return (
         <div className="container-fluid">
@@ -102,14 +122,40 @@ function Dashboard() {
                 </div>
             </div>
 
+            <div className="d-flex justify-content-end mb-3">
+                <select
+                    className="form-select w-auto"
+                    value={period}
+                    onChange={(e) => setPeriod(e.target.value)}
+                >
+                    <option value="day">Last 30 days</option>
+                    <option value="week">Last 6 months, weekly</option>
+                    <option value="month">Last 12 months, monthly</option>
+                </select>
+            </div>
+
+            <div className="card shadow-sm border-0 mb-4">
+                <div className="card-body">
+                    <Line data={activityData} options={{
+                        responsive: true,
+                        plugins: {
+                            title: {
+                                display: true,
+                                text: 'Platform Activity'
+                            }
+                        }
+                    }} />
+                </div>
+            </div>
+
             <div className="card shadow-sm border-0">
                 <div className="card-body">
-                    <Line data={chartData} options={{
+                    <Line data={gmvData} options={{
                         responsive: true,
                         plugins: {
                             title: {
                                 display: true,
-                                text: 'Platform Growth Overview'
+                                text: 'Gross Merchandise Value'
                             }
                         }
                     }} />
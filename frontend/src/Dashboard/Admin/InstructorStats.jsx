@@ -23,7 +23,8 @@ ChartJS.register(
 
 function InstructorStats() {
     const [instructors, setInstructors] = useState([]);
-    const [events, setEvents] = useState([]);
+    const [instructorCount, setInstructorCount] = useState(0);
+    const [eventCount, setEventCount] = useState(0);
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
@@ -34,16 +35,20 @@ function InstructorStats() {
         try {
             const token = localStorage.getItem('admintoken');
             const [instructorsRes, eventsRes] = await Promise.all([
+                // Instructors come with their event counts
                 axios.get('http://localhost:8080/admin/instructors', {
-                    headers: { Authorization: `Bearer ${token}` }
+                    headers: { Authorization: `Bearer ${token}` },
+                    params: { limit: 200, sort: 'name' }
                 }),
                 axios.get('http://localhost:8080/admin/events', {
-                    headers: { Authorization: `Bearer ${token}` }
+                    headers: { Authorization: `Bearer ${token}` },
+                    params: { limit: 1 }
                 })
             ]);
 
             setInstructors(instructorsRes.data.instructors);
-            setEvents(eventsRes.data.events);
+            setInstructorCount(instructorsRes.data.total);
+            setEventCount(eventsRes.data.total);
         } catch (error) {
             toast.error('Failed to fetch instructor data');
             console.error('Error:', error);
@@ -57,7 +62,7 @@ function InstructorStats() {
     // Calculate stats for chart
     const instructorEventCounts = instructors.map(instructor => ({
         name: `${instructor.first_name} ${instructor.last_name}`,
-        eventCount: events.filter(event => event.instructor_id === instructor._id).length
+        eventCount: instructor.eventCount
     }));
 
     const chartData = {
@@ -80,7 +85,7 @@ function InstructorStats() {
                     <div className="card bg-primary text-white">
                         <div className="card-body">
                             <h5>Total Instructors</h5>
-                            <h2>{instructors.length}</h2>
+                            <h2>{instructorCount}</h2>
                         </div>
                     </div>
                 </div>
@@ -88,7 +93,7 @@ function InstructorStats() {
                     <div className="card bg-success text-white">
                         <div className="card-body">
                             <h5>Total Events</h5>
-                            <h2>{events.length}</h2>
+                            <h2>{eventCount}</h2>
                         </div>
                     </div>
                 </div>
@@ -96,7 +101,7 @@ function InstructorStats() {
                     <div className="card bg-info text-white">
                         <div className="card-body">
                             <h5>Avg Events per Instructor</h5>
-                            <h2>{(events.length / instructors.length || 0).toFixed(1)}</h2>
+                            <h2>{(eventCount / instructorCount || 0).toFixed(1)}</h2>
                         </div>
                     </div>
                 </div>
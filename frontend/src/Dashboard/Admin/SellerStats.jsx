@@ -7,8 +7,9 @@ import { Chart as ChartJS, ArcElement, Tooltip, Legend } from 'chart.js';
 ChartJS.register(ArcElement, Tooltip, Legend);
 
 function SellerStats() {
-    const [sellers, setSellers] = useState([]);
-    const [products, setProducts] = useState([]);
+    const [sellerCount, setSellerCount] = useState(0);
+    const [productCount, setProductCount] = useState(0);
+    const [categories, setCategories] = useState({});
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
@@ -19,16 +20,20 @@ function SellerStats() {
         try {
             const token = localStorage.getItem('admintoken');
             const [sellersRes, productsRes] = await Promise.all([
+                // Only the totals and category counts are shown, not the rows
                 axios.get('http://localhost:8080/admin/sellers', {
-                    headers: { Authorization: `Bearer ${token}` }
+                    headers: { Authorization: `Bearer ${token}` },
+                    params: { limit: 1 }
                 }),
                 axios.get('http://localhost:8080/admin/products', {
-                    headers: { Authorization: `Bearer ${token}` }
+                    headers: { Authorization: `Bearer ${token}` },
+                    params: { limit: 1, view: 'summary' }
                 })
             ]);
 
-            setSellers(sellersRes.data.sellers);
-            setProducts(productsRes.data.products);
+            setSellerCount(sellersRes.data.total);
+            setProductCount(productsRes.data.total);
+            setCategories(productsRes.data.category_counts || {});
         } catch (error) {
             toast.error('Failed to fetch seller data');
             console.error('Error:', error);
@@ -39,12 +44,6 @@ function SellerStats() {
 
     if (loading) return <div className="text-center">Loading...</div>;
 
-    // Calculate category distribution
-    const categories = products.reduce((acc, product) => {
-        acc[product.category] = (acc[product.category] || 0) + 1;
-        return acc;
-    }, {});
-
     const chartData = {
         labels: Object.keys(categories),
         datasets: [{
@@ -68,7 +67,7 @@ function SellerStats() {
                     <div className="card bg-primary text-white">
                         <div className="card-body">
                             <h5>Total Sellers</h5>
-                            <h2>{sellers.length}</h2>
+                            <h2>{sellerCount}</h2>
                         </div>
                     </div>
                 </div>
@@ -76,7 +75,7 @@ function SellerStats() {
                     <div className="card bg-success text-white">
                         <div className="card-body">
                             <h5>Total Products</h5>
-                            <h2>{products.length}</h2>
+                            <h2>{productCount}</h2>
                         </div>
                     </div>
                 </div>
@@ -119,7 +118,7 @@ function SellerStats() {
                                                 <td>{category}</td>
                                                 <td>{count}</td>
                                                 <td>
-                                                    {((count / products.length) * 100).toFixed(1)}%
+                                                    {((count / productCount) * 100).toFixed(1)}%
                                                 </td>
                                             </tr>
                                         ))}
@@ -10,6 +10,9 @@ ChartJS.register(ArcElement, Tooltip, Legend);
 
 function UserStats() {
     const [users, setUsers] = useState([]);
+    const [totalUsers, setTotalUsers] = useState(0);
+    const [blockedCount, setBlockedCount] = useState(0);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
     const [selectedUser, setSelectedUser] = useState(null);
     const [userStats, setUserStats] = useState(null);
@@ -19,13 +22,20 @@ function UserStats() {
         fetchUsers();
     }, []);
 
-    const fetchUsers = async () => {
+    const fetchUsers = async (cursor = null) => {
         try {
             const token = localStorage.getItem('admintoken');
             const response = await axios.get('http://localhost:8080/admin/users', {
-                headers: { Authorization: `Bearer ${token}` }
+                headers: { Authorization: `Bearer ${token}` },
+                params: cursor ? { cursor } : {}
             });
-            setUsers(response.data.users);
+            // The server pages the list; totals come with the first page
+            setUsers(prev => cursor ? [...prev, ...response.data.users] : response.data.users);
+            setNextCursor(response.data.next_cursor);
+            if (!cursor) {
+                setTotalUsers(response.data.total);
+                setBlockedCount(response.data.blocked_count);
+            }
         } catch (error) {
             toast.error('Failed to fetch users');
             console.error('Error:', error);
@@ -123,10 +133,7 @@ function UserStats() {
     const chartData = {
         labels: ['Active Users', 'Blocked Users'],
         datasets: [{
-            data: [
-                users.filter(user => !user.is_blocked).length,
-                users.filter(user => user.is_blocked).length
-            ],
+            data: [totalUsers - blockedCount, blockedCount],
             backgroundColor: ['#4CAF50', '#f44336'],
         }]
     };
@@ -150,11 +157,11 @@ function UserStats() {
                             <h5 className="card-title">Quick Stats</h5>
                             <div className="d-flex justify-content-around">
                                 <div>
-                                    <h3>{users.length}</h3>
+                                    <h3>{totalUsers}</h3>
                                     <p>Total Users</p>
                                 </div>
                                 <div>
-                                    <h3>{users.filter(user => !user.is_blocked).length}</h3>
+                                    <h3>{totalUsers - blockedCount}</h3>
                                     <p>Active Users</p>
                                 </div>
                             </div>
@@ -207,6 +214,13 @@ function UserStats() {
                             </tbody>
                         </table>
                     </div>
+                    {nextCursor && (
+                        <div className="text-center">
+                            <button className="btn btn-outline-primary btn-sm" onClick={() => fetchUsers(nextCursor)}>
+                                Load more
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
 
@@ -36,7 +36,7 @@ const Earnings = () => {
                 // Calculate earnings for each event
                 const eventEarnings = response.data.events.map(event => ({
                     ...event,
-                    totalEarnings: (event.registered_users || []).length * parseFloat(event.fee)
+                    totalEarnings: (event.registered_count || 0) * parseFloat(event.fee)
                 }));
 
                 setEarnings(eventEarnings);
@@ -128,7 +128,7 @@ const Earnings = () => {
                                     <tr key={event._id}>
                                         <td>{event.name}</td>
                                         <td>₹{event.fee}</td>
-                                        <td>{(event.registered_users || []).length}</td>
+                                        <td>{event.registered_count || 0}</td>
                                         <td>₹{event.totalEarnings}</td>
                                     </tr>
                                 ))}
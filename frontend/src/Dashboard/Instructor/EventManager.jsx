@@ -16,6 +16,7 @@ function EventManager({ onSelectEvent }) {
         place: "",
         fee: "",
         duration: "",
+        capacity: "",
         poster: null,
     });
 
@@ -69,6 +70,7 @@ function EventManager({ onSelectEvent }) {
             formData.append("time", eventData.time);
             formData.append("duration", eventData.duration);
             formData.append("fee", eventData.fee);
+            formData.append("capacity", eventData.capacity);
             if (eventData.type === "offline") {
                 formData.append("place", eventData.place);
             }
@@ -93,6 +95,7 @@ function EventManager({ onSelectEvent }) {
                 time: "",
                 place: "",
                 fee: "",
+                capacity: "",
                 poster: null,
             });
             document.getElementById("poster-input").value = "";
@@ -144,6 +147,10 @@ function EventManager({ onSelectEvent }) {
                                     <label className="form-label fw-bold">Duration (days)</label>
                                     <input type="number" name="duration" className="form-control" value={eventData.duration} onChange={handleChange} required />
                                 </div>
+                                <div className="col-12">
+                                    <label className="form-label fw-bold">Capacity</label>
+                                    <input type="number" name="capacity" min="1" className="form-control" placeholder="Leave blank for no limit" value={eventData.capacity} onChange={handleChange} />
+                                </div>
                                 {eventData.type === "offline" && (
                                     <div className="col-12">
                                         <label className="form-label fw-bold">Place</label>
@@ -256,6 +263,13 @@ function EventManager({ onSelectEvent }) {
                                         <p className="mb-1"><strong>Duration:</strong></p>
                                         <p className="card-text">{selectedEvent.duration} days</p>
                                     </div>
+                                    <div className="col-12">
+                                        <p className="mb-1"><strong>Registrations:</strong></p>
+                                        <p className="card-text">
+                                            {selectedEvent.registered_count || 0}
+                                            {selectedEvent.capacity ? ` / ${selectedEvent.capacity}` : ""}
+                                        </p>
+                                    </div>
                                     {selectedEvent.type === "offline" && (
                                         <div className="col-12">
                                             <p className="mb-1"><strong>Place:</strong></p>
@@ -3,6 +3,7 @@ import axios from 'axios';
 import { toast } from 'react-toastify';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faDownload, faTrophy, faSpinner } from '@fortawesome/free-solid-svg-icons';
+import fetchDocument from '../../utils/fetchDocument';
 
 const MyBids = () => {
     const [participatedBids, setParticipatedBids] = useState([]);
@@ -58,21 +59,11 @@ const MyBids = () => {
             setGeneratingInvoice(bid._id);
             const token = localStorage.getItem('instructortoken');
             
-            // Using fetch API which handles blob data better
-            const response = await fetch(`http://localhost:8080/bids/invoice/${bid._id}`, {
-                method: 'GET',
-                headers: { 
-                    'Authorization': `Bearer ${token}`
-                }
+            // Get the PDF, polling the render job when it is not ready yet
+            const blob = await fetchDocument(`http://localhost:8080/bids/invoice/${bid._id}`, token, {
+                errorFor: (response) => new Error(`Server returned ${response.status}: ${response.statusText}`)
             });
             
-            if (!response.ok) {
-                throw new Error(`Server returned ${response.status}: ${response.statusText}`);
-            }
-            
-            // Get blob from response
-            const blob = await response.blob();
-            
             // Create a URL for the blob
             const url = window.URL.createObjectURL(blob);
             
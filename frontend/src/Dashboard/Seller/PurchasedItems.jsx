@@ -3,6 +3,7 @@ import axios from 'axios';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faEye, faDownload, faPalette, faTools } from '@fortawesome/free-solid-svg-icons';
 import { toast } from 'react-toastify';
+import fetchDocument from '../../utils/fetchDocument';
 
 const PurchasedItems = () => {
     const [purchases, setPurchases] = useState([]);
@@ -63,18 +64,8 @@ const PurchasedItems = () => {
             downloadLink.href = `http://localhost:8080/order/invoice/${orderId}`;
             downloadLink.download = `invoice_${orderId.slice(0, 8)}.pdf`;
             
-            // Set the Authorization header using fetch
-            fetch(downloadLink.href, {
-                headers: {
-                    'Authorization': `Bearer ${token}`
-                }
-            })
-            .then(response => {
-                if (response.ok) {
-                    return response.blob();
-                }
-                throw new Error('Failed to download invoice');
-            })
+            // Fetch the PDF with authentication, polling the render job if it is not ready yet
+            fetchDocument(downloadLink.href, token)
             .then(blob => {
                 const url = window.URL.createObjectURL(blob);
                 downloadLink.href = url;
@@ -4,6 +4,7 @@ import { toast } from 'react-toastify';
 import SellerBidRequestForm from './SellerBidRequestForm';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faDownload } from '@fortawesome/free-solid-svg-icons';
+import fetchDocument from '../../utils/fetchDocument';
 
 const SellerBids = () => {
     const [bids, setBids] = useState([]);
@@ -149,30 +150,22 @@ const SellerBids = () => {
             const bidId = bidWithCompletedStatus._id;
             downloadLink.href = `http://localhost:8080/bids/invoice/${bidId}`;
             
-            // Use fetch to get the PDF with authentication
-            fetch(downloadLink.href, {
-                headers: { 
-                    'Authorization': `Bearer ${token}`,
-                    // Add a custom header to indicate this is a completed auction
-                    'X-Auction-Status': 'completed'
-                },
-                method: 'GET'
-            })
-            .then(response => {
-                if (!response.ok) {
+            // Fetch the PDF with authentication, polling the render job if it is not ready yet
+            fetchDocument(downloadLink.href, token, {
+                // Add a custom header to indicate this is a completed auction
+                headers: { 'X-Auction-Status': 'completed' },
+                errorFor: (response) => {
                     // Handle HTTP errors
                     console.error(`HTTP error: ${response.status}`);
                     if (response.status === 400) {
-                        throw new Error('Auction must be completed before generating invoice');
+                        return new Error('Auction must be completed before generating invoice');
                     } else if (response.status === 404) {
-                        throw new Error('Invoice not found');
+                        return new Error('Invoice not found');
                     } else if (response.status === 403) {
-                        throw new Error('Not authorized to download this invoice');
-                    } else {
-                        throw new Error(`Server error: ${response.status}`);
+                        return new Error('Not authorized to download this invoice');
                     }
+                    return new Error(`Server error: ${response.status}`);
                 }
-                return response.blob();
             })
             .then(blob => {
                 const url = window.URL.createObjectURL(blob);
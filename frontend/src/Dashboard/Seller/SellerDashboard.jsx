@@ -9,6 +9,7 @@ import {
     faBoxOpen, faChartLine, faShoppingCart, faTag, faExclamationTriangle,
     faCheckCircle, faClockRotateLeft, faStar, faBoxes, faPalette, faFileInvoice, faDownload
 } from '@fortawesome/free-solid-svg-icons';
+import fetchDocument from '../../utils/fetchDocument';
 
 // Register Chart.js components
 ChartJS.register(CategoryScale, LinearScale, BarElement, ArcElement, Title, Tooltip, Legend);
@@ -145,14 +146,8 @@ const SellerDashboard = () => {
             const downloadLink = document.createElement('a');
             downloadLink.href = `http://localhost:8080/order/invoice/${orderId}`;
             
-            // Use fetch to get the PDF with authentication
-            fetch(downloadLink.href, {
-                headers: { 'Authorization': `Bearer ${token}` }
-            })
-            .then(response => {
-                if (response.ok) return response.blob();
-                throw new Error('Failed to download invoice');
-            })
+            // Fetch the PDF with authentication, polling the render job if it is not ready yet
+            fetchDocument(downloadLink.href, token)
             .then(blob => {
                 const url = window.URL.createObjectURL(blob);
                 downloadLink.href = url;
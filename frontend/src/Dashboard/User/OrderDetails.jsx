@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faDownload, faPalette, faTools } from '@fortawesome/free-solid-svg-icons';
+import fetchDocument from '../../utils/fetchDocument';
 
 const OrderDetails = () => {
     const [orders, setOrders] = useState([]);
@@ -78,14 +79,8 @@ const OrderDetails = () => {
             const downloadLink = document.createElement('a');
             downloadLink.href = `http://localhost:8080/order/invoice/${orderId}`;
             
-            // Use fetch with authentication
-            fetch(downloadLink.href, {
-                headers: { 'Authorization': `Bearer ${token}` }
-            })
-            .then(response => {
-                if (response.ok) return response.blob();
-                throw new Error('Failed to download invoice');
-            })
+            // Fetch the PDF with authentication, polling the render job if it is not ready yet
+            fetchDocument(downloadLink.href, token)
             .then(blob => {
                 const url = window.URL.createObjectURL(blob);
                 downloadLink.href = url;
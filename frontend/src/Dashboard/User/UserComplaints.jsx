@@ -5,8 +5,6 @@ import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faPaperPlane, faSpinner, faCheck, faTimes, faHistory, faExclamationTriangle } from '@fortawesome/free-solid-svg-icons';
 
 const UserComplaints = () => {
-    const [sellers, setSellers] = useState([]);
-    const [instructors, setInstructors] = useState([]);
     const [loading, setLoading] = useState(false);
     const [formData, setFormData] = useState({
         type: 'seller',
@@ -18,78 +16,58 @@ const UserComplaints = () => {
     });
     const [previousComplaints, setPreviousComplaints] = useState([]);
     const [viewMode, setViewMode] = useState('new'); // 'new' or 'history'
-    const [loadingEntities, setLoadingEntities] = useState(true);
+    // Typeahead over /autocomplete instead of loading every seller and instructor
+    const [entityQuery, setEntityQuery] = useState('');
+    const [entityOptions, setEntityOptions] = useState([]);
+    const [selectedEntity, setSelectedEntity] = useState(null);
+    const [searchingEntities, setSearchingEntities] = useState(false);
     const [selectedComplaint, setSelectedComplaint] = useState(null);
     const [showDetailModal, setShowDetailModal] = useState(false);
     const [showAttachment, setShowAttachment] = useState(false);
     const [attachmentType, setAttachmentType] = useState('unknown');
+    const [attachmentUrl, setAttachmentUrl] = useState(null);
 
     useEffect(() => {
-        // Load entities and previous complaints
-        fetchEntities();
         fetchPreviousComplaints();
     }, []);
 
-    const fetchEntities = async () => {
-        try {
-            setLoadingEntities(true);
-            const token = localStorage.getItem('usertoken');
-            
-            // Define mock data as fallback in case API fails
-            const mockSellers = [
-                { _id: '1', firstName: 'John', lastName: 'Doe', shopName: 'Artistic Creations' },
-                { _id: '2', firstName: 'Jane', lastName: 'Smith', shopName: 'Craft Corner' },
-                { _id: '3', firstName: 'Alice', lastName: 'Johnson', shopName: 'Art Supplies Co.' }
-            ];
-            
-            const mockInstructors = [
-                { _id: '1', name: 'Robert Williams', expertise: 'Painting' },
-                { _id: '2', name: 'Emily Rodriguez', expertise: 'Sculpture' },
-                { _id: '3', name: 'Michael Chen', expertise: 'Digital Art' }
-            ];
-            
-            // Try to fetch real sellers data
-            try {
-                const sellersResponse = await axios.get('http://localhost:8080/seller/list', {
-                    headers: { Authorization: `Bearer ${token}` }
-                });
-                
-                if (sellersResponse.data.success) {
-                    console.log("Successfully fetched sellers:", sellersResponse.data.sellers);
-                    setSellers(sellersResponse.data.sellers);
-                } else {
-                    console.warn("API returned success:false for sellers list");
-                    setSellers(mockSellers);
-                }
-            } catch (error) {
-                console.error('Error fetching sellers:', error);
-                setSellers(mockSellers);
-                toast.warning('Using sample seller data');
-            }
-            
-            // Try to fetch real instructors data
+    useEffect(() => {
+        const query = entityQuery.trim();
+        if (!query || (selectedEntity && selectedEntity.label === entityQuery)) {
+            setEntityOptions([]);
+            return;
+        }
+        // Wait for a pause in typing before asking the server
+        const timer = setTimeout(async () => {
             try {
-                const instructorsResponse = await axios.get('http://localhost:8080/instructor/list', {
-                    headers: { Authorization: `Bearer ${token}` }
+                setSearchingEntities(true);
+                const token = localStorage.getItem('usertoken');
+                const response = await axios.get('http://localhost:8080/autocomplete', {
+                    headers: { Authorization: `Bearer ${token}` },
+                    params: { type: formData.type, q: query, limit: 10 }
                 });
-                
-                if (instructorsResponse.data.success) {
-                    console.log("Successfully fetched instructors:", instructorsResponse.data.instructors);
-                    setInstructors(instructorsResponse.data.instructors);
-                } else {
-                    console.warn("API returned success:false for instructors list");
-                    setInstructors(mockInstructors);
-                }
+                setEntityOptions(response.data.success ? response.data.results : []);
             } catch (error) {
-                console.error('Error fetching instructors:', error);
-                setInstructors(mockInstructors);
-                toast.warning('Using sample instructor data');
+                console.error(`Error searching ${formData.type}s:`, error);
+                setEntityOptions([]);
+            } finally {
+                setSearchingEntities(false);
             }
-        } catch (error) {
-            console.error('Error in fetchEntities:', error);
-        } finally {
-            setLoadingEntities(false);
-        }
+        }, 250);
+        return () => clearTimeout(timer);
+    }, [entityQuery, formData.type]);
+
+    const selectEntity = (entity) => {
+        setSelectedEntity(entity);
+        setEntityQuery(entity.label);
+        setEntityOptions([]);
+        setFormData(prev => ({ ...prev, entityId: entity.id }));
+    };
+
+    const resetEntity = () => {
+        setSelectedEntity(null);
+        setEntityQuery('');
+        setEntityOptions([]);
     };
 
     const fetchPreviousComplaints = async () => {
@@ -107,23 +85,7 @@ const UserComplaints = () => {
                     
                     // Process complaints to ensure entity names are displayed correctly
                     const enhancedComplaints = response.data.complaints.map(complaint => {
-                        let entityName = complaint.entityName || "Unknown";
-                        
-                        // If entityName is "Unknown" but we have entityId, try to find the name
-                        if (entityName === "Unknown" && complaint.entityId) {
-                            if (complaint.type === 'seller') {
-                                const matchingSeller = sellers.find(s => s._id === complaint.entityId);
-                                if (matchingSeller) {
-                                    entityName = matchingSeller.shopName || 
-                                                 `${matchingSeller.firstName} ${matchingSeller.lastName}`.trim();
-                                }
-                            } else if (complaint.type === 'instructor') {
-                                const matchingInstructor = instructors.find(i => i._id === complaint.entityId);
-                                if (matchingInstructor) {
-                                    entityName = matchingInstructor.name;
-                                }
-                            }
-                        }
+                        const entityName = complaint.entityName || "Unknown";
                         
                         // Ensure adminResponse exists and is properly handled
                         const adminResponse = complaint.adminResponse || null;
@@ -177,8 +139,10 @@ const UserComplaints = () => {
         const { name, value } = e.target;
         setFormData({
             ...formData,
-            [name]: value
+            [name]: value,
+            ...(name === 'type' ? { entityId: '' } : {})
         });
+        if (name === 'type') resetEntity();
     };
 
     const handleFileChange = (e) => {
@@ -199,20 +163,8 @@ const UserComplaints = () => {
         setLoading(true);
 
         try {
-            // Get entity name for the selected entity
-            let entityName = "Unknown";
-            
-            if (formData.type === 'seller') {
-                const seller = sellers.find(s => s._id === formData.entityId);
-                if (seller) {
-                    entityName = seller.shopName || `${seller.firstName} ${seller.lastName}`.trim();
-                }
-            } else if (formData.type === 'instructor') {
-                const instructor = instructors.find(i => i._id === formData.entityId);
-                if (instructor) {
-                    entityName = instructor.name;
-                }
-            }
+            // Name of the entity picked in the typeahead
+            const entityName = selectedEntity ? selectedEntity.label : "Unknown";
             
             console.log(`Selected ${formData.type} ID: ${formData.entityId}, Name: ${entityName}`);
             
@@ -272,6 +224,7 @@ const UserComplaints = () => {
                             severity: 'medium',
                             attachments: null
                         });
+                        resetEntity();
                         
                         // Switch to history view
                         setViewMode('history');
@@ -346,6 +299,7 @@ const UserComplaints = () => {
             severity: 'medium',
             attachments: null
         });
+        resetEntity();
         
         // Refresh complaints list
         fetchPreviousComplaints();
@@ -401,15 +355,33 @@ const UserComplaints = () => {
         setShowDetailModal(true);
     };
 
-    const handleViewAttachment = (complaintId) => {
-        setShowAttachment(true);
-        
-        // Determine attachment type based on file extension
-        // We'll extract this from the complaint ID for now
-        // In a real implementation, you might want to fetch the attachment metadata
-        
-        // For this example, we'll just assume it's an image
-        setAttachmentType('image');
+    const handleViewAttachment = async (complaintId) => {
+        try {
+            // Exchange the user token for a short-lived signed URL the viewer can load directly
+            const token = localStorage.getItem('usertoken');
+            const response = await axios.get(`http://localhost:8080/complaints/attachment/${complaintId}`, {
+                headers: { Authorization: `Bearer ${token}` }
+            });
+
+            if (!response.data.success) {
+                toast.error('Failed to fetch attachment');
+                return;
+            }
+
+            const fileExt = (response.data.filename || '').split('.').pop().toLowerCase();
+            if (['jpg', 'jpeg', 'png', 'gif', 'webp', 'svg'].includes(fileExt)) {
+                setAttachmentType('image');
+            } else if (fileExt === 'pdf') {
+                setAttachmentType('pdf');
+            } else {
+                setAttachmentType('other');
+            }
+            setAttachmentUrl(response.data.attachmentUrl);
+            setShowAttachment(true);
+        } catch (error) {
+            console.error('Error fetching attachment:', error);
+            toast.error('Failed to load attachment');
+        }
     };
 
     return (
@@ -457,37 +429,42 @@ const UserComplaints = () => {
                             
                             <div className="mb-3">
                                 <label className="form-label">Select {formData.type === 'seller' ? 'Seller' : 'Instructor'}</label>
-                                {loadingEntities ? (
-                                    <div className="text-center py-2">
-                                        <div className="spinner-border spinner-border-sm" role="status">
-                                            <span className="visually-hidden">Loading...</span>
-                                        </div>
-                                        <span className="ms-2">Loading...</span>
-                                    </div>
-                                ) : (
-                                    <select 
-                                        name="entityId"
-                                        className="form-select"
-                                        value={formData.entityId}
-                                        onChange={handleChange}
+                                <div className="position-relative">
+                                    <input
+                                        type="text"
+                                        className="form-control"
+                                        value={entityQuery}
+                                        onChange={(e) => {
+                                            setEntityQuery(e.target.value);
+                                            setSelectedEntity(null);
+                                            setFormData(prev => ({ ...prev, entityId: '' }));
+                                        }}
+                                        placeholder={`Start typing a ${formData.type === 'seller' ? 'shop or seller' : 'instructor'} name`}
+                                        autoComplete="off"
                                         required
-                                    >
-                                        <option value="">-- Select {formData.type === 'seller' ? 'Seller' : 'Instructor'} --</option>
-                                        {formData.type === 'seller' ? (
-                                            sellers.map(seller => (
-                                                <option key={seller._id} value={seller._id}>
-                                                    {seller.shopName || 'Unknown'} ({seller.firstName} {seller.lastName})
-                                                </option>
-                                            ))
-                                        ) : (
-                                            instructors.map(instructor => (
-                                                <option key={instructor._id} value={instructor._id}>
-                                                    {instructor.name || 'Unknown'} {instructor.expertise ? `- ${instructor.expertise}` : ''}
-                                                </option>
-                                            ))
-                                        )}
-                                    </select>
-                                )}
+                                    />
+                                    {searchingEntities && (
+                                        <div className="spinner-border spinner-border-sm position-absolute top-50 end-0 translate-middle" role="status">
+                                            <span className="visually-hidden">Searching...</span>
+                                        </div>
+                                    )}
+                                    {entityOptions.length > 0 && (
+                                        <div className="list-group position-absolute w-100 shadow-sm" style={{ zIndex: 10 }}>
+                                            {entityOptions.map(entity => (
+                                                <button
+                                                    key={entity.id}
+                                                    type="button"
+                                                    className="list-group-item list-group-item-action"
+                                                    onClick={() => selectEntity(entity)}
+                                                >
+                                                    {entity.label}
+                                                    {formData.type === 'seller' && entity.name && entity.name !== entity.label ? ` (${entity.name})` : ''}
+                                                    {formData.type === 'instructor' && entity.expertise ? ` - ${entity.expertise}` : ''}
+                                                </button>
+                                            ))}
+                                        </div>
+                                    )}
+                                </div>
                             </div>
                             
                             <div className="mb-3">
@@ -685,7 +662,7 @@ const UserComplaints = () => {
                                 )}
 
                                 {/* Attachment Viewer */}
-                                {showAttachment && selectedComplaint && (
+                                {showAttachment && selectedComplaint && attachmentUrl && (
                                     <div className="attachment-viewer mb-4">
                                         <div className="card">
                                             <div className="card-header bg-light d-flex justify-content-between align-items-center">
@@ -700,7 +677,7 @@ const UserComplaints = () => {
                                             <div className="card-body text-center">
                                                 {attachmentType === 'image' ? (
                                                     <img 
-                                                        src={`http://localhost:8080/complaints/view-attachment/${selectedComplaint._id}`} 
+                                                        src={attachmentUrl} 
                                                         alt="Complaint Attachment" 
                                                         className="attachment-image img-fluid" 
                                                         style={{ maxHeight: '400px' }}
@@ -713,7 +690,7 @@ const UserComplaints = () => {
                                                 ) : attachmentType === 'pdf' ? (
                                                     <div className="pdf-container">
                                                         <iframe
-                                                            src={`http://localhost:8080/complaints/view-attachment/${selectedComplaint._id}`}
+                                                            src={attachmentUrl}
                                                             width="100%"
                                                             height="500px"
                                                             title="PDF Viewer"
@@ -725,7 +702,7 @@ const UserComplaints = () => {
                                                         <p className="mb-1">This type of file cannot be previewed directly in the browser.</p>
                                                         <div className="mt-3">
                                                             <a 
-                                                                href={`http://localhost:8080/complaints/view-attachment/${selectedComplaint._id}`}
+                                                                href={attachmentUrl}
                                                                 target="_blank" 
                                                                 rel="noopener noreferrer"
                                                                 className="btn btn-primary"
@@ -3,6 +3,7 @@ import axios from 'axios';
 import { toast } from 'react-toastify';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faFileInvoice, faDownload } from '@fortawesome/free-solid-svg-icons';
+import fetchDocument from '../utils/fetchDocument';
 
 // ...existing code...
 
@@ -17,14 +18,8 @@ const UserBids = () => {
             const downloadLink = document.createElement('a');
             downloadLink.href = `http://localhost:8080/auction/invoice/${auctionId}`;
             
-            // Use fetch to get the PDF with authentication
-            fetch(downloadLink.href, {
-                headers: { 'Authorization': `Bearer ${token}` }
-            })
-            .then(response => {
-                if (response.ok) return response.blob();
-                throw new Error('Failed to download invoice');
-            })
+            // Fetch the PDF with authentication, polling the render job if it is not ready yet
+            fetchDocument(downloadLink.href, token)
             .then(blob => {
                 const url = window.URL.createObjectURL(blob);
                 downloadLink.href = url;
@@ -0,0 +1,40 @@
+// Download a rendered PDF (invoice, receipt) as a blob.
+//
+// The invoice routes answer 200 with the PDF when it is cached or renders
+// quickly, and 202 with {job_id, status_url} while the render queue is still
+// working on it. In that case poll the job until it completes and fetch its
+// result instead.
+const API_URL = 'http://localhost:8080';
+const POLL_INTERVAL = 1000; // ms
+const MAX_POLLS = 120;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// options.headers are sent with the first request only; options.errorFor(response)
+// builds the error for a failed first response
+const fetchDocument = async (url, token, options = {}) => {
+    const headers = { 'Authorization': `Bearer ${token}` };
+    const response = await fetch(url, { headers: { ...headers, ...options.headers } });
+    if (!response.ok) {
+        throw options.errorFor ? options.errorFor(response) : new Error('Failed to download document');
+    }
+    if (response.status !== 202) return response.blob();
+
+    const { status_url: statusUrl } = await response.json();
+    for (let attempt = 0; attempt < MAX_POLLS; attempt++) {
+        await sleep(POLL_INTERVAL);
+        const statusResponse = await fetch(`${API_URL}${statusUrl}`, { headers });
+        if (!statusResponse.ok) throw new Error('Failed to check document status');
+        const job = await statusResponse.json();
+
+        if (job.status === 'complete') {
+            const result = await fetch(`${API_URL}${job.result_url}`, { headers });
+            if (!result.ok) throw new Error('Failed to download document');
+            return result.blob();
+        }
+        if (job.status === 'failed') throw new Error(job.error || 'Document could not be generated');
+    }
+    throw new Error('Document is taking too long to generate, please try again');
+};
+
+export default fetchDocument;